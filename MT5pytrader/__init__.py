@@ -1 +1,42 @@
-from MT5pytrader.pytrader import Trader
\ No newline at end of file
+#public names are imported on first use (PEP 562), so "import MT5pytrader" stays cheap:
+#numpy, pandas and MetaTrader5 load only once something needs them
+_EXPORTS = {
+    "Trader": "MT5pytrader.pytrader",
+    "AsyncTrader": "MT5pytrader.async_trader",
+    "Backend": "MT5pytrader.backends",
+    "SimulatedTerminal": "MT5pytrader.simulator",
+    "TickBuffer": "MT5pytrader.ticks",
+    "TickStreamer": "MT5pytrader.ticks",
+    "MarketData": "MT5pytrader.marketdata",
+    "BarCache": "MT5pytrader.barcache",
+    "PositionMirror": "MT5pytrader.mirror",
+    "StopManager": "MT5pytrader.stopmanager",
+    "StopRule": "MT5pytrader.stops",
+    "Account": "MT5pytrader.pool",
+    "TerminalPool": "MT5pytrader.pool",
+    "RetryPolicy": "MT5pytrader.retry",
+    "Validator": "MT5pytrader.validation",
+    "Metrics": "MT5pytrader.metrics",
+    "CallTracer": "MT5pytrader.hooks",
+    "Hooks": "MT5pytrader.hooks",
+    "SlowCallLogger": "MT5pytrader.hooks",
+    "Journal": "MT5pytrader.journal",
+    "TickReplay": "MT5pytrader.replay",
+    "PendingOrder": "MT5pytrader.orders",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,145 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from MT5pytrader.pytrader import Trader
+
+
+class AsyncTrader:
+    """
+    asyncio facade over Trader.
+    Every call runs the blocking Trader method (and so the terminal calls) on a
+    dedicated thread pool, so a slow order does not block the event loop.
+
+    Parameters:
+        trader: Trader instance to wrap, a new Trader(**trader_kwargs) is created if None
+        max_workers: number of terminal calls that may run at the same time
+        timeout: default seconds to wait for a call, None waits forever
+
+    Functions:
+        AsyncTrader.open_buy(), open_sell(), open_buy_limit(), open_sell_limit()
+        AsyncTrader.place_orders(), orders_snapshot(), cancel_orders()
+        AsyncTrader.close_buy(), close_sell(), close_partial_buy(), close_partial_sell(), close_all()
+        AsyncTrader.modify_sl(), modify_tp(), break_even(), update_stops()
+        AsyncTrader.get_open_positions(), positions_snapshot(), running_profit(), pnl()
+        AsyncTrader.get_rates(), get_ticks()
+
+    Every function takes the arguments of the Trader method of the same name,
+    plus an optional timeout= overriding the default. On timeout asyncio.TimeoutError
+    is raised. Cancelling (or timing out) a call that has not started yet drops it;
+    a call already inside the terminal cannot be interrupted and finishes in the
+    background.
+
+    Usage:
+        async with AsyncTrader(max_workers = 4, timeout = 5) as trader:
+            await trader.open_buy("EURUSD", lot = 0.1, stop_loss = 200)
+
+        """
+
+    def __init__(self, trader = None, max_workers = 4, timeout = None, **trader_kwargs):
+        self.trader = trader if trader is not None else Trader(**trader_kwargs)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "MT5pytrader")
+
+    def __repr__(self):
+        return f"AsyncTrader({self.trader!r}, max_workers={self.max_workers})"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self, wait = True):
+        """
+        Shut the thread pool down, waiting for running calls unless wait is False.
+        """
+
+        self._executor.shutdown(wait = wait, cancel_futures = True)
+
+    async def run(self, func, *args, timeout = None, **kwargs):
+        """
+        Run any blocking callable on the trader's thread pool.
+
+        Parameters:
+            func: callable to run, e.g a Trader method
+            timeout: seconds to wait, defaults to AsyncTrader.timeout
+
+        Returns:
+            Whatever func returns
+
+            """
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout)
+
+    async def open_buy(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.open_buy, *args, timeout = timeout, **kwargs)
+
+    async def open_sell(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.open_sell, *args, timeout = timeout, **kwargs)
+
+    async def open_buy_limit(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.open_buy_limit, *args, timeout = timeout, **kwargs)
+
+    async def open_sell_limit(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.open_sell_limit, *args, timeout = timeout, **kwargs)
+
+    async def close_buy(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.close_buy, *args, timeout = timeout, **kwargs)
+
+    async def close_sell(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.close_sell, *args, timeout = timeout, **kwargs)
+
+    async def close_partial_buy(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.close_partial_buy, *args, timeout = timeout, **kwargs)
+
+    async def close_partial_sell(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.close_partial_sell, *args, timeout = timeout, **kwargs)
+
+    async def close_all(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.close_all, *args, timeout = timeout, **kwargs)
+
+    async def modify_sl(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.modify_sl, *args, timeout = timeout, **kwargs)
+
+    async def modify_tp(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.modify_tp, *args, timeout = timeout, **kwargs)
+
+    async def break_even(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.break_even, *args, timeout = timeout, **kwargs)
+
+    async def update_stops(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.update_stops, *args, timeout = timeout, **kwargs)
+
+    async def place_orders(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.place_orders, *args, timeout = timeout, **kwargs)
+
+    async def cancel_orders(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.cancel_orders, *args, timeout = timeout, **kwargs)
+
+    async def orders_snapshot(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.orders_snapshot, *args, timeout = timeout, **kwargs)
+
+    async def get_open_positions(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.get_open_positions, *args, timeout = timeout, **kwargs)
+
+    async def positions_snapshot(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.positions_snapshot, *args, timeout = timeout, **kwargs)
+
+    async def running_profit(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.running_profit, *args, timeout = timeout, **kwargs)
+
+    async def pnl(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.pnl, *args, timeout = timeout, **kwargs)
+
+    async def get_rates(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.get_rates, *args, timeout = timeout, **kwargs)
+
+    async def get_ticks(self, *args, timeout = None, **kwargs):
+        return await self.run(self.trader.get_ticks, *args, timeout = timeout, **kwargs)
@@ -0,0 +1,166 @@
+from MT5pytrader import constants
+
+
+#terminal functions Trader relies on
+BACKEND_CALLS = (
+    "initialize",
+    "login",
+    "shutdown",
+    "last_error",
+    "symbol_info",
+    "symbol_info_tick",
+    "symbol_select",
+    "symbols_get",
+    "copy_rates_from",
+    "copy_rates_from_pos",
+    "copy_rates_range",
+    "copy_ticks_from",
+    "copy_ticks_range",
+    "positions_total",
+    "positions_get",
+    "orders_get",
+    "order_send",
+    "order_check",
+)
+
+
+class Backend:
+    """
+    Interface of a terminal backend used by Trader.
+    The MetaTrader5 module itself is the reference implementation; other backends
+    (e.g SimulatedTerminal) subclass Backend and implement the same functions with
+    the same arguments and return types. Every MetaTrader5 constant Trader uses is
+    available as an attribute.
+
+    Functions:
+        initialize(path=None, **kwargs) - Connect to the terminal, returns bool
+        login(login, password=None, server=None, timeout=None) - Log in to an account, returns bool
+        shutdown() - Close the connection to the terminal
+        last_error() - Returns (code, description) of the last error
+        symbol_info(symbol) - Returns SymbolInfo or None
+        symbol_info_tick(symbol) - Returns Tick or None
+        symbol_select(symbol, enable=True) - Show/hide a symbol in MarketWatch, returns bool
+        symbols_get(group=None) - Returns a tuple of SymbolInfo
+        copy_rates_from(symbol, timeframe, date_from, count) - Returns bars ending at date_from or None
+        copy_rates_from_pos(symbol, timeframe, start_pos, count) - Returns bars counted back from start_pos or None
+        copy_rates_range(symbol, timeframe, date_from, date_to) - Returns bars within the range or None
+        copy_ticks_from(symbol, date_from, count, flags) - Returns ticks starting at date_from or None
+        copy_ticks_range(symbol, date_from, date_to, flags) - Returns ticks within the range or None
+        positions_total() - Returns the number of open positions
+        positions_get(symbol=None, group=None, ticket=None) - Returns a tuple of TradePosition
+        orders_get(symbol=None, group=None, ticket=None) - Returns a tuple of TradeOrder
+        order_send(request) - Returns OrderSendResult or None
+        order_check(request) - Returns OrderCheckResult or None
+
+        """
+
+    def initialize(self, path = None, **kwargs):
+        raise NotImplementedError
+
+    def login(self, login, password = None, server = None, timeout = None):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+    def last_error(self):
+        raise NotImplementedError
+
+    def symbol_info(self, symbol):
+        raise NotImplementedError
+
+    def symbol_info_tick(self, symbol):
+        raise NotImplementedError
+
+    def symbol_select(self, symbol, enable = True):
+        raise NotImplementedError
+
+    def symbols_get(self, group = None):
+        raise NotImplementedError
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        raise NotImplementedError
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        raise NotImplementedError
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        raise NotImplementedError
+
+    def copy_ticks_from(self, symbol, date_from, count, flags = constants.COPY_TICKS_ALL):
+        raise NotImplementedError
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags = constants.COPY_TICKS_ALL):
+        raise NotImplementedError
+
+    def positions_total(self):
+        raise NotImplementedError
+
+    def positions_get(self, symbol = None, group = None, ticket = None):
+        raise NotImplementedError
+
+    def orders_get(self, symbol = None, group = None, ticket = None):
+        raise NotImplementedError
+
+    def order_send(self, request):
+        raise NotImplementedError
+
+    def order_check(self, request):
+        raise NotImplementedError
+
+
+#expose every MetaTrader5 constant on backends (Backend.TRADE_ACTION_DEAL, ...)
+for _name in dir(constants):
+    if _name.isupper():
+        setattr(Backend, _name, getattr(constants, _name))
+del _name
+
+
+def load_backend(backend = None):
+    """
+    Resolve the backend Trader talks to.
+
+    Parameters:
+        backend: a Backend instance (or any object implementing BACKEND_CALLS),
+                 None for the MetaTrader5 package
+
+    Returns:
+        The backend object
+
+        """
+
+    if backend is not None:
+        missing = [name for name in BACKEND_CALLS if not callable(getattr(backend, name, None))]
+        if missing:
+            raise TypeError(f"backend {backend!r} does not implement {', '.join(missing)}")
+        return backend
+
+    try:
+        import MetaTrader5
+    except ImportError as error:
+        raise ImportError("The MetaTrader5 package is required to trade on a terminal "
+                          "(pip install MetaTrader5, Windows only). "
+                          "Pass backend=SimulatedTerminal() to run without it.") from error
+    return MetaTrader5
+
+
+class LazyBackend:
+    """
+    Stands in for a backend until it is needed: the first function looked up calls
+    resolve() (e.g Trader.start(), which loads and initializes the terminal) and is
+    taken from the backend it returns. MetaTrader5 constants are served without resolving.
+
+        """
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+
+    def __repr__(self):
+        return "LazyBackend()"
+
+    def __getattr__(self, name):
+        if name.isupper() and hasattr(constants, name):
+            return getattr(constants, name)
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
@@ -0,0 +1,229 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from MT5pytrader import constants
+
+
+#one simulated trade
+TRADE_DTYPE = np.dtype([
+    ("entry_index", "<i8"),     #bar the position opened on (the bar after the signal)
+    ("exit_index", "<i8"),      #bar the position closed on
+    ("entry_time", "<i8"),
+    ("exit_time", "<i8"),
+    ("type", "<u1"),            #POSITION_TYPE_BUY / POSITION_TYPE_SELL
+    ("price_open", "<f8"),      #fill price (ask for buys, bid for sells)
+    ("sl", "<f8"),
+    ("tp", "<f8"),
+    ("price_close", "<f8"),
+    ("reason", "<u1"),          #DEAL_REASON_SL, DEAL_REASON_TP, or DEAL_REASON_EXPERT (max_bars / end of data)
+    ("points", "<f8"),          #result in points
+    ("profit", "<f8"),          #result in the quote currency, as SimulatedTerminal computes it
+])
+
+#outcome of backtest()
+BacktestResult = namedtuple("BacktestResult", [
+    "trades",           #TRADE_DTYPE array, by entry bar
+    "profit",           #total profit
+    "wins",
+    "losses",
+    "bars",             #bars in the test
+    "elapsed",          #seconds
+    "bars_per_second",
+])
+
+
+def backtest(bars, long_entries = None, short_entries = None, stop_loss = None, take_profit = None, symbol = None,
+             point = 0.00001, digits = 5, contract_size = 100000.0, stops_level = 0, volume = 0.1, spread = None,
+             slippage = 0, max_bars = None, overlap = False, window = 64, chunk = 65536):
+    """
+    Vectorized bar-level backtest of entry signals with SL/TP in points, following Trader's conventions.
+
+    - a signal on bar i is acted on at the open of bar i + 1 (the signal is known once bar i closed)
+    - bars are bid prices, the ask is bid + spread * point
+    - like open_buy/open_sell, buys are priced at the ask and sells at the bid, and SL/TP are
+      stop_loss/take_profit points from that price, rounded to digits and moved out to
+      stops_level (Validator "adjust" mode). Fills are at that price (+ slippage points)
+    - buys close at the bid, sells at the ask, as SimulatedTerminal resolves SL/TP: SL when the
+      price reaches it, TP likewise, at the level or at the open when the bar gaps through it.
+      When SL and TP are both inside one bar, SL is assumed first
+    - positions still open after max_bars bars, or at the end of the data, close at the bar close
+
+    Exits are found for all entries at once: each entry scans a window of bars ahead,
+    the ones without an exit scan the next, twice as long, window (entries are processed
+    chunk at a time to bound memory).
+
+    Parameters:
+        bars: structured array with open, high, low, close (and time, spread) fields, e.g from get_rates()
+        long_entries, short_entries: boolean arrays, one per bar
+        stop_loss, take_profit: distances in points, scalars or one per bar (of the signal), None/0 for none
+        symbol: symbol_info of the symbol, sets point, digits, contract_size and stops_level
+        point, digits, contract_size, stops_level: symbol properties when symbol is None
+        volume: lots per trade
+        spread: spread in points, scalar or per bar, the spread field of bars by default (0 without it)
+        slippage: points every entry is filled worse than the price
+        max_bars: bars a position may stay open, None for no limit
+        overlap: False opens a position only when the previous one is closed (like one position
+            per strategy live), True trades every signal
+        window: first exit search window in bars
+        chunk: entries resolved per vectorized pass
+
+    Returns:
+        BacktestResult
+
+        """
+
+    started = time.perf_counter()
+    if symbol is not None:
+        point = symbol.point
+        digits = symbol.digits
+        contract_size = getattr(symbol, "trade_contract_size", contract_size)
+        stops_level = getattr(symbol, "trade_stops_level", stops_level)
+    n = len(bars)
+    open_ = np.asarray(bars["open"], dtype = np.float64)
+    high = np.asarray(bars["high"], dtype = np.float64)
+    low = np.asarray(bars["low"], dtype = np.float64)
+    close = np.asarray(bars["close"], dtype = np.float64)
+    times = np.asarray(bars["time"], dtype = np.int64) if "time" in bars.dtype.names else np.arange(n, dtype = np.int64)
+    if spread is None:
+        spread = bars["spread"] if "spread" in bars.dtype.names else 0
+    spread = np.broadcast_to(np.asarray(spread, dtype = np.float64) * point, (n,))
+
+    #signals on bar i enter on bar i + 1, signals on the last bar are dropped
+    signal, buy = [], []
+    for entries, is_buy in ((long_entries, True), (short_entries, False)):
+        if entries is not None:
+            index = np.flatnonzero(np.asarray(entries, dtype = bool)[:n - 1])
+            signal.append(index)
+            buy.append(np.full(len(index), is_buy))
+    if not signal:
+        raise ValueError("no entries: pass long_entries and/or short_entries")
+    signal = np.concatenate(signal)
+    buy = np.concatenate(buy)
+    order = np.argsort(signal, kind = "stable")
+    signal, buy = signal[order], buy[order]
+    entry = signal + 1
+
+    #priced like open_buy/open_sell: buys at the ask, sells at the bid
+    bid = open_[entry]
+    ask = bid + spread[entry]
+    ref = np.where(buy, ask, bid)
+    direction = np.where(buy, 1.0, -1.0)
+    level = stops_level * point
+    sl = _levels(stop_loss, signal, ref, -direction, point, digits, level)
+    tp = _levels(take_profit, signal, ref, direction, point, digits, level)
+    price_open = np.round(ref + direction * slippage * point, digits)
+
+    exit_index, price_close, reason = _resolve(entry, buy, sl, tp, open_, high, low, close, spread, max_bars, window, chunk)
+
+    if not overlap and len(entry):
+        keep = []
+        k = 0
+        while k < len(entry):
+            keep.append(k)
+            k = int(np.searchsorted(entry, exit_index[k], side = "right"))
+        keep = np.asarray(keep)
+        entry, buy, sl, tp, price_open = entry[keep], buy[keep], sl[keep], tp[keep], price_open[keep]
+        exit_index, price_close, reason, direction = exit_index[keep], price_close[keep], reason[keep], direction[keep]
+
+    trades = np.zeros(len(entry), dtype = TRADE_DTYPE)
+    trades["entry_index"] = entry
+    trades["exit_index"] = exit_index
+    trades["entry_time"] = times[entry]
+    trades["exit_time"] = times[exit_index]
+    trades["type"] = np.where(buy, constants.POSITION_TYPE_BUY, constants.POSITION_TYPE_SELL)
+    trades["price_open"] = price_open
+    trades["sl"] = sl
+    trades["tp"] = tp
+    trades["price_close"] = price_close
+    trades["reason"] = reason
+    moved = (price_close - price_open) * direction
+    trades["points"] = np.round(moved / point, 1)
+    trades["profit"] = np.round(moved * volume * contract_size, 2)
+
+    elapsed = time.perf_counter() - started
+    profit = float(np.round(trades["profit"].sum(), 2))
+    return BacktestResult(trades, profit, int((trades["profit"] > 0).sum()), int((trades["profit"] < 0).sum()),
+                          n, elapsed, n / elapsed if elapsed else 0.0)
+
+
+def _levels(points, signal, ref, direction, point, digits, level):
+    #SL (direction -1 for buys) or TP (+1 for buys) prices, 0 where there is none
+    if points is None:
+        return np.zeros(len(signal))
+    points = np.asarray(points, dtype = np.float64)
+    if points.ndim:
+        points = points[signal]
+    prices = np.round(ref + direction * points * point, digits)
+    #stops closer than stops_level to the price are moved out to it (Validator, mode "adjust")
+    limit = np.round(ref + direction * level, digits)
+    prices = np.where(direction > 0, np.maximum(prices, limit), np.minimum(prices, limit))
+    return np.where(np.broadcast_to(points, (len(signal),)) > 0, prices, 0.0)
+
+
+def _resolve(entry, buy, sl, tp, open_, high, low, close, spread, max_bars, window, chunk):
+    #bar, price and reason of the exit of every entry
+    n = len(open_)
+    m = len(entry)
+    exit_index = np.full(m, n - 1, dtype = np.int64)
+    price_close = np.zeros(m)
+    reason = np.full(m, constants.DEAL_REASON_EXPERT, dtype = np.uint8)
+    last = np.full(m, n - 1, dtype = np.int64) if max_bars is None else np.minimum(entry + max_bars - 1, n - 1)
+
+    #entries without SL and TP only close at their last bar
+    no_stops = (sl <= 0) & (tp <= 0)
+    price_close[no_stops] = close[last[no_stops]] + np.where(buy[no_stops], 0.0, spread[last[no_stops]])
+    exit_index[no_stops] = last[no_stops]
+    with_stops = np.flatnonzero(~no_stops)
+
+    for begin in range(0, len(with_stops), chunk):
+        pending = with_stops[begin:begin + chunk]
+        start = entry[pending]
+        width = window
+        while len(pending):
+            #never wider than the bars left to the furthest last bar (at most n)
+            width = min(width, int((last[pending] - start).max()) + 1)
+            idx = start[:, None] + np.arange(width)
+            valid = idx <= last[pending][:, None]
+            idx = np.minimum(idx, n - 1)
+            b = buy[pending][:, None]
+            sp = np.where(b, 0.0, spread[idx]) #buys close at the bid, sells at the ask
+            hi = high[idx] + sp
+            lo = low[idx] + sp
+            s = sl[pending][:, None]
+            t = tp[pending][:, None]
+            sl_hit = (s > 0) & np.where(b, lo <= s, hi >= s) & valid
+            tp_hit = (t > 0) & np.where(b, hi >= t, lo <= t) & valid
+            hit = sl_hit | tp_hit
+            found = hit.any(axis = 1)
+
+            rows = np.flatnonzero(found)
+            if len(rows):
+                first = hit[rows].argmax(axis = 1)
+                j = idx[rows, first]
+                k = pending[rows]
+                is_sl = sl_hit[rows, first]
+                o = open_[j] + sp[rows, first]
+                stop = np.where(is_sl, sl[k], tp[k])
+                #gaps through the level fill at the open, like a tick beyond it would
+                long_side = buy[k]
+                through = np.where(is_sl, np.where(long_side, o <= stop, o >= stop), np.where(long_side, o >= stop, o <= stop))
+                exit_index[k] = j
+                price_close[k] = np.where(through & (j > entry[k]), o, stop)
+                reason[k] = np.where(is_sl, constants.DEAL_REASON_SL, constants.DEAL_REASON_TP)
+
+            #entries whose search reached their last bar close at its close
+            done = ~found & (start + width > last[pending])
+            rows = np.flatnonzero(done)
+            if len(rows):
+                k = pending[rows]
+                exit_index[k] = last[k]
+                price_close[k] = close[last[k]] + np.where(buy[k], 0.0, spread[last[k]])
+
+            remaining = ~(found | done)
+            pending = pending[remaining]
+            start = start[remaining] + width
+            #twice the window, within about chunk * window cells per pass
+            width = max(window, min(width * 2, chunk * window // max(len(pending), 1)))
+    return exit_index, price_close, reason
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from MT5pytrader import constants
+from MT5pytrader.marketdata import convert, timeframe_value
+
+
+#on-disk record of one bar, the layout of the arrays returned by copy_rates_*
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+
+TIMEFRAME_NAMES = {getattr(constants, name): name[len("TIMEFRAME_"):] for name in dir(constants) if name.startswith("TIMEFRAME_")}
+
+
+class BarCache:
+    """
+    Local cache of bars, one append-only file per (symbol, timeframe).
+
+    Files hold raw BAR_DTYPE records sorted by time (root/SYMBOL/M1.bars) and are read
+    through np.memmap, so opening years of M1 history costs no I/O until the bars are
+    touched. Range queries binary search the time column (O(log n)).
+
+    On each get() only the missing tail is fetched from the terminal: every bar from
+    the last cached one onwards. The last cached bar is rewritten only when it changed
+    (it may have been the forming bar), newer bars are appended.
+
+    Functions:
+        BarCache.get() - Bars of a symbol, brought up to date first
+        BarCache.update() - Fetch the missing tail of a symbol, returns the number of bars written
+        BarCache.read() - Bars from the cache only, no terminal call
+
+    Parameters:
+        terminal: MetaTrader5 module (or compatible backend)
+        root: directory of the cache files
+        history_start: first date (datetime or epoch seconds) fetched for a new symbol,
+            None fetches the last initial_bars bars
+        initial_bars: bars fetched for a new symbol when history_start is None
+
+    Attributes:
+        fetched: number of bars received from the terminal
+        written: number of bars written to disk
+
+        """
+
+    def __init__(self, terminal, root, history_start = None, initial_bars = 100000):
+        self.terminal = terminal
+        self.root = root
+        self.history_start = history_start
+        self.initial_bars = initial_bars
+        self.fetched = 0
+        self.written = 0
+        self._maps = {} #(symbol, timeframe) -> memmap of the file, None if empty
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"BarCache({self.root!r}, {len(self._maps)} open)"
+
+    def path(self, symbol, timeframe):
+        timeframe = timeframe_value(timeframe)
+        return os.path.join(self.root, symbol, TIMEFRAME_NAMES.get(timeframe, str(timeframe)) + ".bars")
+
+    def get(self, symbol, timeframe, date_from = None, date_to = None, count = None, output = "numpy", refresh = True):
+        """
+        Bars of a symbol, fetching the missing tail from the terminal first.
+
+        Parameters:
+            symbol: Symbol of the bars
+            timeframe: TIMEFRAME_* constant or name, e.g "M1"
+            date_from, date_to: only bars between these dates (datetime or epoch seconds, inclusive)
+            count: only the last count bars (of the date range)
+            output: "numpy" (memmap-backed structured array), "pandas" or "arrow", see MarketData
+            refresh: False to serve the cache without calling the terminal
+
+        Returns:
+            bars in the requested output
+
+            """
+
+        if refresh:
+            self.update(symbol, timeframe)
+        return convert(self.read(symbol, timeframe, date_from, date_to, count), output)
+
+    def read(self, symbol, timeframe, date_from = None, date_to = None, count = None):
+        """
+        Cached bars between date_from and date_to (last count of them), a read-only memmap view.
+        """
+
+        bars = self._map(symbol, timeframe_value(timeframe))
+        if bars is None:
+            return np.zeros(0, dtype = BAR_DTYPE)
+        times = bars["time"]
+        start = 0 if date_from is None else int(times.searchsorted(int(_seconds(date_from)), side = "left"))
+        end = len(bars) if date_to is None else int(times.searchsorted(int(_seconds(date_to)), side = "right"))
+        if count is not None:
+            start = max(start, end - count)
+        return bars[start:end]
+
+    def update(self, symbol, timeframe):
+        """
+        Fetch bars from the last cached one up to now and store them.
+
+        Returns:
+            number of bars written, None if the terminal call failed
+
+            """
+
+        timeframe = timeframe_value(timeframe)
+        with self._lock:
+            bars = self._map(symbol, timeframe)
+            if bars is not None:
+                last = int(bars["time"][-1])
+                rates = self.terminal.copy_rates_range(symbol, timeframe, last, int(time.time()) + 86400)
+            elif self.history_start is not None:
+                rates = self.terminal.copy_rates_range(symbol, timeframe, self.history_start, int(time.time()) + 86400)
+            else:
+                rates = self.terminal.copy_rates_from_pos(symbol, timeframe, 0, self.initial_bars)
+            if rates is None:
+                return None
+            self.fetched += len(rates)
+
+            records = _records(rates)
+            replace = False
+            if bars is not None:
+                #the last cached bar is rewritten when it changed, only newer bars are appended
+                records = records[records["time"] >= last]
+                replace = len(records) > 0 and records["time"][0] == last
+                if replace and records[:1].tobytes() == bars[-1:].tobytes():
+                    records, replace = records[1:], False
+            if len(records) == 0:
+                return 0
+            return self._write(symbol, timeframe, records, replace)
+
+    def close(self):
+        """
+        Drop every open memmap (arrays already returned stay valid).
+        """
+
+        with self._lock:
+            self._maps.clear()
+
+    def _write(self, symbol, timeframe, records, replace):
+        path = self.path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size % BAR_DTYPE.itemsize:
+                #drop a partial record (files are only ever grown otherwise, arrays
+                #returned earlier may still map them)
+                size -= size % BAR_DTYPE.itemsize
+                f.truncate(size)
+            f.seek(size - BAR_DTYPE.itemsize if replace else size)
+            f.write(records.tobytes())
+        self._maps.pop((symbol, timeframe), None)
+        self.written += len(records)
+        return len(records)
+
+    def _map(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        try:
+            return self._maps[key]
+        except KeyError:
+            pass
+        with self._lock:
+            path = self.path(symbol, timeframe)
+            n = os.path.getsize(path) // BAR_DTYPE.itemsize if os.path.exists(path) else 0
+            #a partial record left by an interrupted write is ignored (and overwritten by the next update)
+            bars = np.memmap(path, dtype = BAR_DTYPE, mode = "r", shape = (n,)) if n else None
+            self._maps[key] = bars
+            return bars
+
+
+def _records(rates):
+    #copy_rates_* result -> BAR_DTYPE records (missing fields are 0)
+    records = np.zeros(len(rates), dtype = BAR_DTYPE)
+    for name in BAR_DTYPE.names:
+        if name in rates.dtype.names:
+            records[name] = rates[name]
+    return records
+
+
+def _seconds(value):
+    #datetime or number -> epoch seconds
+    return value.timestamp() if hasattr(value, "timestamp") else value
@@ -0,0 +1,111 @@
+import time
+
+from MT5pytrader import constants
+from MT5pytrader.validation import Rejection, normalize_volume
+
+
+class BulkReport:
+    """
+    Per-ticket results of a bulk operation.
+
+    Attributes:
+        results: list of ExecutionReport, in request order
+        elapsed: wall time in seconds for the whole batch
+        succeeded: results that were executed
+        failed: every other result
+
+        """
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+        self.succeeded = [r for r in results if r.ok]
+        self.failed = [r for r in results if not r.ok]
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __repr__(self):
+        return f"BulkReport({len(self.succeeded)} ok, {len(self.failed)} failed, {self.elapsed:.3f}s)"
+
+
+def close_requests(terminal, positions, deviation, type_time, type_filling, percent = None, get_tick = None, get_meta = None, rejected = None):
+    """
+    Build one close request per position, fetching each symbol's tick only once.
+
+    Parameters:
+        terminal: MetaTrader5 module (or compatible backend)
+        positions: sequence of TradePosition to close
+        deviation, type_time, type_filling: request fields, as on Trader
+        percent: fraction of each position's volume to close, None closes it fully
+        get_tick: callable returning the tick of a symbol, defaults to terminal.symbol_info_tick
+        get_meta: callable returning the SymbolMeta of a symbol (e.g SymbolCache.get), partial
+            volumes are snapped down to its volume_step (rounded to 2 decimals without it)
+        rejected: dict filled with {index: Rejection} for positions whose symbol has no tick
+            (unknown or disabled symbol), their request has price 0 and must not be sent
+
+    Returns:
+        A list of request dicts, in the order of positions
+
+        """
+
+    get_tick = get_tick or terminal.symbol_info_tick
+    ticks = {}
+    requests = []
+    for i, position in enumerate(positions):
+        if position.symbol not in ticks:
+            ticks[position.symbol] = get_tick(position.symbol)
+        tick = ticks[position.symbol]
+
+        # a buy is closed by selling at bid, a sell by buying at ask
+        if position.type == terminal.POSITION_TYPE_BUY:
+            order_type, price = terminal.ORDER_TYPE_SELL, tick.bid if tick is not None else 0.0
+        else:
+            order_type, price = terminal.ORDER_TYPE_BUY, tick.ask if tick is not None else 0.0
+        if tick is None and rejected is not None:
+            rejected[i] = Rejection(constants.TRADE_RETCODE_PRICE_OFF, f"no tick for {position.symbol}, error code={terminal.last_error()}")
+
+        if percent is None:
+            volume = position.volume
+        else:
+            meta = get_meta(position.symbol) if get_meta is not None else None
+            volume = round(position.volume * percent, 2) if meta is None else normalize_volume(position.volume * percent, meta)
+        requests.append({
+            "action": terminal.TRADE_ACTION_DEAL,
+            "symbol": position.symbol,
+            "volume": volume,
+            "type": order_type,
+            "position": position.ticket,
+            "price": price,
+            "deviation": deviation,
+            "type_time": type_time,
+            "type_filling": type_filling,
+        })
+    return requests
+
+
+def dispatch(send, requests, max_workers = 8):
+    """
+    Send requests through a bounded pool of worker threads.
+
+    Parameters:
+        send: callable sending one request and returning its ExecutionReport
+        requests: list of request dicts
+        max_workers: maximum number of requests in flight
+
+    Returns:
+        A BulkReport with one ExecutionReport per request, in request order
+
+        """
+
+    start = time.perf_counter()
+    if len(requests) <= 1 or max_workers <= 1:
+        results = [send(request) for request in requests]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers = min(max_workers, len(requests))) as pool:
+            results = list(pool.map(send, requests))
+    return BulkReport(results, time.perf_counter() - start)
@@ -0,0 +1,244 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+
+#one terminal call, as passed to after hooks
+TerminalCall = namedtuple("TerminalCall", [
+    "name",     #backend function, e.g "order_send"
+    "args",
+    "kwargs",
+    "result",   #None if the call raised
+    "error",    #exception raised by the call, None otherwise
+    "wall",     #seconds (perf_counter)
+    "cpu",      #seconds of CPU time of the calling thread (thread_time)
+])
+
+#handle returned by Hooks.add()
+Hook = namedtuple("Hook", ["before", "after", "calls"])
+
+
+class Hooks:
+    """
+    Registry of before/after callbacks around the terminal calls of a Trader (Trader.hooks).
+
+    before(name, args, kwargs) runs before the call, after(TerminalCall) once it returned
+    (or raised). Hooks run on the calling thread, exceptions they raise propagate.
+    While no hook is registered the terminal is not wrapped at all, and calls without
+    hooks of their own go straight to the terminal.
+
+    Functions:
+        Hooks.add() - Register a before and/or after callback, returns a handle
+        Hooks.remove() - Unregister a handle
+        Hooks.clear() - Unregister everything
+
+        """
+
+    def __init__(self, on_change = None):
+        self._hooks = []
+        self._on_change = on_change
+
+    def __repr__(self):
+        return f"Hooks({len(self._hooks)} registered)"
+
+    def __len__(self):
+        return len(self._hooks)
+
+    def __iter__(self):
+        return iter(list(self._hooks))
+
+    def add(self, before = None, after = None, calls = None):
+        """
+        Parameters:
+            before: callable(name, args, kwargs)
+            after: callable(TerminalCall)
+            calls: terminal functions to hook, e.g ("order_send", "positions_get"), None for every call
+
+        Returns:
+            Hook handle, for remove()
+
+            """
+
+        if before is None and after is None:
+            raise ValueError("a hook needs before and/or after")
+        hook = Hook(before, after, None if calls is None else frozenset([calls] if isinstance(calls, str) else calls))
+        self._hooks.append(hook)
+        self._changed()
+        return hook
+
+    def remove(self, hook):
+        self._hooks.remove(hook)
+        self._changed()
+
+    def clear(self):
+        self._hooks.clear()
+        self._changed()
+
+    def for_call(self, name):
+        #(before callbacks, after callbacks) of a terminal function
+        hooks = [hook for hook in self._hooks if hook.calls is None or name in hook.calls]
+        return ([hook.before for hook in hooks if hook.before is not None],
+                [hook.after for hook in hooks if hook.after is not None])
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+
+class HookedBackend:
+    """
+    Wraps a backend, running the hooks registered for each function around its calls.
+    The hooks are looked up once per function, so a new HookedBackend is built whenever
+    they change (Trader does this).
+
+        """
+
+    def __init__(self, backend, hooks):
+        self.backend = backend
+        self.hooks = hooks
+
+    def __repr__(self):
+        return f"HookedBackend({self.backend!r})"
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        befores, afters = self.hooks.for_call(name)
+        if befores or afters:
+            attr = _hooked(name, attr, befores, afters)
+        # cached on the instance, __getattr__ only runs once per function
+        self.__dict__[name] = attr
+        return attr
+
+
+def _hooked(name, function, befores, afters):
+    clock = time.perf_counter
+    cpu_clock = time.thread_time
+
+    def hooked(*args, **kwargs):
+        for before in befores:
+            before(name, args, kwargs)
+        if not afters:
+            return function(*args, **kwargs)
+        result = error = None
+        start, cpu_start = clock(), cpu_clock()
+        try:
+            result = function(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            call = TerminalCall(name, args, kwargs, result, error, clock() - start, cpu_clock() - cpu_start)
+            for after in afters:
+                after(call)
+
+    hooked.__name__ = name
+    return hooked
+
+
+class SlowCallLogger:
+    """
+    After hook logging terminal calls slower than a threshold, e.g
+    trader.hooks.add(after = SlowCallLogger(threshold = 0.05, sample = 0.1)).
+
+    Parameters:
+        threshold: seconds (wall time) above which a call is slow
+        sample: fraction of the slow calls that are logged, to keep logging cheap under load
+        log: callable(message), print by default
+        keep: number of recent slow calls kept in SlowCallLogger.recent
+
+    SlowCallLogger.slow counts every slow call, logged or not.
+
+        """
+
+    def __init__(self, threshold = 0.05, sample = 1.0, log = print, keep = 100):
+        self.threshold = threshold
+        self.sample = sample
+        self.log = log
+        self.slow = 0
+        self.recent = deque(maxlen = keep)
+
+    def __repr__(self):
+        return f"SlowCallLogger(threshold={self.threshold}, sample={self.sample}, slow={self.slow})"
+
+    def __call__(self, call):
+        if call.wall < self.threshold:
+            return
+        self.slow += 1
+        self.recent.append(call)
+        if self.sample >= 1 or random.random() < self.sample:
+            args = ", ".join([_short(arg) for arg in call.args] + [f"{key}={_short(value)}" for key, value in call.kwargs.items()])
+            outcome = f"raised {call.error!r}" if call.error is not None else f"retcode={call.result.retcode}" if hasattr(call.result, "retcode") else ""
+            self.log(f"slow terminal call {call.name}({args}): {call.wall * 1000:.1f}ms wall, {call.cpu * 1000:.1f}ms cpu {outcome}".rstrip())
+
+
+class CallTracer:
+    """
+    After hook counting the terminal calls made by each Trader method, e.g
+    tracer = CallTracer(trader); trader.hooks.add(after = tracer); ...; tracer.counts["open_buy"]
+    -> Counter({"symbol_info_tick": 1, "order_send": 1}).
+
+    The method is the outermost public Trader method on the calling thread's stack
+    (requests sent from dispatch worker threads are attributed to their operation,
+    e.g "close"). Calls made outside any Trader method count under "<other>".
+
+    Parameters:
+        trader: Trader whose methods are traced
+
+        """
+
+    def __init__(self, trader):
+        self.trader = trader
+        self.counts = {}
+        self.wall = Counter()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"CallTracer({sum(sum(counts.values()) for counts in self.counts.values())} calls)"
+
+    def __call__(self, call):
+        method = self._method()
+        with self._lock:
+            counts = self.counts.get(method)
+            if counts is None:
+                counts = self.counts[method] = Counter()
+            counts[call.name] += 1
+            self.wall[method] += call.wall
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.wall.clear()
+
+    def report(self):
+        """
+        Returns:
+            list of (method, terminal calls, wall seconds in them, Counter of calls), most calls first
+
+            """
+
+        with self._lock:
+            rows = [(method, sum(counts.values()), self.wall[method], Counter(counts)) for method, counts in self.counts.items()]
+        return sorted(rows, key = lambda row: row[1], reverse = True)
+
+    def _method(self):
+        method = op = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_locals.get("self") is self.trader:
+                name = frame.f_code.co_name
+                if not name.startswith("_") and hasattr(type(self.trader), name):
+                    method = name
+                elif op is None and isinstance(frame.f_locals.get("op"), str):
+                    op = frame.f_locals["op"]
+            frame = frame.f_back
+        return method or op or "<other>"
+
+
+def _short(value, limit = 60):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
@@ -0,0 +1,320 @@
+import glob
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from MT5pytrader import constants
+
+
+#on-disk record of one order_send: the request, its result and the prices it was answered at
+JOURNAL_DTYPE = np.dtype([
+    ("time_ns", "<i8"),         #epoch nanoseconds when the request was sent
+    ("elapsed_ns", "<i8"),      #time spent in order_send
+    ("action", "<u4"),
+    ("type", "<u4"),
+    ("symbol", "S32"),
+    ("volume", "<f8"),
+    ("price", "<f8"),
+    ("sl", "<f8"),
+    ("tp", "<f8"),
+    ("deviation", "<u4"),
+    ("type_time", "<u4"),
+    ("type_filling", "<u4"),
+    ("magic", "<u8"),
+    ("position", "<u8"),
+    ("order", "<u8"),           #pending order a modify/remove acts on
+    ("comment", "S32"),
+    ("retcode", "<i4"),         #-1 if order_send returned None
+    ("result_order", "<u8"),
+    ("result_deal", "<u8"),
+    ("result_volume", "<f8"),
+    ("result_price", "<f8"),
+    ("bid", "<f8"),             #prices the server answered with
+    ("ask", "<f8"),
+])
+
+#first 64 bytes of every segment file, count is updated once the records it covers are flushed
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("itemsize", "<u4"),
+    ("capacity", "<u8"),
+    ("count", "<u8"),
+    ("created_ns", "<i8"),
+    ("reserved", "S24"),
+])
+
+MAGIC = b"MT5JRNL"
+VERSION = 1
+
+_REQUEST_FIELDS = ("action", "type", "symbol", "volume", "price", "sl", "tp", "deviation", "type_time",
+                   "type_filling", "magic", "position", "order", "comment")
+#request fields a terminal reads as "not set" when 0, left out of replayed requests
+_UNSET_FIELDS = ("sl", "tp", "position", "order")
+
+
+class Journal:
+    """
+    Append-only binary journal of every order_send, written on a background thread.
+
+    The trading thread only appends (request, result, timings) to a queue; the writer
+    thread packs them into fixed-size JOURNAL_DTYPE records and copies them into a
+    preallocated, memory-mapped segment file. A full segment is flushed and the next
+    one started (root/journal-000001.mtj, ...). A new Journal always starts a new segment.
+
+    Functions:
+        Journal.attach() - Journal every order_send of a Trader (registers a hook)
+        Journal.record() - Journal one request and its result
+        Journal.flush() - Write everything queued and flush the segment to disk
+        Journal.close() - Flush and stop the writer
+
+    Parameters:
+        root: directory of the segment files
+        segment_records: records per segment file
+        flush_interval: seconds between writer passes (and disk flushes)
+        prefix: segment file name prefix
+
+    Attributes:
+        written: records written so far
+        segments: segment files written so far
+
+    Read journals back with read_journal() / iter_journal(), replay them with replay_journal().
+
+        """
+
+    def __init__(self, root, segment_records = 65536, flush_interval = 0.2, prefix = "journal"):
+        os.makedirs(root, exist_ok = True)
+        self.root = root
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+        self.written = 0
+        self.segments = []
+        self._pending = deque()
+        self._lock = threading.Lock() #held while writing
+        self._stop = threading.Event()
+        existing = segment_paths(root, prefix)
+        self._index = int(existing[-1][-10:-4]) + 1 if existing else 1
+        self._header = self._records = None
+        self._open_segment()
+        self._thread = threading.Thread(target = self._run, name = "MT5pytrader-journal", daemon = True)
+        self._thread.start()
+
+    def __repr__(self):
+        return f"Journal({self.root!r}, written={self.written}, queued={len(self._pending)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, call):
+        #after hook of order_send (see attach())
+        elapsed_ns = int(call.wall * 1e9)
+        request = call.args[0] if call.args else call.kwargs["request"]
+        self._pending.append((time.time_ns() - elapsed_ns, elapsed_ns, request.copy(), call.result))
+
+    def attach(self, trader):
+        """
+        Journal every order_send of a Trader, retries included.
+
+        Returns:
+            Hook handle, trader.hooks.remove() it to stop journaling
+
+            """
+
+        return trader.hooks.add(after = self, calls = "order_send")
+
+    def record(self, request, result, sent_ns = None, elapsed_ns = 0):
+        """
+        Queue one request and its OrderSendResult (None if order_send failed).
+        """
+
+        self._pending.append((time.time_ns() if sent_ns is None else sent_ns, elapsed_ns, request.copy(), result))
+
+    def flush(self):
+        self._write_pending()
+        with self._lock:
+            self._records.flush()
+            self._header.flush()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._lock:
+            self._header = self._records = None
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._write_pending()
+            with self._lock:
+                self._records.flush()
+                self._header.flush()
+
+    def _write_pending(self):
+        with self._lock:
+            while self._pending:
+                rows = []
+                while self._pending and len(rows) < 4096:
+                    rows.append(_row(*self._pending.popleft()))
+                records = np.array(rows, dtype = JOURNAL_DTYPE)
+                while len(records):
+                    count = int(self._header["count"][0])
+                    n = min(len(records), self.segment_records - count)
+                    self._records[count:count + n] = records[:n]
+                    #the records reach the file before the count that covers them
+                    self._records.flush()
+                    self._header["count"] = count + n
+                    self.written += n
+                    records = records[n:]
+                    if count + n == self.segment_records:
+                        self._header.flush()
+                        self._open_segment()
+
+    def _open_segment(self):
+        path = os.path.join(self.root, f"{self.prefix}-{self._index:06d}.mtj")
+        self._index += 1
+        with open(path, "wb") as f:
+            f.truncate(HEADER_DTYPE.itemsize + self.segment_records * JOURNAL_DTYPE.itemsize)
+        self._header = np.memmap(path, dtype = HEADER_DTYPE, mode = "r+", shape = (1,))
+        self._header[0] = (MAGIC, VERSION, JOURNAL_DTYPE.itemsize, self.segment_records, 0, time.time_ns(), b"")
+        self._records = np.memmap(path, dtype = JOURNAL_DTYPE, mode = "r+", offset = HEADER_DTYPE.itemsize,
+                                  shape = (self.segment_records,))
+        self.segments.append(path)
+
+
+def _row(sent_ns, elapsed_ns, request, result):
+    get = request.get
+    row = [sent_ns, elapsed_ns]
+    for field in _REQUEST_FIELDS:
+        value = get(field)
+        if field in ("symbol", "comment"):
+            row.append((value or "").encode("utf-8", "replace")[:32])
+        else:
+            row.append(value or 0)
+    if result is None:
+        row += [-1, 0, 0, 0.0, 0.0, 0.0, 0.0]
+    else:
+        row += [result.retcode, result.order, result.deal, result.volume, result.price, result.bid, result.ask]
+    return tuple(row)
+
+
+def segment_paths(root, prefix = "journal"):
+    """
+    Segment files of a journal, oldest first.
+    """
+
+    return sorted(glob.glob(os.path.join(glob.escape(root), f"{prefix}-[0-9][0-9][0-9][0-9][0-9][0-9].mtj")))
+
+
+def read_segment(path):
+    """
+    Records of one segment file, a read-only memmap view (no copy).
+    """
+
+    header = np.fromfile(path, dtype = HEADER_DTYPE, count = 1)
+    if not len(header) or not header["magic"][0].startswith(MAGIC):
+        raise ValueError(f"{path} is not a journal segment")
+    if header["itemsize"][0] != JOURNAL_DTYPE.itemsize:
+        raise ValueError(f"{path} has records of {header['itemsize'][0]} bytes, expected {JOURNAL_DTYPE.itemsize}")
+    count = int(header["count"][0])
+    if not count:
+        return np.zeros(0, dtype = JOURNAL_DTYPE)
+    return np.memmap(path, dtype = JOURNAL_DTYPE, mode = "r", offset = HEADER_DTYPE.itemsize, shape = (count,))
+
+
+def iter_journal(root, prefix = "journal"):
+    """
+    Yield the records of each segment in order, for sequential passes over long journals.
+    """
+
+    for path in segment_paths(root, prefix):
+        yield read_segment(path)
+
+
+def read_journal(root, prefix = "journal"):
+    """
+    Every record of a journal as one JOURNAL_DTYPE array (a memmap view if there is one segment).
+    """
+
+    parts = [records for records in iter_journal(root, prefix) if len(records)]
+    if not parts:
+        return np.zeros(0, dtype = JOURNAL_DTYPE)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+#outcome of replay_journal()
+ReplayReport = namedtuple("ReplayReport", [
+    "terminal",     #the terminal the journal was replayed into
+    "sent",         #requests sent
+    "matched",      #requests answered with the recorded retcode
+    "mismatches",   #list of (record index, recorded retcode, replayed retcode)
+])
+
+
+def replay_journal(records, terminal = None):
+    """
+    Re-send journaled requests to a local terminal, at their recorded time and prices.
+
+    Before each request the symbol is moved to the bid/ask the server answered with and
+    the terminal clock to the recorded time. Position and order tickets are translated
+    to the ones the terminal gives out. Only prices at send times are replayed, SL/TP
+    hits in between need ticks (see SimulatedTerminal.set_tick()).
+
+    Parameters:
+        records: JOURNAL_DTYPE array, e.g read_journal(root)
+        terminal: SimulatedTerminal (or compatible), a new one if None. Symbols missing
+            from it are added with default settings
+
+    Returns:
+        ReplayReport
+
+        """
+
+    if terminal is None:
+        from MT5pytrader.simulator import SimulatedTerminal
+        terminal = SimulatedTerminal()
+        terminal.initialize()
+    now = [0.0]
+    clock = terminal.clock
+    terminal.clock = lambda: now[0]
+    tickets = {} #recorded ticket -> replayed ticket
+    mismatches = []
+    matched = 0
+    try:
+        for i, record in enumerate(records):
+            now[0] = record["time_ns"] / 1e9
+            symbol = record["symbol"].decode("utf-8", "replace")
+            if terminal.symbol_info(symbol) is None:
+                terminal.add_symbol(symbol, bid = float(record["bid"]) or 1.0)
+            if record["bid"] > 0:
+                terminal.set_tick(symbol, float(record["bid"]), float(record["ask"]), int(record["time_ns"] // 1000000))
+
+            request = {field: record[field].item() for field in _REQUEST_FIELDS
+                       if record[field] or field not in _UNSET_FIELDS}
+            request["symbol"] = symbol
+            request["comment"] = record["comment"].decode("utf-8", "replace")
+            for field in ("position", "order"):
+                if field in request:
+                    request[field] = tickets.get(request[field], request[field])
+            result = terminal.order_send(request)
+
+            recorded = int(record["retcode"])
+            replayed = -1 if result is None else result.retcode
+            if replayed == recorded:
+                matched += 1
+            else:
+                mismatches.append((i, recorded, replayed))
+            if result is not None and record["result_order"] and result.order \
+                    and not request.get("position") and request.get("action") in (constants.TRADE_ACTION_DEAL, constants.TRADE_ACTION_PENDING):
+                tickets[int(record["result_order"])] = result.order
+    finally:
+        terminal.clock = clock
+    return ReplayReport(terminal, len(records), matched, mismatches)
@@ -0,0 +1,139 @@
+from MT5pytrader import constants
+
+
+OUTPUTS = ("numpy", "pandas", "arrow")
+
+
+def timeframe_value(timeframe):
+    """
+    Returns the TIMEFRAME_* value of a timeframe given as a constant or a name ("M1", "H4", "TIMEFRAME_D1").
+    """
+
+    if isinstance(timeframe, str):
+        name = timeframe.upper()
+        value = getattr(constants, name if name.startswith("TIMEFRAME_") else "TIMEFRAME_" + name, None)
+        if value is None:
+            raise ValueError(f"unknown timeframe {timeframe!r}")
+        return value
+    return timeframe
+
+
+def time_index(array):
+    """
+    Timestamps of rates or ticks as datetime64, a view of the time column (nothing is converted).
+    Ticks use time_msc (datetime64[ms]), rates use time (datetime64[s]).
+    """
+
+    if "time_msc" in array.dtype.names:
+        return array["time_msc"].view("datetime64[ms]")
+    return array["time"].view("datetime64[s]")
+
+
+def to_pandas(array, convert_time = True):
+    """
+    Wrap rates or ticks as a pandas DataFrame without copying.
+    Every column is a view into the structured array returned by the terminal,
+    so the frame costs no extra memory (pandas copies only when a column is written).
+
+    Parameters:
+        array: structured array from copy_rates_* / copy_ticks_*
+        convert_time: True to expose the time column as datetime64[s] (a view, not a conversion)
+
+    Returns:
+        pandas DataFrame with one column per field
+
+        """
+
+    import pandas as pd
+
+    columns = {name: array[name] for name in array.dtype.names}
+    if convert_time and "time" in columns:
+        columns["time"] = columns["time"].view("datetime64[s]")
+    return pd.DataFrame(columns, copy = False)
+
+
+def to_arrow(array, convert_time = True):
+    """
+    Rates or ticks as a pyarrow Table.
+    Arrow columns must be contiguous while the fields of a structured array are
+    interleaved, so each column is copied exactly once, straight from the array
+    (no intermediate Python objects or pandas frame).
+
+    Parameters:
+        array: structured array from copy_rates_* / copy_ticks_*
+        convert_time: True to type the time column as timestamp[s]
+
+    Returns:
+        pyarrow Table
+
+        """
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("output='arrow' requires pyarrow, install it with: pip install pyarrow") from None
+
+    columns = {name: array[name] for name in array.dtype.names}
+    if convert_time and "time" in columns:
+        columns["time"] = columns["time"].view("datetime64[s]")
+    return pa.table({name: pa.array(values) for name, values in columns.items()})
+
+
+def convert(array, output = "numpy", convert_time = True):
+    """
+    Returns array as-is (output="numpy"), as a DataFrame ("pandas") or as an Arrow Table ("arrow").
+    None (terminal error) is returned unchanged.
+    """
+
+    if output not in OUTPUTS:
+        raise ValueError(f"output must be one of {OUTPUTS}, not {output!r}")
+    if array is None or output == "numpy":
+        return array
+    if output == "pandas":
+        return to_pandas(array, convert_time)
+    return to_arrow(array, convert_time)
+
+
+class MarketData:
+    """
+    Bars and ticks from the terminal.
+    The terminal returns NumPy structured arrays; by default they are returned as-is.
+    output="pandas" wraps them as a DataFrame of views (no copy), output="arrow" as a
+    pyarrow Table. Timestamps stay epoch integers in the array and are only exposed as
+    datetime64 views (see time_index), never converted row by row.
+
+    Functions:
+        MarketData.rates_from() - count bars ending at date_from
+        MarketData.rates_from_pos() - count bars starting start_pos bars back from the current bar
+        MarketData.rates_range() - bars between two dates
+        MarketData.ticks_from() - count ticks starting at date_from
+        MarketData.ticks_range() - ticks between two dates
+
+    timeframe is a TIMEFRAME_* constant or its name ("M1", "H1", ...). Dates are
+    datetime objects or epoch seconds. Every function returns None if the terminal
+    call failed (see terminal.last_error()).
+
+        """
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+
+    def rates_from(self, symbol, timeframe, date_from, count, output = "numpy", convert_time = True):
+        rates = self.terminal.copy_rates_from(symbol, timeframe_value(timeframe), date_from, count)
+        return convert(rates, output, convert_time)
+
+    def rates_from_pos(self, symbol, timeframe, start_pos, count, output = "numpy", convert_time = True):
+        rates = self.terminal.copy_rates_from_pos(symbol, timeframe_value(timeframe), start_pos, count)
+        return convert(rates, output, convert_time)
+
+    def rates_range(self, symbol, timeframe, date_from, date_to, output = "numpy", convert_time = True):
+        rates = self.terminal.copy_rates_range(symbol, timeframe_value(timeframe), date_from, date_to)
+        return convert(rates, output, convert_time)
+
+    def ticks_from(self, symbol, date_from, count, flags = constants.COPY_TICKS_ALL, output = "numpy", convert_time = True):
+        ticks = self.terminal.copy_ticks_from(symbol, date_from, count, flags)
+        return convert(ticks, output, convert_time)
+
+    def ticks_range(self, symbol, date_from, date_to, flags = constants.COPY_TICKS_ALL, output = "numpy", convert_time = True):
+        ticks = self.terminal.copy_ticks_range(symbol, date_from, date_to, flags)
+        return convert(ticks, output, convert_time)
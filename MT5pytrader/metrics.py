@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+
+
+#log-linear buckets: 2**SUB_BITS buckets per power of two, i.e at most 1/2**SUB_BITS relative error
+SUB_BITS = 3
+_SUB = 1 << SUB_BITS
+
+#bucket bounds (seconds) written to the Prometheus histograms
+EXPORT_BOUNDS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket(ns):
+    shift = ns.bit_length() - (SUB_BITS + 1)
+    if shift <= 0:
+        return ns
+    return shift * _SUB + (ns >> shift)
+
+
+def _bucket_upper(index):
+    #largest value (ns) falling in bucket index
+    if index < 2 * _SUB:
+        return index
+    shift = index // _SUB - 1
+    return ((index - shift * _SUB + 1) << shift) - 1
+
+
+class Histogram:
+    """
+    HDR-style histogram of durations in nanoseconds.
+    Buckets are log-linear (8 per power of two), so any percentile is within 12.5%
+    of the true value whatever the range, and recording is one index computation.
+
+        """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        index = _bucket(ns)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """
+        Returns the q (0..1) percentile in nanoseconds, None if empty.
+        """
+
+        if not self.count:
+            return None
+        target = max(1, int(round(q * self.count)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds_ns):
+        #number of values <= each bound (a bucket counts once its upper value is <= the bound)
+        result = []
+        seen, index, counts = 0, 0, self.counts
+        for bound in bounds_ns:
+            while index < len(counts) and _bucket_upper(index) <= bound:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+class Metrics:
+    """
+    Latency histograms per terminal call and retcode.
+
+    Functions:
+        Metrics.record() - Record one call
+        Metrics.histogram() - Histogram of a call (and retcode)
+        Metrics.summary() - dict of call: count, p50/p99/max in microseconds
+        Metrics.prometheus() - Everything in Prometheus text format
+        Metrics.write() - Write prometheus() to a file (e.g for the node_exporter textfile collector)
+        Metrics.serve() - Serve prometheus() over HTTP on a background thread
+
+    Parameters:
+        prefix: metric name prefix
+
+        """
+
+    def __init__(self, prefix = "mt5pytrader"):
+        self.prefix = prefix
+        self._histograms = {} #(call, retcode) -> Histogram
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._histograms)
+
+    def record(self, call, retcode, ns):
+        key = (call, retcode)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.record(ns)
+
+    def histogram(self, call, retcode = None):
+        """
+        Histogram of a call for one retcode, or all retcodes merged (retcode None).
+        """
+
+        with self._lock:
+            if retcode is not None:
+                return self._histograms.get((call, retcode))
+            merged = None
+            for (name, _), histogram in self._histograms.items():
+                if name != call:
+                    continue
+                if merged is None:
+                    merged = Histogram()
+                if len(merged.counts) < len(histogram.counts):
+                    merged.counts.extend([0] * (len(histogram.counts) - len(merged.counts)))
+                for index, n in enumerate(histogram.counts):
+                    merged.counts[index] += n
+                merged.count += histogram.count
+                merged.total += histogram.total
+                merged.max = max(merged.max, histogram.max)
+            return merged
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self):
+        """
+        Returns:
+            dict of call: {"count", "p50_us", "p99_us", "max_us"}, retcodes merged
+
+            """
+
+        calls = sorted({call for call, _ in list(self._histograms)})
+        summary = {}
+        for call in calls:
+            histogram = self.histogram(call)
+            summary[call] = {
+                "count": histogram.count,
+                "p50_us": histogram.percentile(0.5) / 1000,
+                "p99_us": histogram.percentile(0.99) / 1000,
+                "max_us": histogram.max / 1000,
+            }
+        return summary
+
+    def prometheus(self):
+        """
+        Returns every histogram in Prometheus text exposition format.
+        """
+
+        name = f"{self.prefix}_call_duration_seconds"
+        bounds_ns = [int(bound * 1e9) for bound in EXPORT_BOUNDS]
+        lines = [
+            f"# HELP {name} Duration of terminal calls",
+            f"# TYPE {name} histogram",
+        ]
+        quantiles = [
+            f"# HELP {name}_quantile Duration quantiles of terminal calls (HDR histogram)",
+            f"# TYPE {name}_quantile gauge",
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items(), key = lambda item: (item[0][0], str(item[0][1])))
+            for (call, retcode), histogram in items:
+                labels = f'call="{call}",retcode="{"" if retcode is None else retcode}"'
+                for bound, count in zip(EXPORT_BOUNDS, histogram.cumulative(bounds_ns)):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.total / 1e9:.9f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+                for q in EXPORT_QUANTILES:
+                    quantiles.append(f'{name}_quantile{{{labels},quantile="{q:g}"}} {histogram.percentile(q) / 1e9:.9f}')
+        return "\n".join(lines + quantiles) + "\n"
+
+    def write(self, path):
+        #write then rename, so scrapers never read a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port = 9108, host = "127.0.0.1"):
+        """
+        Serve /metrics on a background thread. Returns the server (call shutdown() to stop it).
+        """
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target = server.serve_forever, name = "MT5pytrader-metrics", daemon = True).start()
+        return server
+
+
+class InstrumentedBackend:
+    """
+    Wraps a backend, timing every function call into a Metrics.
+    order_send is labelled with the retcode of its result, other calls with
+    "error" when they return None (or False). Constants pass through.
+    Only used while metrics are enabled (Trader.enable_metrics()), so
+    there is no cost at all otherwise.
+
+        """
+
+    def __init__(self, backend, metrics):
+        self.backend = backend
+        self.metrics = metrics
+
+    def __repr__(self):
+        return f"InstrumentedBackend({self.backend!r})"
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        record = self.metrics.record
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            result = attr(*args, **kwargs)
+            elapsed = clock() - start
+            if name == "order_send":
+                retcode = "none" if result is None else result.retcode
+            else:
+                retcode = "error" if result is None or result is False else None
+            record(name, retcode, elapsed)
+            return result
+
+        timed.__name__ = name
+        # cached on the instance, __getattr__ only runs once per function
+        self.__dict__[name] = timed
+        return timed
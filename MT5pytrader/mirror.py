@@ -0,0 +1,180 @@
+import threading
+from collections import namedtuple
+
+from MT5pytrader.positions import fetch_positions, positions_frame
+
+
+#change of one position between two refreshes of a PositionMirror
+PositionEvent = namedtuple("PositionEvent", [
+    "kind",             #"opened", "closed", "modified" or "partial"
+    "ticket",
+    "position",         #TradePosition after the change (last known one for "closed")
+    "previous",         #TradePosition before the change (None for "opened")
+    "changes",          #dict of field: (old, new) for the watched fields that changed
+])
+
+EVENT_KINDS = ("opened", "closed", "modified", "partial")
+
+#fields compared to detect a modification, price_current/profit/swap move with every tick
+WATCHED_FIELDS = ("volume", "sl", "tp")
+
+
+class PositionMirror:
+    """
+    In-memory book of open positions, indexed by ticket, kept in sync incrementally.
+
+    refresh() costs one positions_total() call when there are no positions, and one
+    positions_get() otherwise. A checksum of (ticket, volume, sl, tp, time_update_msc)
+    of every position skips the diff entirely when nothing but prices changed.
+    Subscribers are called with a PositionEvent per opened, closed, modified or
+    partially closed position.
+
+    Functions:
+        PositionMirror.refresh() - Sync the book, returns the list of PositionEvent
+        PositionMirror.subscribe() - Call a function on every event (or some kinds only)
+        PositionMirror.start() - Refresh on a background thread every interval seconds
+        PositionMirror.stop() - Stop the background thread
+        PositionMirror.frame() - The book as a DataFrame (as get_open_positions)
+
+    Parameters:
+        terminal: MetaTrader5 module (or compatible backend)
+        symbol, group, magic, comment: only mirror positions matching these filters (see fetch_positions)
+        interval: seconds between refreshes of the background thread
+        watch: fields compared to detect modified positions
+
+    Attributes:
+        book: dict of ticket: TradePosition
+        refreshes: number of refresh() calls
+        unchanged: refreshes skipped by the positions_total()/checksum short-circuit
+
+        """
+
+    def __init__(self, terminal, symbol = None, group = None, magic = None, comment = None, interval = 0.25, watch = WATCHED_FIELDS):
+        self.terminal = terminal
+        self.filters = {"symbol": symbol, "group": group, "magic": magic, "comment": comment}
+        self.interval = interval
+        self.watch = tuple(watch)
+        self.refreshes = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.last_error = None
+        self._positions = ()
+        self._book = {}
+        self._checksum = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, ticket):
+        return ticket in self.book
+
+    def __getitem__(self, ticket):
+        return self.book[ticket]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def book(self):
+        #built lazily, refreshes that only moved prices just swap the snapshot
+        book = self._book
+        if book is None:
+            book = self._book = {position.ticket: position for position in self._positions}
+        return book
+
+    @property
+    def positions(self):
+        return self._positions
+
+    def frame(self):
+        return positions_frame(self._positions)
+
+    def subscribe(self, callback, kinds = None):
+        """
+        Call callback(event) for every PositionEvent, or only for the given kinds, e.g ("closed",).
+        Callbacks run on the thread calling refresh().
+        """
+
+        self._subscribers.append((callback, None if kinds is None else frozenset(kinds)))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(cb, kinds) for cb, kinds in self._subscribers if cb != callback]
+
+    def refresh(self):
+        """
+        Sync the book with the terminal.
+
+        Returns:
+            list of PositionEvent, in ticket order (empty if nothing changed)
+
+            """
+
+        with self._lock:
+            self.refreshes += 1
+            if not self._positions and hasattr(self.terminal, "positions_total") and self.terminal.positions_total() == 0:
+                self.unchanged += 1
+                return []
+
+            positions = fetch_positions(self.terminal, **self.filters)
+            checksum = hash(tuple((p.ticket, p.volume, p.sl, p.tp, p.time_update_msc) for p in positions))
+            if checksum == self._checksum:
+                self._positions, self._book = positions, None
+                self.unchanged += 1
+                return []
+
+            old = self.book
+            self._positions, self._book, self._checksum = positions, None, checksum
+            events = self._diff(old, self.book)
+
+        for event in events:
+            for callback, kinds in self._subscribers:
+                if kinds is None or event.kind in kinds:
+                    callback(event)
+        return events
+
+    def _diff(self, old, new):
+        events = []
+        for ticket, position in new.items():
+            previous = old.get(ticket)
+            if previous is None:
+                events.append(PositionEvent("opened", ticket, position, None, {}))
+                continue
+            changes = {field: (getattr(previous, field), getattr(position, field))
+                       for field in self.watch if getattr(previous, field) != getattr(position, field)}
+            if changes:
+                kind = "partial" if position.volume < previous.volume else "modified"
+                events.append(PositionEvent(kind, ticket, position, previous, changes))
+        for ticket, previous in old.items():
+            if ticket not in new:
+                events.append(PositionEvent("closed", ticket, previous, previous, {}))
+        events.sort(key = lambda event: event.ticket)
+        return events
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target = self._run, name = "PositionMirror", daemon = True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+            self._stop.wait(self.interval)
@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+from MT5pytrader import constants
+
+
+#order types priced from the buy side (SL below, TP above the price)
+BUY_TYPES = frozenset((
+    constants.ORDER_TYPE_BUY,
+    constants.ORDER_TYPE_BUY_LIMIT,
+    constants.ORDER_TYPE_BUY_STOP,
+    constants.ORDER_TYPE_BUY_STOP_LIMIT,
+))
+MARKET_TYPES = frozenset((constants.ORDER_TYPE_BUY, constants.ORDER_TYPE_SELL))
+
+#pending order types by name, and the Trader operation reported for each
+PENDING_TYPES = {
+    "buy_limit": constants.ORDER_TYPE_BUY_LIMIT,
+    "sell_limit": constants.ORDER_TYPE_SELL_LIMIT,
+    "buy_stop": constants.ORDER_TYPE_BUY_STOP,
+    "sell_stop": constants.ORDER_TYPE_SELL_STOP,
+}
+PENDING_OPS = {order_type: "open_" + name for name, order_type in PENDING_TYPES.items()}
+
+#one order of a Trader.place_orders() batch, stop_loss/take_profit in points from price
+PendingOrder = namedtuple("PendingOrder", [
+    "symbol",
+    "order_type",       #"buy_limit", "sell_limit", "buy_stop", "sell_stop" or an ORDER_TYPE_* constant
+    "price",
+    "lot",
+    "stop_loss",
+    "take_profit",
+    "sl_price",
+    "tp_price",
+    "magic",            #None for Trader.magic
+    "comment",          #None for Trader.comment
+], defaults = (0.1, None, None, None, None, None, None))
+
+
+class RequestBuilder:
+    """
+    Order request templates.
+    The static fields of a request (action, symbol, type, deviation, type_time,
+    type_filling) are filled once per (symbol, order type) and copied for every
+    order, so only price, volume, sl, tp, magic and comment are set per call.
+
+    Functions:
+        RequestBuilder.build() - Returns a request dict ready for order_send
+        RequestBuilder.clear() - Drop every template
+
+        """
+
+    def __init__(self):
+        self._templates = {}
+
+    def __len__(self):
+        return len(self._templates)
+
+    def clear(self):
+        self._templates.clear()
+
+    def template(self, symbol, order_type, deviation, type_time, type_filling):
+        """
+        Returns the (shared, do not modify) template of a symbol and order type.
+        """
+
+        key = (symbol, order_type, deviation, type_time, type_filling)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = {
+                "action": constants.TRADE_ACTION_DEAL if order_type in MARKET_TYPES else constants.TRADE_ACTION_PENDING,
+                "symbol": symbol,
+                "type": order_type,
+                "deviation": deviation,
+                "type_time": type_time,
+                "type_filling": type_filling,
+            }
+        return template
+
+    def build(self, symbol, order_type, price, volume, point, stop_loss = None, take_profit = None,
+              sl_price = None, tp_price = None, magic = 0, comment = "",
+              deviation = 20, type_time = constants.ORDER_TIME_GTC, type_filling = constants.SYMBOL_TRADE_EXECUTION_INSTANT):
+        """
+        Build an order request.
+
+        Parameters:
+            symbol: Symbol of the order
+            order_type: ORDER_TYPE_* constant
+            price: order price
+            volume: order volume (lots)
+            point: symbol point, used for stop_loss/take_profit distances
+            stop_loss: stop loss distance in points from price
+            take_profit: take profit distance in points from price
+            sl_price: absolute stop loss price (takes precedence over stop_loss)
+            tp_price: absolute take profit price (takes precedence over take_profit)
+            magic, comment, deviation, type_time, type_filling: request fields
+
+        Returns:
+            A new request dict
+
+            """
+
+        request = self.template(symbol, order_type, deviation, type_time, type_filling).copy()
+        request["price"] = price
+        request["volume"] = volume
+        request["magic"] = magic
+        request["comment"] = comment
+
+        direction = 1 if order_type in BUY_TYPES else -1
+        if sl_price is not None:
+            request["sl"] = sl_price
+        elif stop_loss is not None:
+            request["sl"] = price - direction * stop_loss * point
+        if tp_price is not None:
+            request["tp"] = tp_price
+        elif take_profit is not None:
+            request["tp"] = price + direction * take_profit * point
+        return request
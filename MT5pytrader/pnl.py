@@ -0,0 +1,93 @@
+#position fields pnl can be grouped by ("side" is derived from the position type)
+PNL_GROUPS = ("symbol", "magic", "comment", "side")
+
+_SIDES = ("buy", "sell") #POSITION_TYPE_BUY = 0, POSITION_TYPE_SELL = 1
+
+
+def _totals(profit = 0.0, swap = 0.0, volume = 0.0, count = 0):
+    return {"profit": profit, "swap": swap, "total": profit + swap, "volume": volume, "count": count}
+
+
+def aggregate_pnl(positions, by = None):
+    """
+    Sum floating profit and swap of positions without pandas.
+    Cheap enough to call several times a second from a polling loop.
+
+    Parameters:
+        positions: sequence of TradePosition, e.g Trader.positions_snapshot()
+        by: None for account totals, or one of "symbol", "magic", "comment", "side"
+
+    Returns:
+        dict with profit, swap, total (profit + swap), volume and count.
+        If by is given, a dict of such dicts keyed by the group value.
+
+        """
+
+    if by is None:
+        profit = swap = volume = 0.0
+        for position in positions:
+            profit += position.profit
+            swap += position.swap
+            volume += position.volume
+        return _totals(profit, swap, volume, len(positions))
+
+    if by not in PNL_GROUPS:
+        raise ValueError(f"by must be one of {PNL_GROUPS}, got {by!r}")
+
+    groups = {}
+    for position in positions:
+        key = _SIDES[position.type] if by == "side" else getattr(position, by)
+        acc = groups.get(key)
+        if acc is None:
+            groups[key] = [position.profit, position.swap, position.volume, 1]
+        else:
+            acc[0] += position.profit
+            acc[1] += position.swap
+            acc[2] += position.volume
+            acc[3] += 1
+    return {key: _totals(*acc) for key, acc in groups.items()}
+
+
+def pnl_frame(positions, by = "symbol"):
+    """
+    Vectorized profit/swap aggregation as a pandas DataFrame.
+
+    Parameters:
+        positions: sequence of TradePosition, e.g Trader.positions_snapshot()
+        by: a group name from PNL_GROUPS or a list of them
+
+    Returns:
+        A pandas DataFrame indexed by the group(s) with profit, swap, total, volume and count columns
+
+        """
+
+    import numpy as np
+    import pandas as pd
+
+    keys = [by] if isinstance(by, str) else list(by)
+    for key in keys:
+        if key not in PNL_GROUPS:
+            raise ValueError(f"by must be in {PNL_GROUPS}, got {key!r}")
+
+    columns = ("profit", "swap", "volume")
+    if len(positions) == 0:
+        df = pd.DataFrame({name: [] for name in keys + ["profit", "swap", "total", "volume", "count"]})
+        return df.set_index(keys)
+
+    fields = positions[0]._fields
+    data = dict(zip(fields, zip(*positions)))
+    frame = {name: np.asarray(data[name], dtype = float) for name in columns}
+    for key in keys:
+        if key == "side":
+            frame["side"] = np.asarray(_SIDES)[np.asarray(data["type"], dtype = int)]
+        else:
+            frame[key] = data[key]
+
+    df = pd.DataFrame(frame).groupby(keys, sort = True).agg(
+        profit = ("profit", "sum"),
+        swap = ("swap", "sum"),
+        volume = ("volume", "sum"),
+        count = ("profit", "size"),
+    )
+    df.insert(2, "total", df["profit"] + df["swap"])
+    return df
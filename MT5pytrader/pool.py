@@ -0,0 +1,267 @@
+import multiprocessing
+import threading
+import traceback
+from collections import namedtuple
+
+from MT5pytrader.bulk import BulkReport
+from MT5pytrader.reports import ExecutionReport
+
+
+#one account traded by a TerminalPool worker
+Account = namedtuple("Account", [
+    "name",             #key used to route calls, e.g "live-1"
+    "login",            #account number, None to stay on the account the terminal is logged in to
+    "password",
+    "server",
+    "path",             #terminal executable of this account (one terminal per account)
+    "backend",          #picklable callable returning a backend, e.g functools.partial(SimulatedTerminal, ["EURUSD"])
+    "trader_kwargs",    #extra Trader arguments (magic, deviation, ...)
+], defaults = (None, None, None, None, None, None))
+
+
+class WorkerError(RuntimeError):
+    """
+    A call failed inside a pool worker (or the worker died).
+    """
+
+    def __init__(self, account, method, message):
+        super().__init__(f"{account}.{method}: {message}")
+        self.account = account
+        self.method = method
+
+
+class TerminalPool:
+    """
+    One worker process per account, each with its own terminal, and a front end routing calls to them.
+
+    The MetaTrader5 package drives a single terminal per process, so every account runs
+    its own Trader in a separate process (started with the account's terminal path and
+    connected with its credentials). Calls are routed by account name and run in parallel
+    across accounts; calls to the same account are serialized.
+
+    Functions:
+        TerminalPool.call() - Call a Trader method on one account
+        TerminalPool.broadcast() - Call a Trader method on every (or some) account(s) in parallel
+        TerminalPool.close_all() - Close positions on every account in parallel
+        TerminalPool[name] - Proxy exposing the Trader methods of one account, e.g pool["live-1"].open_buy(...)
+        TerminalPool.close() - Stop the workers
+
+    Parameters:
+        accounts: iterable of Account
+        start_method: multiprocessing start method ("spawn", "fork", ...), the platform default if None
+        timeout: seconds to wait for the workers to start
+
+    TerminalPool.status holds, per account, whether the terminal initialized and the
+    account connected (with last_error() otherwise).
+
+    Results are the values the Trader methods return (ExecutionReport, BulkReport, DataFrame,
+    ...); raw OrderSendResult objects in reports are sent back as dicts.
+
+        """
+
+    def __init__(self, accounts, start_method = None, timeout = 60):
+        context = multiprocessing.get_context(start_method)
+        self._workers = {}
+        for account in accounts:
+            if account.name in self._workers:
+                raise ValueError(f"duplicate account name {account.name!r}")
+            conn, child = context.Pipe()
+            process = context.Process(target = _worker, args = (child, account), name = f"MT5pytrader-{account.name}", daemon = True)
+            process.start()
+            child.close()
+            self._workers[account.name] = _Worker(account.name, process, conn)
+
+        #workers initialize and log in in parallel, wait for all of them
+        self.status = {}
+        for name, worker in self._workers.items():
+            if not worker.conn.poll(timeout):
+                self.close()
+                raise WorkerError(name, "initialize", "worker did not start")
+            self.status[name] = worker.receive("initialize")
+
+    def __repr__(self):
+        return f"TerminalPool({list(self._workers)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, name):
+        if name not in self._workers:
+            raise KeyError(name)
+        return AccountProxy(self, name)
+
+    def __len__(self):
+        return len(self._workers)
+
+    @property
+    def accounts(self):
+        return list(self._workers)
+
+    def call(self, account, method, *args, **kwargs):
+        """
+        Call Trader.method(*args, **kwargs) on an account and return its result.
+        """
+
+        worker = self._workers[account]
+        with worker.lock:
+            worker.send(method, args, kwargs)
+            return worker.receive(method)
+
+    def broadcast(self, method, *args, accounts = None, **kwargs):
+        """
+        Call Trader.method(*args, **kwargs) on every account (or the given ones) in parallel.
+
+        Returns:
+            dict of account: result, or the WorkerError raised for that account
+
+            """
+
+        if accounts is not None:
+            for name in accounts:
+                if name not in self._workers:
+                    raise KeyError(name)
+        #always lock in pool order, so concurrent broadcasts cannot deadlock
+        workers = [worker for name, worker in self._workers.items() if accounts is None or name in accounts]
+        for worker in workers:
+            worker.lock.acquire()
+        try:
+            #send everything first so all workers run at the same time
+            sent = []
+            results = {}
+            for worker in workers:
+                try:
+                    worker.send(method, args, kwargs)
+                    sent.append(worker)
+                except WorkerError as e:
+                    results[worker.name] = e
+            for worker in sent:
+                try:
+                    results[worker.name] = worker.receive(method)
+                except WorkerError as e:
+                    results[worker.name] = e
+            return results
+        finally:
+            for worker in workers:
+                worker.lock.release()
+
+    def close_all(self, accounts = None, **filters):
+        """
+        Close positions matching filters (symbol, group, magic, comment, side, percent) on every account.
+
+        Returns:
+            dict of account: BulkReport
+
+            """
+
+        return self.broadcast("close_all", accounts = accounts, **filters)
+
+    def close(self, timeout = 5):
+        for worker in self._workers.values():
+            worker.stop(timeout)
+
+
+class AccountProxy:
+    """
+    Trader methods of one pool account, e.g pool["live-1"].open_buy("EURUSD", lot = 0.1).
+    """
+
+    def __init__(self, pool, account):
+        self.pool = pool
+        self.account = account
+
+    def __repr__(self):
+        return f"AccountProxy({self.account!r})"
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            return self.pool.call(self.account, method, *args, **kwargs)
+        call.__name__ = method
+        return call
+
+
+class _Worker:
+    #front end side of one worker process
+
+    def __init__(self, name, process, conn):
+        self.name = name
+        self.process = process
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def send(self, method, args, kwargs):
+        try:
+            self.conn.send((method, args, kwargs))
+        except (OSError, EOFError) as e:
+            raise WorkerError(self.name, method, f"worker is gone ({e!r})") from None
+
+    def receive(self, method):
+        try:
+            ok, value = self.conn.recv()
+        except (OSError, EOFError) as e:
+            raise WorkerError(self.name, method, f"worker is gone ({e!r})") from None
+        if not ok:
+            raise WorkerError(self.name, method, value)
+        return value
+
+    def stop(self, timeout):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (OSError, EOFError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+
+
+def _worker(conn, account):
+    #worker process: one Trader on its own terminal, serving calls until None is received
+    from MT5pytrader.pytrader import Trader
+
+    try:
+        backend = account.backend() if account.backend is not None else None
+        trader = Trader(backend = backend, path = account.path, quiet = True, **(account.trader_kwargs or {}))
+        status = {"initialized": trader.initialized, "connected": None, "error": None}
+        if account.login is not None:
+            status["connected"] = trader.connect(account.login, account.password, account.server)
+        if not trader.initialized or status["connected"] is False:
+            status["error"] = trader.mt5.last_error()
+        conn.send((True, status))
+    except Exception:
+        conn.send((False, traceback.format_exc()))
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        method, args, kwargs = message
+        try:
+            if method.startswith("_"):
+                raise AttributeError(f"{method} is private")
+            conn.send((True, _portable(getattr(trader, method)(*args, **kwargs))))
+        except Exception:
+            conn.send((False, traceback.format_exc()))
+    trader.mt5.shutdown()
+
+
+def _portable(value):
+    #terminal result objects may not pickle, send them back as dicts
+    if isinstance(value, ExecutionReport):
+        result = value.result
+        if result is not None and hasattr(result, "_asdict"):
+            result = {name: (field._asdict() if hasattr(field, "_asdict") else field) for name, field in result._asdict().items()}
+        return value._replace(result = result)
+    if isinstance(value, BulkReport):
+        return BulkReport([_portable(report) for report in value.results], value.elapsed)
+    return value
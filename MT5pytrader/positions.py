@@ -0,0 +1,92 @@
+#columns get_open_positions() has always left out of its DataFrame
+DROPPED_COLUMNS = ['magic', 'time_msc', 'time_update_msc', 'time_update', 'external_id', 'identifier', 'reason']
+
+
+def fetch_positions(terminal, symbol = None, group = None, ticket = None, magic = None, comment = None):
+    """
+    Fetch open positions with a single positions_get() call.
+
+    Parameters:
+        terminal: MetaTrader5 module (or compatible backend)
+        symbol: only positions on this symbol
+        group: symbol mask understood by positions_get, e.g "*USD*,!EUR*"
+        ticket: only the position with this ticket
+        magic: only positions with this magic number
+        comment: only positions with this comment
+
+    Returns:
+        A tuple of TradePosition (empty if there are none)
+
+        """
+
+    if ticket is not None:
+        positions = terminal.positions_get(ticket = ticket)
+    elif symbol is not None:
+        positions = terminal.positions_get(symbol = symbol)
+    elif group is not None:
+        positions = terminal.positions_get(group = group)
+    else:
+        positions = terminal.positions_get()
+
+    if not positions:
+        return ()
+
+    if magic is not None:
+        positions = tuple(position for position in positions if position.magic == magic)
+    if comment is not None:
+        positions = tuple(position for position in positions if position.comment == comment)
+    return positions
+
+
+def fetch_orders(terminal, symbol = None, group = None, ticket = None, magic = None, comment = None):
+    """
+    Fetch pending orders with a single orders_get() call, filtered like fetch_positions().
+
+    Returns:
+        A tuple of TradeOrder (empty if there are none)
+
+        """
+
+    if ticket is not None:
+        orders = terminal.orders_get(ticket = ticket)
+    elif symbol is not None:
+        orders = terminal.orders_get(symbol = symbol)
+    elif group is not None:
+        orders = terminal.orders_get(group = group)
+    else:
+        orders = terminal.orders_get()
+
+    if not orders:
+        return ()
+
+    if magic is not None:
+        orders = tuple(order for order in orders if order.magic == magic)
+    if comment is not None:
+        orders = tuple(order for order in orders if order.comment == comment)
+    return orders
+
+
+def positions_frame(positions, drop = DROPPED_COLUMNS):
+    """
+    Build a DataFrame from positions column by column.
+
+    Parameters:
+        positions: sequence of TradePosition, as returned by fetch_positions()
+        drop: columns to leave out
+
+    Returns:
+        A pandas DataFrame with one row per position, or None if positions is empty
+
+        """
+
+    import pandas as pd
+
+    if len(positions) == 0:
+        return None
+
+    # transpose once in C instead of letting pandas walk every namedtuple
+    columns = zip(positions[0]._fields, zip(*positions))
+    df = pd.DataFrame({name: values for name, values in columns if name not in drop})
+    if 'time' in df:
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
@@ -1,8 +1,20 @@
-import numpy as np
-import pandas as pd
-import datetime 
+import threading
 import time
-import MetaTrader5 as mt5
+
+from MT5pytrader import constants
+from MT5pytrader.backends import LazyBackend, load_backend
+from MT5pytrader.bulk import close_requests, dispatch
+from MT5pytrader.hooks import HookedBackend, Hooks
+from MT5pytrader.marketdata import MarketData
+from MT5pytrader.metrics import InstrumentedBackend, Metrics
+from MT5pytrader.orders import PENDING_OPS, PENDING_TYPES, PendingOrder, RequestBuilder
+from MT5pytrader.pnl import aggregate_pnl, pnl_frame
+from MT5pytrader.positions import fetch_orders, fetch_positions, positions_frame
+from MT5pytrader.reports import execution_report, print_report, rejection_report
+from MT5pytrader.retry import RetryPolicy, send_with_retry
+from MT5pytrader.stops import plan_stops
+from MT5pytrader.symbols import SymbolCache
+from MT5pytrader.validation import Rejection, Validator
     
 class Trader: #parent
     """
@@ -16,52 +28,255 @@ class Trader: #parent
         MT5pytrader.close_sell() - Close a sell position using the symbol or ticket_id
         MT5pytrader.open_buy_limit() - Open a buy limit
         MT5pytrader.open_sell_limit() - Open a sell limit
+        MT5pytrader.place_orders() - Place a batch of limit/stop orders concurrently (grids, ladders)
+        MT5pytrader.orders_snapshot() - Returns all pending orders from a single terminal call
+        MT5pytrader.cancel_orders() - Cancel every pending order matching symbol/group/magic/comment filters
         MT5pytrader.close_partial_buy() - Close a percentage of an open buy position(partial close)
         MT5pytrader.close_partial_sell() - Close a percentage of an open sell position(partial close)
+        MT5pytrader.close_all() - Close every position matching symbol/group/magic/comment/side filters
         MT5pytrader.modify_sl() - Modify Stop loss of a position using the symbol or ticket_id
         MT5pytrader.modify_tp() - Modify Take profit of a position using the symbol or ticket_id
         MT5pytrader.get_open_positions() - Returns a list of all open position as a pandas Dataframe
+        MT5pytrader.positions_snapshot() - Returns all open positions from a single terminal call
         MT5pytrader.running_profit() - Returns the cummulative sum of all runnig trades (profit/loss)
+        MT5pytrader.pnl() - Returns profit/swap totals, optionally per symbol, magic, comment or side
         MT5pytrader.break_even() - Break even on a running position in profit
+        MT5pytrader.update_stops() - Break even / trail the stop loss of every matching position in one pass
+        MT5pytrader.use_tick_stream() - Price orders from a TickStreamer instead of the terminal
+        MT5pytrader.get_rates() - Returns bars of a symbol as a NumPy structured array, DataFrame or Arrow Table
+        MT5pytrader.get_ticks() - Returns ticks of a symbol as a NumPy structured array, DataFrame or Arrow Table
+        MT5pytrader.enable_metrics() - Time every terminal call into latency histograms (Prometheus export)
+        MT5pytrader.hooks - Before/after callbacks around terminal calls (profilers, tracers), see Hooks
+
+    Symbol metadata (point, digits, volume limits, stop levels, ...) is cached in
+    Trader.symbols, see SymbolCache. symbol_cache_ttl sets how long (seconds) an entry
+    stays valid, None keeps entries until Trader.symbols.invalidate() or connect().
+
+    Order, close and modify methods return an ExecutionReport (BulkReport for several
+    positions) and pass it to every listener added with add_listener(). With quiet=True
+    nothing is printed or formatted.
+
+    Terminal calls go through Trader.mt5: the MetaTrader5 package by default, or the
+    backend passed as backend= (e.g SimulatedTerminal() to run without a terminal).
+    Market orders and closes answered with a requote, price change, price off, timeout
+    (...) are retried at the freshest price following retry, a RetryPolicy (True for the
+    default policy, None to send once). Reports record the attempts and total time.
+
+    Requests are validated locally before they are sent (see Validator): volumes snapped
+    to volume_step, prices to digits, stops inside trade_stops_level moved out of it
+    (validation="adjust") or rejected ("reject"), frozen positions left alone. With
+    order_check=True the terminal's order_check() runs too. validation=None sends
+    requests as built. Rejected requests return a report with attempts == 0.
+
+    path selects the terminal executable to start (terminal64.exe), see TerminalPool to
+    trade several accounts/terminals from one process.
+
+    The terminal is initialized by start(), on the first terminal call by default
+    (lazy=True), so creating a Trader costs nothing until it is used; lazy=False
+    initializes it in the constructor.
 
     """
     
-    def __init__(self, comment = "MT5pytrader", magic = 260000, deviation = 20, type_time = mt5.ORDER_TIME_GTC, type_filling = mt5.SYMBOL_TRADE_EXECUTION_INSTANT):
+    def __init__(self, comment = "MT5pytrader", magic = 260000, deviation = 20, type_time = constants.ORDER_TIME_GTC, type_filling = constants.SYMBOL_TRADE_EXECUTION_INSTANT, symbol_cache_ttl = None, backend = None, quiet = False, path = None, retry = True, validation = "adjust", order_check = False, lazy = True):
         
-        # establish connection to the MetaTrader 5 terminal
-        if not mt5.initialize():
-            print("initialize() failed, error code =",mt5.last_error())
+        self.quiet = quiet
+        self._listeners = []
 
-        else:
-            print("successfully initialized. Please allow Auto trading")
-            #quit()
+        # MetaTrader5 package (imported by start()), or another Backend such as SimulatedTerminal
+        self._terminal = load_backend(backend) if backend is not None else None
+        self.mt5 = LazyBackend(self._started_backend)
+        self._metrics = None
+        self.hooks = Hooks(self._layer_backend)
+        self.path = path
+        self._started = False
+        self._initialized = False
+        self._start_lock = threading.RLock()
             
         self.comment = comment #"MT5pytrader"
         self.magic = magic #260000
         self.deviation = deviation #20
         self.type_time = type_time #mt5.ORDER_TIME_GTC
         self.type_filling = type_filling #mt5.SYMBOL_TRADE_EXECUTION_INSTANT
+        self.symbols = SymbolCache(self.mt5, ttl = symbol_cache_ttl, log = self._log)
+        self.requests = RequestBuilder()
+        self.retry = RetryPolicy() if retry is True else (retry or None)
+        self.validator = Validator(self.symbols, validation, order_check) if validation else None
+        self.market = MarketData(self.mt5)
+        self.ticks = None #TickStreamer, see use_tick_stream()
+        self.tick_max_age = None
+
+        if not lazy:
+            self.start()
         
     def __repr__(self):
         return "MT5pytrader Instance"
         #return f"MT5pytrader(symbol: {self.symbol}, Lot_size: {self.lot}, Stop_loss: {self.sl}, Take_profit: {self.tp})"
     
+    #def establish connection to the MetaTrader 5 terminal
+    def start(self):
+        """
+        Load the backend and initialize the terminal. Runs once, on the first terminal
+        call (or when initialized is read) unless called explicitly; with lazy=False it
+        runs in the constructor.
+
+        Returns:
+            True if the terminal initialized
+
+            """
+
+        with self._start_lock:
+            if self._started:
+                return self._initialized
+            if self._terminal is None:
+                self._terminal = load_backend(None)
+            self._started = True
+            self._layer_backend()
+            self._initialized = bool(self.mt5.initialize(self.path) if self.path is not None else self.mt5.initialize())
+            if not self._initialized:
+                self._log("initialize() failed, error code = {}", self.mt5.last_error())
+
+            else:
+                self._log("successfully initialized. Please allow Auto trading")
+                #quit()
+        return self._initialized
+
+    @property
+    def initialized(self):
+        return self.start()
+
+    @property
+    def started(self):
+        return self._started
+
+    def _started_backend(self):
+        self.start()
+        return self.mt5
+
     #def connect to mt5 account
-    def connect(self, account, password, server):
+    def connect(self, account, password, server, preload_symbols = False):
+        """
+        Connect to a trade account.
+
+        Parameters:
+            account: account number
+            password: account password
+            server: trade server name
+            preload_symbols: True to cache every symbol of the account, or a list of symbols to cache
+
+        Returns:
+            True if the account is connected
+
+            """
         # connect to the trade account without specifying a password and a server
         self.account = account
         self.server = server
         self.password = password
 
-        authorized=mt5.login(self.account, password = self.password, server = self.server)  # the terminal database password is applied if connection data is set to be remembered
+        authorized=self.mt5.login(self.account, password = self.password, server = self.server)  # the terminal database password is applied if connection data is set to be remembered
         if authorized:
-            print("connected to account #{}. Please Turn On Algo Trading".format(account))
+            self._log("connected to account #{}. Please Turn On Algo Trading", account)
+            # symbols (and their settings) differ between accounts
+            self.symbols.invalidate()
+            if preload_symbols:
+                self.symbols.preload(None if preload_symbols is True else preload_symbols)
         else:
-            print("failed to connect at account #{}, error code: {}".format(account, mt5.last_error()))
+            self._log("failed to connect at account #{}, error code: {}", account, self.mt5.last_error())
+        return bool(authorized)
+
+    #get cached symbol info, adding the symbol to MarketWatch if needed
+    def _check_symbol(self, symbol):
+        symbol_info = self.symbols.get(symbol)
+        if symbol_info is None:
+            self._log("{} not found", symbol)
+        return symbol_info
+
+    #def add an execution report listener
+    def add_listener(self, listener):
+        """
+        Call listener(report) with the ExecutionReport of every request Trader sends.
+        Listeners run on the calling thread, after the request completed.
+
+        Parameters:
+            listener: callable taking an ExecutionReport
+
+            """
+
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    #def price orders from streamed ticks
+    def use_tick_stream(self, streamer, max_age = 1.0):
+        """
+        Price market orders and closes from the latest tick buffered by a TickStreamer
+        instead of calling symbol_info_tick() for every request. Symbols that are not
+        streamed, or whose buffer is older than max_age, still use the terminal.
+
+        Parameters:
+            streamer: TickStreamer, None to go back to terminal ticks
+            max_age: seconds since the streamer last updated a symbol for its tick to be used (None for no limit)
+
+            """
+
+        self.ticks = streamer
+        self.tick_max_age = max_age
+
+    #latest tick of a symbol, from the tick stream when it is fresh enough
+    def _tick(self, symbol):
+        if self.ticks is not None:
+            tick = self.ticks.latest(symbol, self.tick_max_age)
+            if tick is not None:
+                return tick
+        return self.mt5.symbol_info_tick(symbol)
+
+    #def time every terminal call
+    def enable_metrics(self, metrics = None):
+        """
+        Time every terminal call (symbol_info, symbol_info_tick, positions_get, order_send, ...)
+        into latency histograms per call and retcode. Metrics are off by default, and then
+        cost nothing: the terminal is only wrapped while they are enabled.
+
+        Parameters:
+            metrics: Metrics to record into, a new one if None
+
+        Returns:
+            The Metrics (see Metrics.prometheus(), Metrics.serve(), Metrics.write())
+
+            """
+
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._layer_backend()
+        return self._metrics
+
+    def disable_metrics(self):
+        self._metrics = None
+        self._layer_backend()
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    #wrap the terminal in metrics and hooks, only when they are in use
+    def _layer_backend(self):
+        if not self._started:
+            return #layered by start()
+        backend = self._terminal
+        if self._metrics is not None:
+            backend = InstrumentedBackend(backend, self._metrics)
+        if self.hooks:
+            backend = HookedBackend(backend, self.hooks)
+        self._rewire(backend)
+
+    #point every component at a (wrapped) backend
+    def _rewire(self, backend):
+        self.mt5 = backend
+        self.symbols.terminal = backend
+        self.market.terminal = backend
+
 
-    
     # define open buy position
-    def open_buy(self, symbol, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader"):
+    def open_buy(self, symbol, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader", sl_price = None, tp_price = None):
         """
         Opens a Buy Position with the input parameters.
 
@@ -72,116 +287,19 @@ class Trader: #parent
             tp: take profit in points
             comment: Custom comment for the trade position
             magic: custom magic number for the trade position
+            sl_price: stop loss as an absolute price (instead of sl in points)
+            tp_price: take profit as an absolute price (instead of tp in points)
+
+        Returns:
+            An ExecutionReport, or None if the symbol was not found
 
             """
         
-        self.symbol = symbol
-        self.lot = lot  
-        self.comment = comment
-        self.magic = magic
-        self.sl = stop_loss
-        self.tp = take_profit
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        point = mt5.symbol_info(self.symbol).point
-        price = mt5.symbol_info_tick(self.symbol).bid
-        
-        
-        if self.sl != None and self.tp == None:  #if sl only is defined
-        
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY,
-                "price": price,
-                "sl": price - (self.sl * point), 
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-        elif self.tp != None and self.sl == None:  #if tp only is defined
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY,
-                "price": price,
-                "tp": price + (self.tp * point),
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,}
-
-        elif self.sl == None and self.tp == None:  #if sl and tp are not defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY,
-                "price": price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-            
-        elif self.sl != None and self.tp != None:  #if sl and tp are defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY,
-                "price": price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "sl": price - (self.sl * point),
-                "tp": price + (self.tp * point),
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-
-        # send a trading request
-        result = mt5.order_send(request)
-        # check the execution result
-        print("SENDING ORDER: BUY {} {} lots at {} with deviation={} points".format(self.symbol,self.lot,price,self.deviation));
-        if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-            print(" - order_send failed, retcode={}".format(result.retcode))
-
-            # request the result as a dictionary and display it element by element
-            result_dict=result._asdict()
-            for field in result_dict.keys():
-                print("   {}={}".format(field,result_dict[field]))
-                # if this is a trading request structure, display it element by element as well
-                if field=="request":
-                    traderequest_dict=result_dict[field]._asdict()
-                    for tradereq_filed in traderequest_dict:
-                        print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-        else:
-            print(f"Order Sent! {result.order}")
+        return self._send_order("open_buy", symbol, self.mt5.ORDER_TYPE_BUY, None, lot, stop_loss, take_profit, sl_price, tp_price, magic, comment)
             
     
     # define open sell position
-    def open_sell(self, symbol, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader"):
+    def open_sell(self, symbol, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader", sl_price = None, tp_price = None):
         """
         Opens a Sell Position with the input parameters.
 
@@ -192,117 +310,20 @@ class Trader: #parent
             tp: take profit in points
             comment: Custom comment for the trade position
             magic: custom magic number for the trade position
+            sl_price: stop loss as an absolute price (instead of sl in points)
+            tp_price: take profit as an absolute price (instead of tp in points)
+
+        Returns:
+            An ExecutionReport, or None if the symbol was not found
 
             """
         
-        self.symbol = symbol
-        self.lot = lot  
-        self.comment = comment
-        self.magic = magic
-        self.sl = stop_loss
-        self.tp = take_profit
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        point = mt5.symbol_info(self.symbol).point
-        price = mt5.symbol_info_tick(self.symbol).ask     
-        
-        if self.sl != None and self.tp == None:  #if sl only is defined
-        
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL,
-                "price": price,
-                "sl": price + (self.sl * point), 
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-        elif self.tp != None and self.sl == None:  #if tp only is defined
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL,
-                "price": price,
-                "tp": price - (self.tp * point),
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,
-            }
-
-        elif self.sl == None and self.tp == None:  #if sl and tp are not defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL,
-                "price": price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-            
-        elif self.sl != None and self.tp != None:  #if sl and tp are defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL,
-                "price": price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "sl": price + (self.sl * point),
-                "tp": price - (self.tp * point),
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-
-        # send a trading request
-        result = mt5.order_send(request)
-        # check the execution result
-        print("SENDING ORDER: SELL {} {} lots at {} with deviation={} points".format(self.symbol,self.lot,price,self.deviation));
-        if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-            print(" - order_send failed, retcode={}".format(result.retcode))
-
-            # request the result as a dictionary and display it element by element
-            result_dict=result._asdict()
-            for field in result_dict.keys():
-                print("   {}={}".format(field,result_dict[field]))
-                # if this is a trading request structure, display it element by element as well
-                if field=="request":
-                    traderequest_dict=result_dict[field]._asdict()
-                    for tradereq_filed in traderequest_dict:
-                        print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-        else:
-            print(f"Order Sent! {result.order}")
+        return self._send_order("open_sell", symbol, self.mt5.ORDER_TYPE_SELL, None, lot, stop_loss, take_profit, sl_price, tp_price, magic, comment)
 
 
 
     # define open buy limit 
-    def open_buy_limit(self, symbol, price, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader"):
+    def open_buy_limit(self, symbol, price, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader", sl_price = None, tp_price = None):
         """
         Opens a Buy Limit with the input parameters.
 
@@ -314,117 +335,20 @@ class Trader: #parent
             tp: take profit in points
             comment: Custom comment for the trade position
             magic: custom magic number for the trade position
+            sl_price: stop loss as an absolute price (instead of sl in points)
+            tp_price: take profit as an absolute price (instead of tp in points)
+
+        Returns:
+            An ExecutionReport, or None if the symbol was not found
 
             """
         
-        self.symbol = symbol
-        self.price = price
-        self.lot = lot  
-        self.comment = comment
-        self.magic = magic
-        self.sl = stop_loss
-        self.tp = take_profit
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        point = mt5.symbol_info(self.symbol).point
-        
-        
-        if self.sl != None and self.tp == None:  #if sl only is defined
-        
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY_LIMIT,
-                "price": self.price,
-                "sl": self.price - (self.sl * point), 
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,
-            }
-
-        elif self.tp != None and self.sl == None:  #if tp only is defined
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY_LIMIT,
-                "price": self.price,
-                "tp": self.price + (self.tp * point),
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,}
-
-        elif self.sl == None and self.tp == None:  #if sl and tp are not defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY_LIMIT,
-                "price": self.price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-            
-        elif self.sl != None and self.tp != None:  #if sl and tp are defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_BUY_LIMIT,
-                "price": self.price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "sl": self.price - (self.sl * point),
-                "tp": self.price + (self.tp * point),
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,
-            }
-
-
-        # send a trading request
-        result = mt5.order_send(request)
-        # check the execution result
-        print("SENDING ORDER: BUY LIMIT {} {} lots at {} with deviation={} points".format(self.symbol,self.lot,self.price,self.deviation));
-        if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-            print(" - order_send failed, retcode={}".format(result.retcode))
-
-            # request the result as a dictionary and display it element by element
-            result_dict=result._asdict()
-            for field in result_dict.keys():
-                print("   {}={}".format(field,result_dict[field]))
-                # if this is a trading request structure, display it element by element as well
-                if field=="request":
-                    traderequest_dict=result_dict[field]._asdict()
-                    for tradereq_filed in traderequest_dict:
-                        print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-        else:
-            print(f"Order Sent! {result.order}")
+        return self._send_order("open_buy_limit", symbol, self.mt5.ORDER_TYPE_BUY_LIMIT, price, lot, stop_loss, take_profit, sl_price, tp_price, magic, comment)
             
             
 
     # define open SELL limit 
-    def open_sell_limit(self, symbol, price, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader"):
+    def open_sell_limit(self, symbol, price, lot = 0.1, stop_loss = None, take_profit = None, magic = 260000, comment = "MT5pytrader", sl_price = None, tp_price = None):
         """
         Opens a sell Limit with the input parameters.
 
@@ -436,111 +360,132 @@ class Trader: #parent
             tp: take profit in points
             comment: Custom comment for the trade position
             magic: custom magic number for the trade position
+            sl_price: stop loss as an absolute price (instead of sl in points)
+            tp_price: take profit as an absolute price (instead of tp in points)
+
+        Returns:
+            An ExecutionReport, or None if the symbol was not found
 
             """
         
-        self.symbol = symbol
-        self.price = price
-        self.lot = lot  
-        self.comment = comment
-        self.magic = magic
-        self.sl = stop_loss
-        self.tp = take_profit
+        return self._send_order("open_sell_limit", symbol, self.mt5.ORDER_TYPE_SELL_LIMIT, price, lot, stop_loss, take_profit, sl_price, tp_price, magic, comment)
+
+
+    #def place many pending orders at once
+    def place_orders(self, orders, max_workers = 8):
+        """
+        Place a batch of pending orders (limits and stops), e.g a grid or a ladder.
+        Every request is built up front (one symbol lookup per symbol), validated as
+        one batch, then sent through a pool of at most max_workers threads.
+
+        Parameters:
+            orders: iterable of PendingOrder (or dicts with its fields), e.g
+                PendingOrder("EURUSD", "buy_limit", 1.0850, lot = 0.1, stop_loss = 200)
+            max_workers: maximum number of requests in flight
+
+        Returns:
+            A BulkReport with one ExecutionReport per order, in order (order holds the ticket placed)
+
+            """
+
+        orders = [order if isinstance(order, PendingOrder) else PendingOrder(**order) for order in orders]
+        metas = {}
+        requests, ops, rejected = [], [], {}
+        for i, order in enumerate(orders):
+            order_type = PENDING_TYPES.get(order.order_type, order.order_type)
+            ops.append(PENDING_OPS.get(order_type, "place_order"))
+            if order.symbol not in metas:
+                metas[order.symbol] = self._check_symbol(order.symbol)
+            meta = metas[order.symbol]
+            if meta is None or order_type not in PENDING_OPS:
+                requests.append({"action": constants.TRADE_ACTION_PENDING, "symbol": order.symbol, "type": order_type,
+                                 "price": order.price, "volume": order.lot})
+                rejected[i] = Rejection(constants.TRADE_RETCODE_INVALID, "unknown symbol" if meta is None else f"{order.order_type!r} is not a pending order type")
+                continue
+            requests.append(self.requests.build(order.symbol, order_type, order.price, order.lot, meta.point, order.stop_loss,
+                                                order.take_profit, order.sl_price, order.tp_price,
+                                                self.magic if order.magic is None else order.magic,
+                                                self.comment if order.comment is None else order.comment,
+                                                self.deviation, self.type_time, self.type_filling))
+        return self._dispatch(ops, requests, max_workers, rejected = rejected)
+
+
+    #get pending orders
+    def orders_snapshot(self, symbol = None, group = None, ticket = None, magic = None, comment = None):
+        """
+        Get pending orders as returned by the terminal (tuple of TradeOrder), from a single orders_get() call.
+
+        Parameters:
+            symbol, group, ticket, magic, comment: filters, as for positions_snapshot()
+
+        Returns:
+            A tuple of TradeOrder (empty if there are none)
+
+            """
+
+        return fetch_orders(self.mt5, symbol = symbol, group = group, ticket = ticket, magic = magic, comment = comment)
+
+
+    #def cancel pending orders
+    def cancel_orders(self, symbol = None, group = None, magic = None, comment = None, ticket = None, max_workers = 8):
+        """
+        Cancel every pending order matching the filters (all of them without filters).
+        Orders are fetched with one orders_get() call, then TRADE_ACTION_REMOVE requests
+        are sent through a pool of at most max_workers threads.
+
+        Parameters:
+            symbol: only orders on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*"
+            magic: only orders with this magic number
+            comment: only orders with this comment
+            ticket: only the order with this ticket
+            max_workers: maximum number of requests in flight
+
+        Returns:
+            A BulkReport with one ExecutionReport per order
+
+            """
+
+        orders = self.orders_snapshot(symbol = symbol, group = group, ticket = ticket, magic = magic, comment = comment)
+        if len(orders) == 0:
+            self._log("No orders to cancel, error code={}", self.mt5.last_error())
+        else:
+            self._log("Total orders to cancel = {}", len(orders))
+
+        requests = [{"action": constants.TRADE_ACTION_REMOVE, "order": order.ticket, "symbol": order.symbol} for order in orders]
+        return self._dispatch("cancel_order", requests, max_workers)
+
+
+    #build an order from the request templates and send it
+    def _send_order(self, op, symbol, order_type, price, lot, stop_loss, take_profit, sl_price, tp_price, magic, comment):
         
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
+        #get symbol info (cached, see SymbolCache)
+        symbol_info = self._check_symbol(symbol)
         if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        point = mt5.symbol_info(self.symbol).point       
-        
-        if self.sl != None and self.tp == None:  #if sl only is defined
-        
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL_LIMIT,
-                "price": self.price,
-                "sl": self.price + (self.sl * point), 
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-        elif self.tp != None and self.sl == None:  #if tp only is defined
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL_LIMIT,
-                "price": self.price,
-                "tp": self.price - (self.tp * point),
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling,}
-
-        elif self.sl == None and self.tp == None:  #if sl and tp are not defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL_LIMIT,
-                "price": self.price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-            
-        elif self.sl != None and self.tp != None:  #if sl and tp are defined
-
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": self.lot,
-                "type": mt5.ORDER_TYPE_SELL_LIMIT,
-                "price": self.price,
-                "deviation": self.deviation,
-                "magic": self.magic,
-                "sl": self.price + (self.sl * point),
-                "tp": self.price - (self.tp * point),
-                "comment": self.comment,
-                "type_time":self.type_time,
-                "type_filling": self.type_filling, 
-            }
-
-
-        # send a trading request
-        result = mt5.order_send(request)
-        # check the execution result
-        print("SENDING ORDER: SELL LIMIT {} {} lots at {} with deviation={} points".format(self.symbol,self.lot, self.price,self.deviation));
-        if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-            print(" - order_send failed, retcode={}".format(result.retcode))
-
-            # request the result as a dictionary and display it element by element
-            result_dict=result._asdict()
-            for field in result_dict.keys():
-                print("   {}={}".format(field,result_dict[field]))
-                # if this is a trading request structure, display it element by element as well
-                if field=="request":
-                    traderequest_dict=result_dict[field]._asdict()
-                    for tradereq_filed in traderequest_dict:
-                        print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-        else:
-            print(f"Order Sent! {result.order}")
+            return
+
+        def build(price):
+            return self.requests.build(symbol, order_type, price, lot, symbol_info.point, stop_loss, take_profit,
+                                       sl_price, tp_price, magic, comment, self.deviation, self.type_time, self.type_filling)
+
+        # pending orders keep their price
+        if price is not None:
+            return self._send(op, build(price))
+
+        # market orders are priced (and their SL/TP placed) at the price they fill at: buy at ask,
+        # sell at bid, so a spread wider than the deviation is not requoted.
+        # Retries are repriced from a fresh tick (no symbol checks)
+        def reprice(request):
+            tick = self.mt5.symbol_info_tick(symbol)
+            if tick is None:
+                return None
+            return build(tick.ask if order_type == self.mt5.ORDER_TYPE_BUY else tick.bid)
+
+        tick = self._tick(symbol)
+        if tick is None:
+            request = {"action": self.mt5.TRADE_ACTION_DEAL, "symbol": symbol, "type": order_type, "volume": lot, "magic": magic, "comment": comment}
+            return self._reject(op, request, Rejection(constants.TRADE_RETCODE_PRICE_OFF, f"no tick for {symbol}, error code={self.mt5.last_error()}"))
+        return self._send(op, build(tick.ask if order_type == self.mt5.ORDER_TYPE_BUY else tick.bid), reprice = reprice)
             
             
     #def close buy position
@@ -552,96 +497,13 @@ class Trader: #parent
         Parameters:
             symbol: Symbol to open position
             ticket_id: position id/ order_no
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
         
-        self.ticket_id = ticket_id
-        self.symbol = symbol
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        #get position using position_id
-        if self.ticket_id != None:
-            
-            positions=mt5.positions_get(ticket = self.ticket_id)
-            if len(positions) == 0:
-                print(f"No positions on {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            elif len(positions) > 0:
-                for position in positions:
-
-                    # create a close request
-                    symbol = position.symbol
-                    price=mt5.symbol_info_tick(symbol).ask
-                    
-                    request={
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": symbol,
-                        "volume": position.volume,
-                        "type": mt5.ORDER_TYPE_SELL,
-                        "position": self.ticket_id,
-                        "price": price,
-                        "deviation": self.deviation,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-                    # send a trading request
-                    result=mt5.order_send(request)
-                    # check the execution result
-                    print("close position #{}: sell {} {} lots at {} with deviation={} points".format(self.ticket_id,symbol,position.volume,price,self.deviation));
-                    if result.retcode != mt5.TRADE_RETCODE_DONE:
-                        print("Close Position failed, retcode={}".format(result.retcode))
-                        #print("   result",result)
-                    else:
-                        print(f"position #{self.ticket_id} closed, {result}")
-                        # request the result as a dictionary and display it element by element
-                
-        elif self.ticket_id == None:
-            # get open positions by symbol
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            elif len(positions)>0:
-                print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    position_id= position.identifier
-
-                # create a close request
-                price=mt5.symbol_info_tick(self.symbol).ask
-
-                request={
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": self.symbol,
-                    "volume": position.volume,
-                    "type": mt5.ORDER_TYPE_SELL,
-                    "position": position_id,
-                    "price": price,
-                    "deviation": self.deviation,
-                    "type_time":self.type_time,
-                    "type_filling": self.type_filling,
-                }
-                # send a trading request
-                result=mt5.order_send(request)
-                # check the execution result
-                print("close position #{}: sell {} {} lots at {} with deviation={} points".format(position_id,self.symbol,position.volume,price,self.deviation));
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print("Close Position failed, retcode={}".format(result.retcode))
-                    #print("   result",result)
-                else:
-                    print(f"position #{position_id} closed, {result}")
-                    # request the result as a dictionary and display it element by element                
+        return self._close(symbol, ticket_id, "buy")
 
     
     #def close sell position
@@ -653,98 +515,13 @@ class Trader: #parent
         Parameters:
             symbol: Symbol to open position
             ticket_id: position id/ order_no
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
         
-        self.ticket_id = ticket_id
-        self.symbol = symbol
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        #get position using position_id
-        if self.ticket_id != None:
-            
-            positions=mt5.positions_get(ticket = self.ticket_id)
-            if len(positions) == 0:
-                print(f"No positions on {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions) > 0:
-                for position in positions:
-
-                    # create a close request
-                    symbol = position.symbol
-                    price=mt5.symbol_info_tick(symbol).ask
-                    
-                    request={
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": symbol,
-                        "volume": position.volume,
-                        "type": mt5.ORDER_TYPE_BUY,
-                        "position": self.ticket_id,
-                        "price": price,
-                        "deviation": self.deviation,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-                    
-                    # send a trading request
-                    result=mt5.order_send(request)
-                    # check the execution result
-                    print("close position #{}: buy {} {} lots at {} with deviation={} points".format(self.ticket_id,symbol,position.volume,price,self.deviation));
-                    if result.retcode != mt5.TRADE_RETCODE_DONE:
-                        print("Close Position failed, retcode={}".format(result.retcode))
-                        #print("   result",result)
-                    else:
-                        print(f"position #{self.ticket_id} closed, {result}")
-                        # request the result as a dictionary and display it element by element
-                
-        elif self.ticket_id is None:
-            # get open positions by symbol
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            elif len(positions)>0:
-                print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    lot = position.volume
-                    position_id= position.identifier
-
-                # create a close request
-                price=mt5.symbol_info_tick(self.symbol).bid
-                deviation=20
-                request={
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": self.symbol,
-                    "volume": lot,
-                    "type": mt5.ORDER_TYPE_BUY,
-                    "position": position_id,
-                    "price": price,
-                    "deviation": self.deviation,
-                    "type_time":self.type_time,
-                    "type_filling": self.type_filling,
-                }
-                # send a trading request
-                result=mt5.order_send(request)
-                # check the execution result
-                print("close position #{}: buy {} {} lots at {} with deviation={} points".format(position_id,self.symbol,position.volume,price,self.deviation));
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print("Close Position failed, retcode={}".format(result.retcode))
-                    #print("   result",result)
-                else:
-                    print(f"position #{position_id} closed, {result}")
+        return self._close(symbol, ticket_id, "sell")
                     
                     
     #def close PARTIAL buy position
@@ -758,99 +535,13 @@ class Trader: #parent
             symbol: Symbol to open position
             percent : percentage of volume to close, e.g - to close half of position = 0.5
             ticket_id: position id/ order_no of position
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
     
-        self.symbol = symbol
-        self.ticket_id = ticket_id
-        self.percent = percent
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
-        #get position using position_id
-        if self.ticket_id != None:
-            
-            positions=mt5.positions_get(ticket = self.ticket_id)
-            if len(positions) == 0:
-                print(f"No positions on {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            elif len(positions) > 0:
-                for position in positions:
-
-                    # create a close request
-                    symbol = position.symbol
-                    price=mt5.symbol_info_tick(symbol).ask
-                    lot = position.volume
-                    
-                    request={
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": symbol,
-                        "volume": round((lot * percent), 2),
-                        "type": mt5.ORDER_TYPE_SELL,
-                        "position": self.ticket_id,
-                        "price": price,
-                        "deviation": self.deviation,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-                    # send a trading request
-                    result=mt5.order_send(request)
-                    # check the execution result
-                    print("close position #{}: sell {} {} lots at {} with deviation={} points".format(self.ticket_id,symbol,position.volume,price,self.deviation));
-                    if result.retcode != mt5.TRADE_RETCODE_DONE:
-                        print("Close Position failed, retcode={}".format(result.retcode))
-                        #print("   result",result)
-                    else:
-                        print(f"position #{self.ticket_id} closed, {result}")
-                        # request the result as a dictionary and display it element by element
-                
-        elif self.ticket_id == None:
-            # get open positions by symbol
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            elif len(positions)>0:
-                print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    position_id= position.identifier
-                    lot = position.volume
-
-                    # create a close request
-                    price=mt5.symbol_info_tick(self.symbol).ask
-                    deviation=20
-                    request={
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": self.symbol,
-                        "volume": round((lot * percent), 2),
-                        "type": mt5.ORDER_TYPE_SELL,
-                        "position": position_id,
-                        "price": price,
-                        "deviation": self.deviation,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-                # send a trading request
-                result=mt5.order_send(request)
-                # check the execution result
-                print("close position #{}: sell {} {} lots at {} with deviation={} points".format(position_id,self.symbol,lot,price,self.deviation));
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print("Close Position failed, retcode={}".format(result.retcode))
-                    #print("   result",result)
-                else:
-                    print(f"position #{position_id} closed, {result}")
-                    # request the result as a dictionary and display it element by element      
+        return self._close(symbol, ticket_id, "buy", percent)
             
             
     #def close partial sell position
@@ -863,167 +554,237 @@ class Trader: #parent
             symbol: Symbol to open position
             percent : percentage of volume to close, e.g - to close half of position = 0.5
             ticket_id: position id/ order_no of position
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
         
-        self.ticket_id = ticket_id
-        self.symbol = symbol
-        self.percent = percent
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-        
+        return self._close(symbol, ticket_id, "sell", percent)
+
+
+    #close a position by ticket, or every position of one side on a symbol
+    def _close(self, symbol, ticket_id, side, percent = None):
+
         #get position using position_id
-        if self.ticket_id != None:
-            
-            positions=mt5.positions_get(ticket = self.ticket_id)
+        if ticket_id is not None:
+            positions = self.positions_snapshot(ticket = ticket_id)
             if len(positions) == 0:
-                print(f"No positions on {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions) > 0:
-                for position in positions:
+                self._log("No positions on {}, error code={}", ticket_id, self.mt5.last_error())
+                return None
+
+            position_type = self.mt5.POSITION_TYPE_BUY if side == "buy" else self.mt5.POSITION_TYPE_SELL
+            if positions[0].type != position_type:
+                self._log("Position #{} is not a {} position", ticket_id, side)
+                return None
+
+            # create a close request and send it
+            rejected = {}
+            request = close_requests(self.mt5, positions, self.deviation, self.type_time, self.type_filling, percent = percent,
+                                     get_tick = self._tick, get_meta = self.symbols.get, rejected = rejected)[0]
+            if rejected:
+                return self._reject("close", request, rejected[0])
+            return self._send("close", request, reprice = self._reprice_close, position = positions[0])
+
+        elif symbol is not None:
+            #get symbol info (cached, see SymbolCache)
+            if self._check_symbol(symbol) is None:
+                return None
+
+            # close every position of this side on the symbol
+            return self.close_all(symbol = symbol, side = side, percent = percent)
+
+
+    #close every position matching a filter
+    def close_all(self, symbol = None, group = None, magic = None, comment = None, side = None, percent = None, max_workers = 8):
+        """
+        Close all positions matching the filters, e.g every position on a symbol,
+        every position with a magic number, or the whole account (no filters).
+        Positions are fetched once, all close requests are built up front and
+        sent through a pool of at most max_workers threads.
+
+        Parameters:
+            symbol: only positions on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*" (see mt5.positions_get)
+            magic: only positions with this magic number
+            comment: only positions with this comment
+            side: "buy" or "sell" to close one side only
+            percent: fraction of each position to close, e.g 0.5 closes half (None closes all of it)
+            max_workers: maximum number of close requests in flight
+
+        Returns:
+            A BulkReport with one ExecutionReport (retcode, price, elapsed, ...) per position
+
+            """
+
+        positions = self.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+        if side is not None:
+            position_type = self.mt5.POSITION_TYPE_BUY if side == "buy" else self.mt5.POSITION_TYPE_SELL
+            positions = [position for position in positions if position.type == position_type]
+
+        if len(positions) == 0:
+            self._log("No positions to close, error code={}", self.mt5.last_error())
+        else:
+            self._log("Total positions to close = {}", len(positions))
+
+        rejected = {}
+        requests = close_requests(self.mt5, positions, self.deviation, self.type_time, self.type_filling, percent = percent,
+                                  get_tick = self._tick, get_meta = self.symbols.get, rejected = rejected)
+        return self._dispatch("close", requests, max_workers, reprice = self._reprice_close, positions = positions, rejected = rejected)
+
 
-                    # create a close request
-                    symbol = position.symbol
-                    price=mt5.symbol_info_tick(symbol).bid
-                    lot = position.volume
-                    
-                    request={
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": symbol,
-                        "volume": round((lot * percent), 2),
-                        "type": mt5.ORDER_TYPE_BUY,
-                        "position": self.ticket_id,
-                        "price": price,
-                        "deviation": self.deviation,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-                    
-                # send a trading request
-                result=mt5.order_send(request)
-                # check the execution result
-                print("close position #{}: buy {} {} lots at {} with deviation={} points".format(self.ticket_id,symbol,position.volume,price,self.deviation));
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print("Close Position failed, retcode={}".format(result.retcode))
-                    #print("   result",result)
-                else:
-                    print(f"position #{self.ticket_id} closed, {result}")
-                    # request the result as a dictionary and display it element by element
-                
-        elif self.ticket_id is None:
-            # get open positions by symbol
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            elif len(positions)>0:
-                print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    position_id= position.identifier
-                    lot = position.volume
-
-                # create a close request
-                price=mt5.symbol_info_tick(self.symbol).bid
-                deviation=20
-                request={
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": self.symbol,
-                    "volume": round((lot * percent), 2),
-                    "type": mt5.ORDER_TYPE_BUY,
-                    "position": position_id,
-                    "price": price,
-                    "deviation": self.deviation,
-                    "type_time":self.type_time,
-                    "type_filling": self.type_filling,
-                }
-                # send a trading request
-                result=mt5.order_send(request)
-                # check the execution result
-                print("close position #{}: buy {} {} lots at {} with deviation={} points".format(position_id,self.symbol,lot,price,self.deviation));
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print("Close Position failed, retcode={}".format(result.retcode))
-                    #print("   result",result)
-                else:
-                    print(f"position #{position_id} closed, {result}")
-                    
-               
     #get all open positions
-    def get_open_positions(self):
+    def get_open_positions(self, symbol = None, group = None, magic = None, comment = None):
         """"
         Get all open positions in the MT5 terminal.
+        All positions are fetched with a single terminal call.
+
+        Parameters:
+            symbol: only positions on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*" (see mt5.positions_get)
+            magic: only positions with this magic number
+            comment: only positions with this comment
         
         Returns:
-            An float of cummulative running profit/loss
+            A pandas Dataframe of open positions, or None if there are none
             
             """
         
-        symbols = mt5.symbols_get() #get all symbols in marcket watch
+        positions = self.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+
+        if len(positions) == 0:
+            self._log("No Open Position")
+            return None
 
-        open_pos = []
-        for symbol in symbols:
-            positions=mt5.positions_get(symbol = symbol.name)
+        # display running trades as a table using pandas.DataFrame
+        return positions_frame(positions)
 
-            if positions == None:
-                #print("No open positions")
-                pass
 
-            elif positions != None:
-                for position in positions:
-                    open_pos.append(position)
-                    #print(position)
+    #get raw open positions with one terminal call
+    def positions_snapshot(self, symbol = None, group = None, ticket = None, magic = None, comment = None):
+        """"
+        Get open positions as returned by the terminal (tuple of TradePosition).
 
-        if len(open_pos) == 0:
-            print("No Open Position")
-            df = None
+        Parameters:
+            symbol: only positions on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*" (see mt5.positions_get)
+            ticket: only the position with this ticket
+            magic: only positions with this magic number
+            comment: only positions with this comment
 
-        elif len(open_pos) > 0:
-            #print (f"open positions = {len(open_pos)}")
+        Returns:
+            A tuple of TradePosition (empty if there are none)
 
-            # display running trades as a table using pandas.DataFrame
-            df= pd.DataFrame(open_pos, columns=position._asdict().keys())
-            df.drop(['magic', 'time_msc', 'time_update_msc','time_update','external_id', 'identifier','reason'], axis=1, inplace=True)
-            #df['time_msc'] = pd.to_datetime(df['time_msc'], unit='s')
-            df['time'] = pd.to_datetime(df['time'], unit='s')
+            """
 
-        return df
+        return fetch_positions(self.mt5, symbol = symbol, group = group, ticket = ticket, magic = magic, comment = comment)
     
     
     #get sum of running trades proft/loss
-    def running_profit(self):
+    def running_profit(self, symbol = None, group = None, magic = None, comment = None):
         """"
         Get cummulative sum of all running trades (profit/loss).
+        Swap is not included, see pnl() for the profit/swap split.
+
+        Parameters:
+            symbol: only positions on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*" (see mt5.positions_get)
+            magic: only positions with this magic number
+            comment: only positions with this comment
            
         Returns:
             An float of cummulative running profit/loss
             
             """
 
-        profit = []
+        positions = self.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+        return round(sum(position.profit for position in positions), 2)
 
-        if self.get_open_positions() is None:
-            pass
-            #print ("No running trades")
 
-        else:
-            df = self.get_open_positions()
-            for index, row in df.iterrows():
-                profit.append(row[9])
+    #get profit/swap totals, optionally grouped
+    def pnl(self, by = None, as_frame = False, symbol = None, group = None, magic = None, comment = None):
+        """"
+        Aggregate floating profit and swap of open positions from one positions snapshot.
+
+        Parameters:
+            by: None for totals, or "symbol", "magic", "comment", "side" (a list of them with as_frame=True)
+            as_frame: return a pandas DataFrame instead of dicts (grouped by symbol if by is None)
+            symbol: only positions on this symbol
+            group: symbol mask, e.g "*USD*,!EUR*" (see mt5.positions_get)
+            magic: only positions with this magic number
+            comment: only positions with this comment
 
-        return round(sum(profit),2)
+        Returns:
+            dict with profit, swap, total, volume and count (keyed by group if by is given),
+            or a DataFrame if as_frame is True
+
+            """
+
+        positions = self.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+        if as_frame:
+            return pnl_frame(positions, by = by or "symbol")
+        return aggregate_pnl(positions, by = by)
     
     
+    #get bars of a symbol
+    def get_rates(self, symbol, timeframe, date_from = None, date_to = None, count = None, start_pos = 0, output = "numpy"):
+        """
+        Get bars of a symbol, without copying or converting them (see MarketData).
+
+        Parameters:
+            symbol: Symbol of the bars
+            timeframe: TIMEFRAME_* constant or name, e.g "M1", "H4"
+            date_from, date_to: bars between two dates (datetime or epoch seconds)
+            date_from, count: count bars ending at date_from
+            count: (no dates) count bars from start_pos bars back, 0 is the current bar
+            output: "numpy" (the terminal's structured array), "pandas" or "arrow"
+
+        Returns:
+            bars in the requested output, None if the terminal call failed
+
+            """
+
+        if count is None and (date_from is None or date_to is None):
+            raise ValueError("get_rates needs count, or date_from and date_to")
+        if date_from is not None and date_to is not None:
+            rates = self.market.rates_range(symbol, timeframe, date_from, date_to, output)
+        elif date_from is not None:
+            rates = self.market.rates_from(symbol, timeframe, date_from, count, output)
+        else:
+            rates = self.market.rates_from_pos(symbol, timeframe, start_pos, count, output)
+        if rates is None:
+            self._log("copy_rates failed for {}, error code={}", symbol, self.mt5.last_error())
+        return rates
+
+
+    #get ticks of a symbol
+    def get_ticks(self, symbol, date_from, date_to = None, count = None, flags = constants.COPY_TICKS_ALL, output = "numpy"):
+        """
+        Get ticks of a symbol, between date_from and date_to or count ticks from date_from.
+
+        Parameters:
+            symbol: Symbol of the ticks
+            date_from, date_to: datetime or epoch seconds
+            count: number of ticks from date_from (when date_to is None)
+            flags: COPY_TICKS_ALL, COPY_TICKS_INFO or COPY_TICKS_TRADE
+            output: "numpy" (the terminal's structured array), "pandas" or "arrow"
+
+        Returns:
+            ticks in the requested output, None if the terminal call failed
+
+            """
+
+        if count is None and date_to is None:
+            raise ValueError("get_ticks needs date_to or count")
+        if date_to is not None:
+            ticks = self.market.ticks_range(symbol, date_from, date_to, flags, output)
+        else:
+            ticks = self.market.ticks_from(symbol, date_from, count, flags, output)
+        if ticks is None:
+            self._log("copy_ticks failed for {}, error code={}", symbol, self.mt5.last_error())
+        return ticks
+
+
     #def modify stop loss    
     def modify_sl(self, symbol = None, ticket_id = None, sl = None):
         
@@ -1034,116 +795,13 @@ class Trader: #parent
             symbol: Symbol to open position
             ticket: position_id/order number of the trade to modify
             sl: stop loss price
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
         
-        self.symbol = symbol
-        self.ticket_id = ticket_id
-        self.sl = sl
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-                
-        
-        if self.ticket_id is not None: 
-            # prepare the request
-            positions=mt5.positions_get(ticket = self.ticket_id)
-            
-            if len(positions) == 0 :
-                print(f"No positions with position_id {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions)>0:
-                #print(f"Total positions on {self.symbol} =",len(positions))
-                
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    request = {
-                        "action": mt5.TRADE_ACTION_SLTP,
-                        "symbol": position.symbol,
-                        "position": self.ticket_id,
-                        "sl": self.sl,
-                        "tp": position.tp,
-                        "comment": self.comment,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-
-                # send a trading request
-                result = mt5.order_send(request)
-                # check the execution result
-                print ("order sending")
-                
-                if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                    print(" - order_send failed, retcode={}".format(result.retcode))
-
-                    # request the result as a dictionary and display it element by element
-                    result_dict=result._asdict()
-                    for field in result_dict.keys():
-                        print("   {}={}".format(field,result_dict[field]))
-                        # if this is a trading request structure, display it element by element as well
-                        if field=="request":
-                            traderequest_dict=result_dict[field]._asdict()
-                            for tradereq_filed in traderequest_dict:
-                                print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-                else:
-                    print(f"Order Sent! {result.order}")
-        
-        
-        elif self.symbol is not None: 
-        
-            # prepare the request
-            
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                #pass
-            
-            elif len(positions)>0:
-                print(f"Total positions on {self.symbol} =",len(positions))
-                
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    request = {
-                        "action": mt5.TRADE_ACTION_SLTP,
-                        "symbol": self.symbol,
-                        "position": position.ticket,
-                        "sl": self.sl,
-                        "tp": position.tp,
-                        "comment": self.comment,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-
-                # send a trading request
-                result = mt5.order_send(request)
-                # check the execution result
-                print ("order sending")
-                
-                if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                    print(" - order_send failed, retcode={}".format(result.retcode))
-
-                    # request the result as a dictionary and display it element by element
-                    result_dict=result._asdict()
-                    for field in result_dict.keys():
-                        print("   {}={}".format(field,result_dict[field]))
-                        # if this is a trading request structure, display it element by element as well
-                        if field=="request":
-                            traderequest_dict=result_dict[field]._asdict()
-                            for tradereq_filed in traderequest_dict:
-                                print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-                else:
-                    print(f"Order Sent! {result.order}")
+        return self._modify("modify_sl", symbol, ticket_id, lambda position: (sl, position.tp))
                
             
     #def modify take profit      
@@ -1156,113 +814,13 @@ class Trader: #parent
             symbol: Symbol to open position
             ticket: position_id/order number of the trade to modify
             tp: take profit price
+
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
             
             """
         
-        self.symbol = symbol
-        self.ticket_id = ticket_id
-        self.tp = tp
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
-        
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-                
-        
-        if self.ticket_id is not None: 
-            # prepare the request
-            positions=mt5.positions_get(ticket = self.ticket_id)
-            if len(positions) == 0:
-                print(f"No positions with position_id {self.ticket_id}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions)>0:
-                #print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    request = {
-                        "action": mt5.TRADE_ACTION_SLTP,
-                        "symbol": position.symbol,
-                        "position": self.ticket_id,
-                        "sl" : position.sl,
-                        "tp": self.tp,
-                        "comment": self.comment,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-
-            # send a trading request
-            result = mt5.order_send(request)
-            # check the execution result
-            print ("order sending")
-            
-            if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                print(" - order_send failed, retcode={}".format(result.retcode))
-
-                # request the result as a dictionary and display it element by element
-                result_dict=result._asdict()
-                for field in result_dict.keys():
-                    print("   {}={}".format(field,result_dict[field]))
-                    # if this is a trading request structure, display it element by element as well
-                    if field=="request":
-                        traderequest_dict=result_dict[field]._asdict()
-                        for tradereq_filed in traderequest_dict:
-                            print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-            else:
-                print(f"Order Sent! {result.order}")
-        
-        
-        elif self.symbol is not None: 
-        
-            # prepare the request
-            
-            positions=mt5.positions_get(symbol = self.symbol)
-            if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions)>0:
-                #print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    #print(position)
-                    request = {
-                        "action": mt5.TRADE_ACTION_SLTP,
-                        "symbol": self.symbol,
-                        "position": position.ticket,
-                        "sl": position.sl,
-                        "tp": self.tp,
-                        "comment": self.comment,
-                        "type_time":self.type_time,
-                        "type_filling": self.type_filling,
-                    }
-
-                        # send a trading request
-            result = mt5.order_send(request)
-            # check the execution result
-            print ("order sending")
-            
-            if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                print(" - order_send failed, retcode={}".format(result.retcode))
-
-                # request the result as a dictionary and display it element by element
-                result_dict=result._asdict()
-                for field in result_dict.keys():
-                    print("   {}={}".format(field,result_dict[field]))
-                    # if this is a trading request structure, display it element by element as well
-                    if field=="request":
-                        traderequest_dict=result_dict[field]._asdict()
-                        for tradereq_filed in traderequest_dict:
-                            print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-            else:
-                print(f"Order Sent! {result.order}")
+        return self._modify("modify_tp", symbol, ticket_id, lambda position: (position.sl, tp))
                 
     
 
@@ -1271,108 +829,184 @@ class Trader: #parent
         
         """"
         Break even on a profit Position using position ticket_id or symbol.
+        The stop loss is moved to the open price, the take profit is kept.
     
         Parameters:
             symbol: Symbol to open position
             ticket: position_id/order number of the trade to modify
 
+        Returns:
+            An ExecutionReport (ticket_id), a BulkReport (symbol), or None if nothing was sent
+
             """
-        self.symbol = symbol
-        self.ticket = ticket_id
-        
-        #get symbol info
-        symbol_info = mt5.symbol_info(self.symbol)
-        if symbol_info is None:
-            print(self.symbol, "not found")
         
-        # if the symbol is unavailable in MarketWatch, add it
-        if not symbol_info.visible:
-            print(self.symbol, "is not visible, trying to switch on")
-            if not mt5.symbol_select(self.symbol,True):
-                print("symbol_select({}}) failed, exit",syself.symbol)
-                
+        return self._modify("break_even", symbol, ticket_id, lambda position: (position.price_open, position.tp))
+
+
+    #break even / trailing stop over every position
+    def update_stops(self, symbol = None, group = None, magic = None, comment = None, break_even_trigger = None, break_even_offset = 0,
+                     trail_distance = None, trail_start = None, trail_step = 0, max_workers = 8):
+        """
+        Move the stop loss of every matching position that needs it, from one positions
+        snapshot and one tick per symbol. Only requests that change a stop are sent.
+
+        Parameters:
+            symbol, group, magic, comment: only positions matching these filters
+            break_even_trigger: profit in points after which SL moves to the open price, None disables break even
+            break_even_offset: points of profit locked in by break even
+            trail_distance: trailing stop distance in points, None disables trailing
+            trail_start: profit in points before trailing starts (trail_distance by default)
+            trail_step: minimum move in points of the trailing stop
+            max_workers: maximum number of requests in flight
+
+        Returns:
+            A BulkReport with one ExecutionReport per modified position
+
+            """
+
+        positions = self.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+        names = {position.symbol for position in positions}
+        ticks = {name: self._tick(name) for name in names}
+        symbols = {name: self.symbols.get(name) for name in names}
+        updates = plan_stops(positions, ticks, {name: meta for name, meta in symbols.items() if meta is not None},
+                             break_even_trigger, break_even_offset, trail_distance, trail_start, trail_step)
+
+        self._log("Stops to update = {} of {} positions", len(updates), len(positions))
+        requests = [self._sltp_request(update, update.sl, update.tp) for update in updates]
+        by_ticket = {position.ticket: position for position in positions}
+        return self._dispatch("update_stops", requests, max_workers, positions = [by_ticket[update.ticket] for update in updates])
+
+
+    #modify SL/TP of a position by ticket, or of every position on a symbol
+    def _modify(self, op, symbol, ticket_id, stops):
         
-        if self.ticket != None: 
-            # prepare the request
-            positions=mt5.positions_get(ticket = self.ticket)
+        if ticket_id is not None: 
+            positions = self.positions_snapshot(ticket = ticket_id)
             if len(positions) == 0:
-                print(f"No positions with position_id {self.ticket}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions)>0:
-                #print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    request = {
-                    "action": mt5.TRADE_ACTION_SLTP,
-                    "symbol": position.symbol,
-                    "position": position.ticket,
-                    "sl": position.price_open,
-                    "comment": self.comment,
-                    "type_time":self.type_time,
-                    "type_filling": self.type_filling,
-                }
-                    
-                # send a trading request
-                result = mt5.order_send(request)
-                # check the execution result
-                print ("order sending")
-                
-                if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                    print(" - order_send failed, retcode={}".format(result.retcode))
-
-                    # request the result as a dictionary and display it element by element
-                    result_dict=result._asdict()
-                    for field in result_dict.keys():
-                        print("   {}={}".format(field,result_dict[field]))
-                        # if this is a trading request structure, display it element by element as well
-                        if field=="request":
-                            traderequest_dict=result_dict[field]._asdict()
-                            for tradereq_filed in traderequest_dict:
-                                print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-                else:
-                    print(f"Order Sent! {result.order}")
+                self._log("No positions with position_id {}, error code={}", ticket_id, self.mt5.last_error())
+                return None
+            return self._send(op, self._sltp_request(positions[0], *stops(positions[0])), position = positions[0])
         
-        elif symbol != None: 
-        
-            # prepare the request
-            
-            positions=mt5.positions_get(symbol = self.symbol)
+        elif symbol is not None: 
+            #get symbol info (cached, see SymbolCache)
+            if self._check_symbol(symbol) is None:
+                return None
+
+            positions = self.positions_snapshot(symbol = symbol)
             if len(positions) == 0:
-                print(f"No positions on {self.symbol}, error code={mt5.last_error()}")
-                pass
-            
-            elif len(positions)>0:
-                #print(f"Total positions on {self.symbol} =",len(positions))
-                # display all open positions
-                for position in positions:
-                    request = {
-                    "action": mt5.TRADE_ACTION_SLTP,
-                    "symbol": symbol,
-                    "position": position.ticket,
-                    "sl": position.price_open,
-                    "comment": self.comment,
-                    "type_time":self.type_time,
-                    "type_filling": self.type_filling,
-                }
-                    
-                # send a trading request
-                result = mt5.order_send(request)
-                # check the execution result
-                print ("order sending")
-                
-                if result.retcode != mt5.TRADE_RETCODE_DONE or result.retcode == None:
-                    print(" - order_send failed, retcode={}".format(result.retcode))
-
-                    # request the result as a dictionary and display it element by element
-                    result_dict=result._asdict()
-                    for field in result_dict.keys():
-                        print("   {}={}".format(field,result_dict[field]))
-                        # if this is a trading request structure, display it element by element as well
-                        if field=="request":
-                            traderequest_dict=result_dict[field]._asdict()
-                            for tradereq_filed in traderequest_dict:
-                                print("       traderequest: {}={}".format(tradereq_filed,traderequest_dict[tradereq_filed]))
-                else:
-                    print(f"Order Sent! {result.order}")
-        
\ No newline at end of file
+                self._log("No positions on {}, error code={}", symbol, self.mt5.last_error())
+                return None
+
+            self._log("Total positions on {} = {}", symbol, len(positions))
+            requests = [self._sltp_request(position, *stops(position)) for position in positions]
+            return self._dispatch(op, requests, max_workers = 1, positions = positions)
+
+
+    def _sltp_request(self, position, sl, tp):
+        return {
+            "action": self.mt5.TRADE_ACTION_SLTP,
+            "symbol": position.symbol,
+            "position": position.ticket,
+            "sl": sl,
+            "tp": tp,
+            "comment": self.comment,
+            "type_time": self.type_time,
+            "type_filling": self.type_filling,
+        }
+
+
+    #validate a request, send it (retrying it when it can be repriced) and report the outcome
+    def _send(self, op, request, emit = True, reprice = None, position = None, checked = False):
+        report = None
+        if self.validator is not None and not checked:
+            try:
+                request = self.validator.check(request, position)
+            except Rejection as e:
+                report = rejection_report(op, request, e.retcode, e.reason)
+
+        if report is None:
+            if self.retry is not None and reprice is not None:
+                if self.validator is not None:
+                    reprice = self._validated_reprice(reprice, position)
+                report = send_with_retry(lambda request: self._send_once(op, request), request, self.retry, reprice)
+            else:
+                report = self._send_once(op, request)
+        if emit:
+            self._emit(report)
+        return report
+
+
+    #report a request that could not be built or sent
+    def _reject(self, op, request, rejection):
+        report = rejection_report(op, request, rejection.retcode, rejection.reason)
+        self._emit(report)
+        return report
+
+
+    #repriced retries are normalized again (local checks only), a rejection ends the retries
+    def _validated_reprice(self, reprice, position):
+        def validated(request):
+            request = reprice(request)
+            if request is None:
+                return None
+            try:
+                return self.validator.check(request, position, order_check = False)
+            except Rejection:
+                return None
+        return validated
+
+
+    def _send_once(self, op, request):
+        sent_at = time.time()
+        start = time.perf_counter()
+        result = self.mt5.order_send(request)
+        elapsed = time.perf_counter() - start
+        error = self.mt5.last_error() if result is None else None
+        return execution_report(op, request, result, sent_at, elapsed, error)
+
+
+    #close request at the freshest price (a buy is closed at bid, a sell at ask)
+    def _reprice_close(self, request):
+        tick = self.mt5.symbol_info_tick(request["symbol"])
+        if tick is None:
+            return None
+        request = request.copy()
+        request["price"] = tick.bid if request["type"] == self.mt5.ORDER_TYPE_SELL else tick.ask
+        return request
+
+
+    #send many requests through the bulk engine, reporting them in order once all are done
+    #op is one operation name, or one per request; rejected maps indexes to Rejections found while building
+    def _dispatch(self, op, requests, max_workers = 8, reprice = None, positions = None, rejected = None):
+        ops = op if isinstance(op, list) else [op] * len(requests)
+        positions = positions or [None] * len(requests)
+        if self.validator is None:
+            checked = list(requests)
+        else:
+            # validated up front, so order_check calls run as one batch before anything is sent
+            checked = self.validator.check_many(requests, positions)
+        for i, rejection in (rejected or {}).items():
+            checked[i] = rejection
+
+        def send(i):
+            if isinstance(checked[i], Rejection):
+                return rejection_report(ops[i], requests[i], checked[i].retcode, checked[i].reason)
+            return self._send(ops[i], checked[i], emit = False, reprice = reprice, position = positions[i], checked = True)
+
+        report = dispatch(send, list(range(len(requests))), max_workers = max_workers)
+        for result in report:
+            self._emit(result)
+        return report
+
+
+    def _emit(self, report):
+        if not self.quiet:
+            print_report(report)
+        for listener in self._listeners:
+            listener(report)
+
+
+    #print a message unless quiet, formatting it only when it is printed
+    def _log(self, message, *args):
+        if not self.quiet:
+            print(message.format(*args) if args else message)
@@ -0,0 +1,172 @@
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from MT5pytrader import constants
+from MT5pytrader.simulator import SimulatedTerminal, Tick
+
+
+#outcome of TickReplay.run()
+ReplayResult = namedtuple("ReplayResult", [
+    "ticks",                #ticks replayed
+    "elapsed",              #wall seconds of the run
+    "ticks_per_second",
+    "simulated_seconds",    #time span of the replayed ticks
+    "speedup",              #simulated_seconds / elapsed, i.e times realtime
+    "trader",
+    "terminal",
+])
+
+
+class SimulatedClock:
+    """
+    Clock of a replay, set from the tick times. Call it for the current time in seconds.
+    """
+
+    def __init__(self, now = 0.0):
+        self.now = now
+
+    def __repr__(self):
+        return f"SimulatedClock({self.now})"
+
+    def __call__(self):
+        return self.now
+
+
+class TickReplay:
+    """
+    Run strategy code written against Trader on recorded ticks, faster than realtime.
+
+    Ticks of every symbol are merged by time and pushed, one at a time, into a
+    SimulatedTerminal whose clock follows the tick times. Each tick resolves SL/TP
+    and pending orders (at tick level) before the strategy sees it; the strategy then
+    trades through an ordinary Trader (open_buy, close_sell, modify_sl, ...).
+
+    Functions:
+        TickReplay.run() - Replay every tick, returns a ReplayResult (throughput in ticks/second)
+        TickReplay.stop() - Stop the replay after the current tick (e.g from the strategy)
+
+    Parameters:
+        ticks: dict of symbol: tick array with time_msc, bid and ask fields (e.g from
+            copy_ticks_range, load_ticks() or ticks_from_terminal())
+        strategy: callable(trader, symbol, tick), or an object with on_tick(trader, symbol, tick)
+            and optionally on_start(trader) / on_finish(trader). tick is a Tick namedtuple
+        terminal: SimulatedTerminal to replay into (symbols are created if missing), a new one if None
+        trader_kwargs: extra Trader arguments (magic, deviation, retry, ...)
+        tick_history: keep the replayed ticks in the terminal for copy_ticks_* (memory grows with the replay)
+
+    TickReplay.trader and TickReplay.terminal are available before run(), e.g to set up symbols.
+
+        """
+
+    def __init__(self, ticks, strategy, terminal = None, trader_kwargs = None, tick_history = False):
+        from MT5pytrader.pytrader import Trader
+
+        self.clock = SimulatedClock()
+        if terminal is None:
+            terminal = SimulatedTerminal(clock = self.clock)
+        else:
+            terminal.clock = self.clock
+        terminal.record_ticks = tick_history
+        self.terminal = terminal
+        self.ticks = {symbol: _prepare(array) for symbol, array in ticks.items()}
+        for symbol, array in self.ticks.items():
+            if terminal.symbol_info(symbol) is None:
+                terminal.add_symbol(symbol, bid = float(array["bid"][0]) if len(array) else 1.0)
+        self.strategy = strategy
+        self.trader = Trader(backend = terminal, quiet = True, **(trader_kwargs or {}))
+        self._stopped = False
+
+    def __repr__(self):
+        return f"TickReplay({list(self.ticks)}, {sum(len(array) for array in self.ticks.values())} ticks)"
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self):
+        """
+        Returns:
+            ReplayResult
+
+            """
+
+        symbols = list(self.ticks)
+        times = np.concatenate([self.ticks[symbol]["time_msc"] for symbol in symbols])
+        order = np.argsort(times, kind = "stable")
+        symbol_ids = np.repeat(np.arange(len(symbols)), [len(self.ticks[symbol]) for symbol in symbols])[order].tolist()
+        time_msc = times[order].tolist()
+        bid = np.concatenate([self.ticks[symbol]["bid"] for symbol in symbols])[order].tolist()
+        ask = np.concatenate([self.ticks[symbol]["ask"] for symbol in symbols])[order].tolist()
+
+        strategy = self.strategy
+        on_tick = getattr(strategy, "on_tick", strategy)
+        trader, clock, set_tick = self.trader, self.clock, self.terminal.set_tick
+        flags = constants.TICK_FLAG_BID | constants.TICK_FLAG_ASK
+        self._stopped = False
+
+        if time_msc:
+            clock.now = time_msc[0] / 1000
+        if hasattr(strategy, "on_start"):
+            strategy.on_start(trader)
+        start = time.perf_counter()
+        n = 0
+        for symbol_id, msc, b, a in zip(symbol_ids, time_msc, bid, ask):
+            clock.now = msc / 1000
+            symbol = symbols[symbol_id]
+            set_tick(symbol, b, a, msc)
+            n += 1
+            on_tick(trader, symbol, Tick(msc // 1000, b, a, 0.0, 0, msc, flags, 0.0))
+            if self._stopped:
+                break
+        if hasattr(strategy, "on_finish"):
+            strategy.on_finish(trader)
+        elapsed = time.perf_counter() - start
+
+        simulated = (time_msc[n - 1] - time_msc[0]) / 1000 if n else 0.0
+        return ReplayResult(n, elapsed, n / elapsed if elapsed else 0.0, simulated,
+                            simulated / elapsed if elapsed else 0.0, trader, self.terminal)
+
+
+def _prepare(ticks):
+    #time_msc/bid/ask columns, zero bids/asks (last-only ticks) carried forward from the previous tick
+    if "time_msc" not in ticks.dtype.names:
+        time_msc = ticks["time"].astype(np.int64) * 1000
+    else:
+        time_msc = ticks["time_msc"].astype(np.int64)
+    prepared = np.zeros(len(ticks), dtype = [("time_msc", "<i8"), ("bid", "<f8"), ("ask", "<f8")])
+    prepared["time_msc"] = time_msc
+    for field in ("bid", "ask"):
+        values = np.asarray(ticks[field], dtype = np.float64)
+        index = np.where(values > 0, np.arange(len(values)), 0)
+        np.maximum.accumulate(index, out = index)
+        prepared[field] = values[index]
+    keep = (prepared["bid"] > 0) & (prepared["ask"] > 0)
+    return prepared[keep]
+
+
+def load_ticks(path):
+    """
+    Load ticks from a file: .npy (a copy_ticks_* array saved with np.save, memory-mapped)
+    or .csv with a header holding time_msc (or time, epoch seconds), bid and ask columns.
+    """
+
+    if os.path.splitext(path)[1].lower() == ".npy":
+        return np.load(path, mmap_mode = "r")
+    ticks = np.genfromtxt(path, delimiter = ",", names = True, dtype = None, encoding = "utf-8")
+    return np.atleast_1d(ticks)
+
+
+def ticks_from_terminal(terminal, symbols, date_from, date_to, flags = constants.COPY_TICKS_ALL):
+    """
+    Ticks of several symbols from a terminal's copy_ticks_range, as a dict for TickReplay.
+    Symbols the terminal returns nothing for are left out.
+    """
+
+    ticks = {}
+    for symbol in symbols:
+        array = terminal.copy_ticks_range(symbol, date_from, date_to, flags)
+        if array is not None and len(array):
+            ticks[symbol] = array
+    return ticks
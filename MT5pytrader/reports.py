@@ -0,0 +1,139 @@
+import time
+from collections import namedtuple
+
+from MT5pytrader import constants
+
+
+#outcome of one order_send, returned by every Trader order/close/modify method
+ExecutionReport = namedtuple("ExecutionReport", [
+    "op",               #Trader operation, e.g "open_buy", "close", "modify_sl"
+    "symbol",
+    "position",         #position ticket the request acted on (0 for new orders)
+    "order",            #order ticket from the result
+    "deal",             #deal ticket from the result
+    "retcode",          #trade server return code, None if order_send returned None
+    "ok",               #True if the request was executed/placed
+    "comment",          #trade server comment (or last_error() if order_send returned None)
+    "volume_requested",
+    "volume",           #filled volume
+    "price_requested",
+    "price",            #fill price
+    "sl",
+    "tp",
+    "time",             #epoch seconds when the request was sent
+    "elapsed",          #seconds spent in order_send
+    "request",          #the request dict
+    "result",           #the raw OrderSendResult (None if order_send returned None)
+    "attempts",         #order_send calls made for this order (see RetryPolicy)
+    "total_elapsed",    #seconds spent on the order, retries and waits included
+], defaults = (1, None))
+
+OK_RETCODES = frozenset((
+    constants.TRADE_RETCODE_DONE,
+    constants.TRADE_RETCODE_PLACED,
+    constants.TRADE_RETCODE_DONE_PARTIAL,
+))
+
+#headline of each operation when reports are printed
+_LABELS = {
+    "open_buy": "SENDING ORDER: BUY",
+    "open_sell": "SENDING ORDER: SELL",
+    "open_buy_limit": "SENDING ORDER: BUY LIMIT",
+    "open_sell_limit": "SENDING ORDER: SELL LIMIT",
+    "open_buy_stop": "SENDING ORDER: BUY STOP",
+    "open_sell_stop": "SENDING ORDER: SELL STOP",
+}
+
+
+def execution_report(op, request, result, sent_at, elapsed, error = None):
+    """
+    Build an ExecutionReport from a request and its OrderSendResult.
+
+    Parameters:
+        op: Trader operation name
+        request: request dict sent
+        result: OrderSendResult, or None
+        sent_at: epoch seconds when the request was sent
+        elapsed: seconds spent in order_send
+        error: last_error() to record when result is None
+
+    Returns:
+        ExecutionReport
+
+        """
+
+    get = request.get
+    if result is None:
+        return ExecutionReport(op, get("symbol"), get("position", 0), 0, 0, None, False, str(error),
+                               get("volume", 0.0), 0.0, get("price", 0.0), 0.0, get("sl", 0.0), get("tp", 0.0),
+                               sent_at, elapsed, request, None, 1, elapsed)
+    return ExecutionReport(op, get("symbol"), get("position", 0), result.order, result.deal, result.retcode,
+                           result.retcode in OK_RETCODES, result.comment, get("volume", 0.0), result.volume,
+                           get("price", 0.0), result.price, get("sl", 0.0), get("tp", 0.0),
+                           sent_at, elapsed, request, result, 1, elapsed)
+
+
+def rejection_report(op, request, retcode, reason):
+    """
+    ExecutionReport of a request rejected before it was sent (attempts is 0).
+    """
+
+    get = request.get
+    return ExecutionReport(op, get("symbol"), get("position", 0), 0, 0, retcode, False, "rejected locally: " + reason,
+                           get("volume", 0.0), 0.0, get("price", 0.0), 0.0, get("sl", 0.0), get("tp", 0.0),
+                           time.time(), 0.0, request, None, 0, 0.0)
+
+
+def format_report(report):
+    """
+    Human readable text of a report, in the format Trader has always printed.
+    """
+
+    request = report.request
+    label = _LABELS.get(report.op)
+    if label is not None:
+        lines = ["{} {} {} lots at {} with deviation={} points".format(
+            label, report.symbol, report.volume_requested, report.price_requested, request.get("deviation"))]
+    elif report.op == "close":
+        lines = ["close position #{}: {} {} lots at {} with deviation={} points".format(
+            report.position, report.symbol, report.volume_requested, report.price_requested, request.get("deviation"))]
+    elif report.op == "cancel_order":
+        lines = ["cancel order #{}: {}".format(request.get("order"), report.symbol)]
+    else:
+        lines = ["{} position #{}: {} sl={} tp={}".format(report.op, report.position, report.symbol, report.sl, report.tp)]
+
+    if report.attempts > 1:
+        lines.append("{} attempts in {:.1f}ms".format(report.attempts, report.total_elapsed * 1000))
+
+    if report.ok:
+        if report.op == "close":
+            lines.append("position #{} closed in {:.1f}ms".format(report.position, report.elapsed * 1000))
+        elif report.op == "cancel_order":
+            lines.append("order #{} cancelled in {:.1f}ms".format(request.get("order"), report.elapsed * 1000))
+        else:
+            lines.append(f"Order Sent! {report.order}")
+        return "\n".join(lines)
+
+    if report.attempts == 0:
+        lines.append(" - {}, retcode={}".format(report.comment, report.retcode))
+        return "\n".join(lines)
+
+    lines.append(" - order_send failed, retcode={}".format(report.retcode))
+    if report.result is None:
+        lines.append("   error={}".format(report.comment))
+        return "\n".join(lines)
+
+    # request the result as a dictionary and display it element by element
+    result_dict = report.result._asdict()
+    for field in result_dict.keys():
+        lines.append("   {}={}".format(field, result_dict[field]))
+        # if this is a trading request structure, display it element by element as well
+        if field == "request" and hasattr(result_dict[field], "_asdict"):
+            traderequest_dict = result_dict[field]._asdict()
+            for tradereq_field in traderequest_dict:
+                lines.append("       traderequest: {}={}".format(tradereq_field, traderequest_dict[tradereq_field]))
+    return "\n".join(lines)
+
+
+def print_report(report):
+    print(format_report(report))
@@ -0,0 +1,92 @@
+import time
+
+from MT5pytrader import constants
+
+
+#what to do when order_send answers with a retcode
+REPRICE = "reprice"     #resend at once at the freshest price
+BACKOFF = "backoff"     #wait (growing delay), then resend at the freshest price
+FAIL = "fail"           #give up
+
+#only retcodes meaning the request was not executed. TIMEOUT and CONNECTION are left out:
+#the order may have been filled on the server, and resending it could fill it twice
+DEFAULT_ACTIONS = {
+    constants.TRADE_RETCODE_REQUOTE: REPRICE,
+    constants.TRADE_RETCODE_PRICE_CHANGED: REPRICE,
+    constants.TRADE_RETCODE_PRICE_OFF: BACKOFF,
+    constants.TRADE_RETCODE_TOO_MANY_REQUESTS: BACKOFF,
+}
+
+
+class RetryPolicy:
+    """
+    Per-retcode retry policy of an order, bounded by attempts and time.
+
+    Parameters:
+        actions: dict of retcode: REPRICE, BACKOFF or FAIL, merged over DEFAULT_ACTIONS
+            (retcodes not listed fail; None is the retcode of an order_send that returned None)
+        max_attempts: maximum number of order_send calls per order
+        budget: seconds an order may spend in retries, a retry that would end after it is not made
+        backoff: first BACKOFF delay in seconds
+        backoff_factor: growth of the delay after each BACKOFF
+        max_backoff: longest BACKOFF delay
+
+        """
+
+    def __init__(self, actions = None, max_attempts = 5, budget = 1.0, backoff = 0.05, backoff_factor = 2.0, max_backoff = 0.5):
+        self.actions = dict(DEFAULT_ACTIONS)
+        if actions:
+            self.actions.update(actions)
+        self.max_attempts = max_attempts
+        self.budget = budget
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+    def __repr__(self):
+        return f"RetryPolicy(max_attempts={self.max_attempts}, budget={self.budget})"
+
+    def action(self, retcode):
+        return self.actions.get(retcode, FAIL)
+
+
+def send_with_retry(send, request, policy, reprice = None, sleep = time.sleep, clock = time.perf_counter):
+    """
+    Send a request, retrying as the policy says.
+
+    Parameters:
+        send: callable sending one request and returning its ExecutionReport
+        request: request dict
+        policy: RetryPolicy
+        reprice: callable(request) returning the request to resend (priced from the freshest tick),
+            or None to give up. Without it the same request is resent
+        sleep, clock: time functions, for tests
+
+    Returns:
+        ExecutionReport of the last attempt, with attempts and total_elapsed set
+
+        """
+
+    start = clock()
+    delay = policy.backoff
+    attempts = 0
+    while True:
+        attempts += 1
+        report = send(request)
+        if report.ok or attempts >= policy.max_attempts:
+            break
+        action = policy.action(report.retcode)
+        if action == FAIL:
+            break
+        wait = 0.0
+        if action == BACKOFF:
+            wait, delay = delay, min(delay * policy.backoff_factor, policy.max_backoff)
+        if clock() - start + wait > policy.budget:
+            break
+        if wait:
+            sleep(wait)
+        if reprice is not None:
+            request = reprice(request)
+            if request is None:
+                break
+    return report._replace(attempts = attempts, total_elapsed = clock() - start)
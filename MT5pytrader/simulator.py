@@ -0,0 +1,690 @@
+import bisect
+import fnmatch
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+
+from MT5pytrader import constants as c
+from MT5pytrader.backends import Backend
+
+
+#records returned by the simulator, with the field names of the MetaTrader5 package
+SymbolInfo = namedtuple("SymbolInfo", [
+    "name", "description", "path", "point", "digits", "spread", "bid", "ask", "visible", "select",
+    "trade_mode", "trade_exemode", "trade_stops_level", "trade_freeze_level", "trade_contract_size",
+    "trade_tick_size", "trade_tick_value", "volume_min", "volume_max", "volume_step",
+])
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real"])
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic", "identifier",
+    "reason", "volume", "price_open", "sl", "tp", "price_current", "swap", "profit", "symbol",
+    "comment", "external_id",
+])
+TradeOrder = namedtuple("TradeOrder", [
+    "ticket", "time_setup", "time_setup_msc", "time_done", "time_done_msc", "time_expiration", "type",
+    "type_time", "type_filling", "state", "magic", "position_id", "position_by_id", "reason",
+    "volume_initial", "volume_current", "price_open", "sl", "tp", "price_current", "price_stoplimit",
+    "symbol", "comment", "external_id",
+])
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id", "reason", "volume",
+    "price", "commission", "swap", "profit", "fee", "symbol", "comment", "external_id",
+])
+TradeRequest = namedtuple("TradeRequest", [
+    "action", "magic", "order", "symbol", "volume", "price", "stoplimit", "sl", "tp", "deviation",
+    "type", "type_filling", "type_time", "expiration", "comment", "position", "position_by",
+])
+OrderSendResult = namedtuple("OrderSendResult", [
+    "retcode", "deal", "order", "volume", "price", "bid", "ask", "comment", "request_id",
+    "retcode_external", "request",
+])
+#dtype of the arrays returned by copy_ticks_* in the MetaTrader5 package
+MT5_TICK_DTYPE = [("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+                  ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8")]
+#dtype of the arrays returned by copy_rates_* in the MetaTrader5 package
+MT5_RATES_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                   ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+OrderCheckResult = namedtuple("OrderCheckResult", [
+    "retcode", "balance", "equity", "profit", "margin", "margin_free", "margin_level", "comment", "request",
+])
+AccountInfo = namedtuple("AccountInfo", ["login", "server", "currency", "balance", "equity", "profit"])
+
+_EMPTY_REQUEST = TradeRequest(0, 0, 0, "", 0.0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0, 0, "", 0, 0)
+
+
+def match_group(name, group):
+    """
+    Check a symbol name against a MetaTrader group mask, e.g "*USD*,!EUR*".
+    Comma separated patterns, "!" excludes. A name matches if it matches an
+    include pattern (or there are only excludes) and no exclude pattern.
+    """
+
+    if group is None:
+        return True
+    patterns = [pattern.strip() for pattern in group.split(",") if pattern.strip()]
+    includes = [pattern for pattern in patterns if not pattern.startswith("!")]
+    excludes = [pattern[1:] for pattern in patterns if pattern.startswith("!")]
+    if any(fnmatch.fnmatchcase(name, pattern) for pattern in excludes):
+        return False
+    return not includes or any(fnmatch.fnmatchcase(name, pattern) for pattern in includes)
+
+
+class _Symbol:
+    #mutable symbol state kept by the simulator
+
+    def __init__(self, name, bid, spread, point, digits, volume_min, volume_max, volume_step,
+                 stops_level, freeze_level, trade_mode, contract_size, visible):
+        self.name = name
+        self.point = point
+        self.digits = digits
+        self.spread = spread
+        self.volume_min = volume_min
+        self.volume_max = volume_max
+        self.volume_step = volume_step
+        self.stops_level = stops_level
+        self.freeze_level = freeze_level
+        self.trade_mode = trade_mode
+        self.contract_size = contract_size
+        self.visible = visible
+        self.bid = bid
+        self.ask = round(bid + spread * point, digits)
+        self.time_msc = 0
+        self.ticks = []      #tick history, as rows of MT5_TICK_DTYPE
+        self.tick_times = [] #time_msc of each row, for bisect
+
+
+class SimulatedTerminal(Backend):
+    """
+    Deterministic in-memory stand-in for the MetaTrader5 terminal.
+    Implements the Backend calls (plus positions_total, orders_get, orders_total,
+    account_info, history_deals_get, order_check, copy_ticks_* and copy_rates_*) on local state
+    so Trader runs unchanged without a terminal.
+
+    Prices only move when set_tick() is called, bars only exist once loaded with add_rates(). Each new tick triggers SL/TP of open
+    positions and activates pending orders, at tick level. Profit is computed as
+    price difference * volume * contract size (in the symbol's quote currency).
+
+    Parameters:
+        symbols: iterable of symbol names to create with default settings (see add_symbol)
+        latency: seconds added to every call, or a dict of {call name: seconds}
+        requote_rate: probability (0..1) that a market deal is answered with TRADE_RETCODE_REQUOTE
+        slippage: points a market deal is filled away from the current price (against the trader)
+        seed: seed of the random generator used for requotes
+        clock: callable returning the current time in seconds, time.time by default
+        balance: starting account balance
+
+    Attributes:
+        calls: Counter of calls made per function name
+        deals: list of TradeDeal executed so far
+        record_ticks: False to stop keeping the tick history served by copy_ticks_* (long replays)
+
+        """
+
+    def __init__(self, symbols = (), latency = 0.0, requote_rate = 0.0, slippage = 0, seed = 0, clock = None, balance = 10000.0):
+        self.latency = latency
+        self.requote_rate = requote_rate
+        self.slippage = slippage
+        self.clock = clock or time.time
+        self.balance = balance
+        self.calls = Counter()
+        self.deals = []
+        self.account = 0
+        self.server = ""
+        self.connected = False
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._symbols = {}
+        self._positions = {} #ticket -> dict of position fields
+        self._orders = {}    #ticket -> dict of pending order fields
+        self._rates = {}     #(symbol, timeframe) -> bars sorted by time, MT5_RATES_DTYPE
+        self.record_ticks = True
+        self._next_ticket = 1
+        self._error = (c.RES_S_OK, "Success")
+        for name in symbols:
+            self.add_symbol(name)
+
+    def __repr__(self):
+        return f"SimulatedTerminal({len(self._symbols)} symbols, {len(self._positions)} positions)"
+
+    #--- simulator controls ---
+
+    def add_symbol(self, name, bid = 1.0, spread = 10, point = 0.00001, digits = 5, volume_min = 0.01,
+                   volume_max = 100.0, volume_step = 0.01, stops_level = 0, freeze_level = 0,
+                   trade_mode = c.SYMBOL_TRADE_MODE_FULL, contract_size = 100000.0, visible = True):
+        """
+        Create (or replace) a symbol.
+
+        Parameters:
+            name: symbol name
+            bid: initial bid, ask is bid + spread * point
+            spread: spread in points
+            point, digits: price resolution
+            volume_min, volume_max, volume_step: volume constraints
+            stops_level, freeze_level: minimum distance in points of SL/TP and of modifications
+            trade_mode: SYMBOL_TRADE_MODE_*
+            contract_size: units per lot, used to compute profit
+            visible: whether the symbol starts in MarketWatch
+
+            """
+
+        with self._lock:
+            sym = self._symbols[name] = _Symbol(name, bid, spread, point, digits, volume_min, volume_max, volume_step,
+                                                stops_level, freeze_level, trade_mode, contract_size, visible)
+            sym.time_msc = int(self.clock() * 1000)
+            self._record_tick(sym)
+
+    def set_tick(self, symbol, bid, ask = None, time_msc = None):
+        """
+        Move the price of a symbol, then resolve SL/TP and pending orders against it.
+
+        Parameters:
+            symbol: symbol name
+            bid: new bid
+            ask: new ask, bid + spread by default
+            time_msc: tick time in milliseconds, the clock by default
+
+            """
+
+        with self._lock:
+            sym = self._symbols[symbol]
+            sym.bid = bid
+            sym.ask = round(bid + sym.spread * sym.point, sym.digits) if ask is None else ask
+            sym.time_msc = int(self.clock() * 1000) if time_msc is None else time_msc
+            self._record_tick(sym)
+            self._trigger(sym)
+
+    def add_rates(self, symbol, timeframe, rates):
+        """
+        Load bar history of a symbol, served by copy_rates_*.
+        Bars at times already loaded replace the old ones (e.g the forming bar).
+
+        Parameters:
+            symbol: symbol name, must exist
+            timeframe: TIMEFRAME_* constant
+            rates: structured array with the fields of MT5_RATES_DTYPE (missing fields are 0)
+
+            """
+
+        import numpy as np
+        bars = np.zeros(len(rates), dtype = MT5_RATES_DTYPE)
+        for name in bars.dtype.names:
+            if name in rates.dtype.names:
+                bars[name] = rates[name]
+        with self._lock:
+            if symbol not in self._symbols:
+                raise KeyError(symbol)
+            old = self._rates.get((symbol, timeframe))
+            if old is not None and len(old):
+                bars = np.concatenate([old[~np.isin(old["time"], bars["time"])], bars])
+            self._rates[(symbol, timeframe)] = bars[np.argsort(bars["time"], kind = "stable")]
+
+    #--- terminal calls ---
+
+    def initialize(self, path = None, login = None, password = None, server = None, timeout = None, portable = False):
+        self._call("initialize")
+        self.connected = True
+        if login is not None:
+            return self.login(login, password = password, server = server)
+        return True
+
+    def login(self, login, password = None, server = None, timeout = None):
+        self._call("login")
+        self.account = login
+        self.server = server or ""
+        return True
+
+    def shutdown(self):
+        self._call("shutdown")
+        self.connected = False
+
+    def last_error(self):
+        return self._error
+
+    def account_info(self):
+        self._call("account_info")
+        with self._lock:
+            profit = sum(self._position(p).profit for p in self._positions.values())
+            return AccountInfo(self.account, self.server, "USD", self.balance, self.balance + profit, profit)
+
+    def symbol_info(self, symbol):
+        self._call("symbol_info")
+        sym = self._symbols.get(symbol)
+        if sym is None:
+            self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+            return None
+        return self._symbol(sym)
+
+    def symbol_info_tick(self, symbol):
+        self._call("symbol_info_tick")
+        sym = self._symbols.get(symbol)
+        if sym is None:
+            self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+            return None
+        return Tick(sym.time_msc // 1000, sym.bid, sym.ask, 0.0, 0, sym.time_msc, c.TICK_FLAG_BID | c.TICK_FLAG_ASK, 0.0)
+
+    def symbol_select(self, symbol, enable = True):
+        self._call("symbol_select")
+        sym = self._symbols.get(symbol)
+        if sym is None:
+            self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+            return False
+        sym.visible = bool(enable)
+        return True
+
+    def symbols_total(self):
+        self._call("symbols_total")
+        return len(self._symbols)
+
+    def symbols_get(self, group = None):
+        self._call("symbols_get")
+        with self._lock:
+            return tuple(self._symbol(sym) for sym in self._symbols.values() if match_group(sym.name, group))
+
+    def copy_ticks_from(self, symbol, date_from, count, flags = c.COPY_TICKS_ALL):
+        self._call("copy_ticks_from")
+        with self._lock:
+            sym = self._symbols.get(symbol)
+            if sym is None:
+                self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+                return None
+            start = bisect.bisect_left(sym.tick_times, int(_seconds(date_from) * 1000))
+            return self._tick_array(sym.ticks[start:start + count])
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags = c.COPY_TICKS_ALL):
+        self._call("copy_ticks_range")
+        with self._lock:
+            sym = self._symbols.get(symbol)
+            if sym is None:
+                self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+                return None
+            start = bisect.bisect_left(sym.tick_times, int(_seconds(date_from) * 1000))
+            end = bisect.bisect_right(sym.tick_times, int(_seconds(date_to) * 1000))
+            return self._tick_array(sym.ticks[start:end])
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        self._call("copy_rates_from")
+        bars = self._bars(symbol, timeframe)
+        if bars is None:
+            return None
+        end = bars["time"].searchsorted(int(_seconds(date_from)), side = "right")
+        return bars[max(0, end - count):end].copy()
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self._call("copy_rates_from_pos")
+        bars = self._bars(symbol, timeframe)
+        if bars is None:
+            return None
+        #position 0 is the current (last) bar
+        end = max(0, len(bars) - start_pos)
+        return bars[max(0, end - count):end].copy()
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        self._call("copy_rates_range")
+        bars = self._bars(symbol, timeframe)
+        if bars is None:
+            return None
+        start = bars["time"].searchsorted(int(_seconds(date_from)), side = "left")
+        end = bars["time"].searchsorted(int(_seconds(date_to)), side = "right")
+        return bars[start:end].copy()
+
+    def positions_total(self):
+        self._call("positions_total")
+        return len(self._positions)
+
+    def positions_get(self, symbol = None, group = None, ticket = None):
+        self._call("positions_get")
+        with self._lock:
+            if ticket is not None:
+                position = self._positions.get(ticket)
+                return () if position is None else (self._position(position),)
+            return tuple(self._position(p) for p in self._positions.values()
+                         if (symbol is None or p["symbol"] == symbol) and match_group(p["symbol"], group))
+
+    def orders_total(self):
+        self._call("orders_total")
+        return len(self._orders)
+
+    def orders_get(self, symbol = None, group = None, ticket = None):
+        self._call("orders_get")
+        with self._lock:
+            if ticket is not None:
+                order = self._orders.get(ticket)
+                return () if order is None else (self._order(order),)
+            return tuple(self._order(o) for o in self._orders.values()
+                         if (symbol is None or o["symbol"] == symbol) and match_group(o["symbol"], group))
+
+    def history_deals_get(self, date_from = None, date_to = None, group = None, ticket = None, position = None):
+        self._call("history_deals_get")
+        with self._lock:
+            return tuple(deal for deal in self.deals
+                         if (ticket is None or deal.order == ticket)
+                         and (position is None or deal.position_id == position)
+                         and (date_from is None or deal.time >= _seconds(date_from))
+                         and (date_to is None or deal.time <= _seconds(date_to))
+                         and match_group(deal.symbol, group))
+
+    def order_send(self, request):
+        self._call("order_send")
+        fields = {name: value for name, value in request.items() if name in TradeRequest._fields}
+        req = _EMPTY_REQUEST._replace(**fields)
+        with self._lock:
+            if req.action == c.TRADE_ACTION_DEAL:
+                return self._deal(req)
+            if req.action == c.TRADE_ACTION_SLTP:
+                return self._sltp(req)
+            if req.action == c.TRADE_ACTION_PENDING:
+                return self._pending(req)
+            if req.action == c.TRADE_ACTION_MODIFY:
+                return self._modify_order(req)
+            if req.action == c.TRADE_ACTION_REMOVE:
+                return self._remove_order(req)
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+
+    def order_check(self, request):
+        """
+        Check a market or pending order without sending it. retcode is 0 when it would be accepted
+        (margin is not simulated).
+        """
+
+        self._call("order_check")
+        fields = {name: value for name, value in request.items() if name in TradeRequest._fields}
+        req = _EMPTY_REQUEST._replace(**fields)
+        with self._lock:
+            sym = self._symbols.get(req.symbol)
+            retcode, comment = 0, "Done"
+            if sym is None or req.action not in (c.TRADE_ACTION_DEAL, c.TRADE_ACTION_PENDING):
+                retcode, comment = c.TRADE_RETCODE_INVALID, "Invalid request"
+            elif req.position:
+                position = self._positions.get(req.position)
+                if position is None:
+                    retcode, comment = c.TRADE_RETCODE_POSITION_CLOSED, "Position closed"
+                elif req.volume > position["volume"] + 1e-9:
+                    retcode, comment = c.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume"
+            elif not self._valid_volume(sym, req.volume):
+                retcode, comment = c.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume"
+            elif not self._valid_stops(sym, c.POSITION_TYPE_BUY if req.type % 2 == 0 else c.POSITION_TYPE_SELL,
+                                       req.sl, req.tp, req.price if req.action == c.TRADE_ACTION_PENDING else None):
+                retcode, comment = c.TRADE_RETCODE_INVALID_STOPS, "Invalid stops"
+            profit = sum(self._position(p).profit for p in self._positions.values())
+            equity = self.balance + profit
+            return OrderCheckResult(retcode, self.balance, equity, profit, 0.0, equity, 0.0, comment, req)
+
+    #--- order handling ---
+
+    def _deal(self, req):
+        sym = self._symbols.get(req.symbol)
+        if sym is None:
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+        if req.type not in (c.ORDER_TYPE_BUY, c.ORDER_TYPE_SELL):
+            return self._result(c.TRADE_RETCODE_INVALID, req, sym, comment = "Invalid request")
+        if not self._valid_volume(sym, req.volume):
+            return self._result(c.TRADE_RETCODE_INVALID_VOLUME, req, sym, comment = "Invalid volume")
+
+        buy = req.type == c.ORDER_TYPE_BUY
+        market = sym.ask if buy else sym.bid
+        if req.price and abs(req.price - market) > req.deviation * sym.point + sym.point / 2:
+            return self._result(c.TRADE_RETCODE_REQUOTE, req, sym, comment = "Requote")
+        if self.requote_rate and self._rng.random() < self.requote_rate:
+            return self._result(c.TRADE_RETCODE_REQUOTE, req, sym, comment = "Requote")
+        price = round(market + (self.slippage * sym.point if buy else -self.slippage * sym.point), sym.digits)
+
+        if req.position:
+            return self._close(req, sym, price)
+
+        if sym.trade_mode == c.SYMBOL_TRADE_MODE_DISABLED or sym.trade_mode == c.SYMBOL_TRADE_MODE_CLOSEONLY \
+                or (buy and sym.trade_mode == c.SYMBOL_TRADE_MODE_SHORTONLY) \
+                or (not buy and sym.trade_mode == c.SYMBOL_TRADE_MODE_LONGONLY):
+            return self._result(c.TRADE_RETCODE_TRADE_DISABLED, req, sym, comment = "Trade disabled")
+        position_type = c.POSITION_TYPE_BUY if buy else c.POSITION_TYPE_SELL
+        if not self._valid_stops(sym, position_type, req.sl, req.tp):
+            return self._result(c.TRADE_RETCODE_INVALID_STOPS, req, sym, comment = "Invalid stops")
+
+        ticket = self._ticket()
+        now_msc = int(self.clock() * 1000)
+        self._positions[ticket] = {
+            "ticket": ticket, "time_msc": now_msc, "time_update_msc": now_msc, "type": position_type,
+            "magic": req.magic, "reason": c.POSITION_REASON_EXPERT, "volume": req.volume, "price_open": price,
+            "sl": req.sl, "tp": req.tp, "swap": 0.0, "symbol": req.symbol, "comment": req.comment,
+        }
+        deal = self._record_deal(ticket, ticket, req.type, c.DEAL_ENTRY_IN, req.magic, c.DEAL_REASON_EXPERT,
+                                 req.volume, price, 0.0, req.symbol, req.comment, now_msc)
+        return self._result(c.TRADE_RETCODE_DONE, req, sym, deal = deal, order = ticket, volume = req.volume,
+                            price = price, comment = "Request executed")
+
+    def _close(self, req, sym, price):
+        position = self._positions.get(req.position)
+        if position is None or position["symbol"] != req.symbol:
+            return self._result(c.TRADE_RETCODE_INVALID, req, sym, comment = "Invalid request")
+        closing_type = c.ORDER_TYPE_SELL if position["type"] == c.POSITION_TYPE_BUY else c.ORDER_TYPE_BUY
+        if req.type != closing_type:
+            return self._result(c.TRADE_RETCODE_INVALID, req, sym, comment = "Invalid request")
+        if req.volume > position["volume"] + 1e-9:
+            return self._result(c.TRADE_RETCODE_INVALID_VOLUME, req, sym, comment = "Invalid volume")
+        if self._frozen(sym, position):
+            return self._result(c.TRADE_RETCODE_FROZEN, req, sym, comment = "Frozen")
+
+        order = self._ticket()
+        deal = self._exit(position, sym, req.volume, price, c.DEAL_REASON_EXPERT, order)
+        return self._result(c.TRADE_RETCODE_DONE, req, sym, deal = deal, order = order, volume = req.volume,
+                            price = price, comment = "Request executed")
+
+    def _sltp(self, req):
+        position = self._positions.get(req.position)
+        if position is None:
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+        sym = self._symbols[position["symbol"]]
+        if req.sl == position["sl"] and req.tp == position["tp"]:
+            return self._result(c.TRADE_RETCODE_NO_CHANGES, req, sym, comment = "No changes")
+        if not self._valid_stops(sym, position["type"], req.sl, req.tp):
+            return self._result(c.TRADE_RETCODE_INVALID_STOPS, req, sym, comment = "Invalid stops")
+        if self._frozen(sym, position):
+            return self._result(c.TRADE_RETCODE_FROZEN, req, sym, comment = "Frozen")
+        position["sl"] = req.sl
+        position["tp"] = req.tp
+        position["time_update_msc"] = int(self.clock() * 1000)
+        return self._result(c.TRADE_RETCODE_DONE, req, sym, comment = "Request executed")
+
+    def _pending(self, req):
+        sym = self._symbols.get(req.symbol)
+        if sym is None:
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+        if req.type not in (c.ORDER_TYPE_BUY_LIMIT, c.ORDER_TYPE_SELL_LIMIT, c.ORDER_TYPE_BUY_STOP, c.ORDER_TYPE_SELL_STOP):
+            return self._result(c.TRADE_RETCODE_INVALID, req, sym, comment = "Invalid request")
+        if not self._valid_volume(sym, req.volume):
+            return self._result(c.TRADE_RETCODE_INVALID_VOLUME, req, sym, comment = "Invalid volume")
+        if not self._valid_pending_price(sym, req.type, req.price):
+            return self._result(c.TRADE_RETCODE_INVALID_PRICE, req, sym, comment = "Invalid price")
+        buy = req.type in (c.ORDER_TYPE_BUY_LIMIT, c.ORDER_TYPE_BUY_STOP)
+        if not self._valid_stops(sym, c.POSITION_TYPE_BUY if buy else c.POSITION_TYPE_SELL, req.sl, req.tp, req.price):
+            return self._result(c.TRADE_RETCODE_INVALID_STOPS, req, sym, comment = "Invalid stops")
+
+        ticket = self._ticket()
+        self._orders[ticket] = {
+            "ticket": ticket, "time_setup_msc": int(self.clock() * 1000), "type": req.type,
+            "type_time": req.type_time, "type_filling": req.type_filling, "magic": req.magic,
+            "volume": req.volume, "price_open": req.price, "sl": req.sl, "tp": req.tp,
+            "symbol": req.symbol, "comment": req.comment,
+        }
+        return self._result(c.TRADE_RETCODE_DONE, req, sym, order = ticket, volume = req.volume,
+                            price = req.price, comment = "Request executed")
+
+    def _modify_order(self, req):
+        order = self._orders.get(req.order)
+        if order is None:
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+        sym = self._symbols[order["symbol"]]
+        price = req.price or order["price_open"]
+        if not self._valid_pending_price(sym, order["type"], price):
+            return self._result(c.TRADE_RETCODE_INVALID_PRICE, req, sym, comment = "Invalid price")
+        order.update(price_open = price, sl = req.sl, tp = req.tp)
+        return self._result(c.TRADE_RETCODE_DONE, req, sym, order = req.order, comment = "Request executed")
+
+    def _remove_order(self, req):
+        order = self._orders.pop(req.order, None)
+        if order is None:
+            return self._result(c.TRADE_RETCODE_INVALID, req, comment = "Invalid request")
+        return self._result(c.TRADE_RETCODE_DONE, req, self._symbols[order["symbol"]], order = req.order,
+                            comment = "Request executed")
+
+    #--- tick processing ---
+
+    def _trigger(self, sym):
+        for ticket, order in list(self._orders.items()):
+            if order["symbol"] != sym.name:
+                continue
+            kind, price = order["type"], order["price_open"]
+            if (kind == c.ORDER_TYPE_BUY_LIMIT and sym.ask <= price) or (kind == c.ORDER_TYPE_BUY_STOP and sym.ask >= price) \
+                    or (kind == c.ORDER_TYPE_SELL_LIMIT and sym.bid >= price) or (kind == c.ORDER_TYPE_SELL_STOP and sym.bid <= price):
+                del self._orders[ticket]
+                buy = kind in (c.ORDER_TYPE_BUY_LIMIT, c.ORDER_TYPE_BUY_STOP)
+                fill = sym.ask if buy else sym.bid
+                self._positions[ticket] = {
+                    "ticket": ticket, "time_msc": sym.time_msc, "time_update_msc": sym.time_msc,
+                    "type": c.POSITION_TYPE_BUY if buy else c.POSITION_TYPE_SELL, "magic": order["magic"],
+                    "reason": c.POSITION_REASON_EXPERT, "volume": order["volume"], "price_open": fill,
+                    "sl": order["sl"], "tp": order["tp"], "swap": 0.0, "symbol": sym.name, "comment": order["comment"],
+                }
+                self._record_deal(ticket, ticket, c.DEAL_TYPE_BUY if buy else c.DEAL_TYPE_SELL, c.DEAL_ENTRY_IN,
+                                  order["magic"], c.DEAL_REASON_EXPERT, order["volume"], fill, 0.0, sym.name,
+                                  order["comment"], sym.time_msc)
+
+        for position in list(self._positions.values()):
+            if position["symbol"] != sym.name:
+                continue
+            sl, tp = position["sl"], position["tp"]
+            if position["type"] == c.POSITION_TYPE_BUY:
+                price = sym.bid
+                hit_sl, hit_tp = sl and price <= sl, tp and price >= tp
+            else:
+                price = sym.ask
+                hit_sl, hit_tp = sl and price >= sl, tp and price <= tp
+            if hit_sl or hit_tp:
+                self._exit(position, sym, position["volume"], price,
+                           c.DEAL_REASON_SL if hit_sl else c.DEAL_REASON_TP, self._ticket(), sym.time_msc)
+
+    #--- helpers ---
+
+    def _call(self, name):
+        self.calls[name] += 1
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(name, 0.0)
+        if latency:
+            time.sleep(latency)
+
+    def _record_tick(self, sym):
+        if not self.record_ticks:
+            return
+        if sym.tick_times and sym.time_msc < sym.tick_times[-1]:
+            return #out of order ticks only move the price
+        sym.ticks.append((sym.time_msc // 1000, sym.bid, sym.ask, 0.0, 0, sym.time_msc,
+                          c.TICK_FLAG_BID | c.TICK_FLAG_ASK, 0.0))
+        sym.tick_times.append(sym.time_msc)
+
+    def _tick_array(self, rows):
+        import numpy as np
+        return np.array(rows, dtype = MT5_TICK_DTYPE)
+
+    def _bars(self, symbol, timeframe):
+        with self._lock:
+            if symbol not in self._symbols:
+                self._error = (c.RES_E_NOT_FOUND, "Terminal: Not found")
+                return None
+            bars = self._rates.get((symbol, timeframe))
+            if bars is None:
+                import numpy as np
+                bars = np.zeros(0, dtype = MT5_RATES_DTYPE)
+            return bars
+
+    def _ticket(self):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    def _exit(self, position, sym, volume, price, reason, order, time_msc = None):
+        buy = position["type"] == c.POSITION_TYPE_BUY
+        profit = round((price - position["price_open"]) * (1 if buy else -1) * volume * sym.contract_size, 2)
+        self.balance += profit
+        position["volume"] = round(position["volume"] - volume, 8)
+        if position["volume"] <= 1e-9:
+            del self._positions[position["ticket"]]
+        now_msc = int(self.clock() * 1000) if time_msc is None else time_msc
+        position["time_update_msc"] = now_msc
+        return self._record_deal(order, position["ticket"], c.DEAL_TYPE_SELL if buy else c.DEAL_TYPE_BUY,
+                                 c.DEAL_ENTRY_OUT, position["magic"], reason, volume, price, profit,
+                                 sym.name, position["comment"], now_msc)
+
+    def _record_deal(self, order, position_id, deal_type, entry, magic, reason, volume, price, profit, symbol, comment, time_msc):
+        ticket = self._ticket()
+        self.deals.append(TradeDeal(ticket, order, time_msc // 1000, time_msc, deal_type, entry, magic, position_id,
+                                    reason, volume, price, 0.0, 0.0, profit, 0.0, symbol, comment, ""))
+        return ticket
+
+    def _valid_volume(self, sym, volume):
+        if volume < sym.volume_min - 1e-9 or volume > sym.volume_max + 1e-9:
+            return False
+        steps = volume / sym.volume_step
+        return abs(steps - round(steps)) < 1e-6
+
+    def _valid_stops(self, sym, position_type, sl, tp, price = None):
+        #SL/TP of buys are checked against bid, of sells against ask (or against the pending order price)
+        level = sym.stops_level * sym.point
+        if position_type == c.POSITION_TYPE_BUY:
+            ref = sym.bid if price is None else price
+            return (not sl or sl <= ref - level) and (not tp or tp >= ref + level)
+        ref = sym.ask if price is None else price
+        return (not sl or sl >= ref + level) and (not tp or tp <= ref - level)
+
+    def _valid_pending_price(self, sym, order_type, price):
+        level = sym.stops_level * sym.point
+        if order_type == c.ORDER_TYPE_BUY_LIMIT:
+            return price <= sym.ask - level
+        if order_type == c.ORDER_TYPE_SELL_LIMIT:
+            return price >= sym.bid + level
+        if order_type == c.ORDER_TYPE_BUY_STOP:
+            return price >= sym.ask + level
+        return price <= sym.bid - level
+
+    def _frozen(self, sym, position):
+        #positions cannot be modified or closed while price is within freeze level of their SL/TP
+        if not sym.freeze_level:
+            return False
+        level = sym.freeze_level * sym.point
+        price = sym.bid if position["type"] == c.POSITION_TYPE_BUY else sym.ask
+        return any(stop and abs(price - stop) < level for stop in (position["sl"], position["tp"]))
+
+    def _symbol(self, sym):
+        return SymbolInfo(sym.name, sym.name, sym.name, sym.point, sym.digits, sym.spread, sym.bid, sym.ask,
+                          sym.visible, sym.visible, sym.trade_mode, c.SYMBOL_TRADE_EXECUTION_INSTANT,
+                          sym.stops_level, sym.freeze_level, sym.contract_size, sym.point,
+                          sym.contract_size * sym.point, sym.volume_min, sym.volume_max, sym.volume_step)
+
+    def _position(self, p):
+        sym = self._symbols[p["symbol"]]
+        buy = p["type"] == c.POSITION_TYPE_BUY
+        current = sym.bid if buy else sym.ask
+        profit = round((current - p["price_open"]) * (1 if buy else -1) * p["volume"] * sym.contract_size, 2)
+        return TradePosition(p["ticket"], p["time_msc"] // 1000, p["time_msc"], p["time_update_msc"] // 1000,
+                             p["time_update_msc"], p["type"], p["magic"], p["ticket"], p["reason"], p["volume"],
+                             p["price_open"], p["sl"], p["tp"], current, p["swap"], profit, p["symbol"],
+                             p["comment"], "")
+
+    def _order(self, o):
+        sym = self._symbols[o["symbol"]]
+        buy = o["type"] in (c.ORDER_TYPE_BUY_LIMIT, c.ORDER_TYPE_BUY_STOP)
+        return TradeOrder(o["ticket"], o["time_setup_msc"] // 1000, o["time_setup_msc"], 0, 0, 0, o["type"],
+                          o["type_time"], o["type_filling"], c.ORDER_STATE_PLACED, o["magic"], 0, 0,
+                          c.POSITION_REASON_EXPERT, o["volume"], o["volume"], o["price_open"], o["sl"], o["tp"],
+                          sym.ask if buy else sym.bid, 0.0, o["symbol"], o["comment"], "")
+
+    def _result(self, retcode, req, sym = None, deal = 0, order = 0, volume = 0.0, price = 0.0, comment = ""):
+        if retcode in (c.TRADE_RETCODE_DONE, c.TRADE_RETCODE_PLACED):
+            self._error = (c.RES_S_OK, "Success")
+        bid, ask = (sym.bid, sym.ask) if sym is not None else (0.0, 0.0)
+        return OrderSendResult(retcode, deal, order, volume, price, bid, ask, comment, 0, 0, req)
+
+
+def _seconds(value):
+    #datetime or number -> epoch seconds
+    return value.timestamp() if hasattr(value, "timestamp") else value
@@ -0,0 +1,466 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+
+from MT5pytrader import constants
+from MT5pytrader.stops import StopRule, plan_stops
+
+
+_Price = namedtuple("_Price", ["bid", "ask"])
+
+#heap entries of old versions and unmanaged tickets are dropped once they outnumber the live
+#ones (at most two per managed ticket: price or delayed, and deadline) by this many
+_COMPACT_MIN = 1024
+
+#retcodes meaning the position no longer exists
+_GONE_RETCODES = frozenset((constants.TRADE_RETCODE_POSITION_CLOSED, constants.TRADE_RETCODE_INVALID))
+
+
+class _Managed:
+    #state of one managed position, with the TradePosition fields plan_stops() and the validator read
+    __slots__ = ("ticket", "symbol", "type", "direction", "price_open", "price_current", "sl", "tp", "volume", "time",
+                 "rule", "version", "last_modified", "deadline", "deadline_seq")
+
+    def __init__(self, position, rule, hold_from):
+        self.ticket = position.ticket
+        self.symbol = position.symbol
+        self.type = position.type
+        self.direction = 1 if position.type == constants.POSITION_TYPE_BUY else -1
+        self.price_open = position.price_open
+        self.price_current = position.price_current
+        self.sl = position.sl
+        self.tp = position.tp
+        self.volume = position.volume
+        self.time = position.time
+        self.rule = rule
+        self.version = 0
+        self.last_modified = None
+        self.deadline = None if rule.max_hold is None else hold_from + rule.max_hold
+        self.deadline_seq = None #seq of its entry in StopManager._deadlines
+
+    def trigger(self, point):
+        """
+        Price at which the next stop update is due (bid for buys, ask for sells), None if no rule is pending.
+        """
+
+        rule, d = self.rule, self.direction
+        triggers = []
+        if rule.break_even_trigger is not None:
+            be = self.price_open + d * rule.break_even_offset * point
+            if not self.sl or d * self.sl < d * be - point / 2:
+                triggers.append(self.price_open + d * rule.break_even_trigger * point)
+        if rule.trail_distance is not None:
+            start = rule.trail_distance if rule.trail_start is None else rule.trail_start
+            trigger = self.price_open + d * start * point
+            if self.sl:
+                step = max(rule.trail_step, 1)
+                trigger = d * max(d * trigger, d * (self.sl + d * (rule.trail_distance + step) * point))
+            triggers.append(trigger)
+        if not triggers:
+            return None
+        return d * min(d * trigger for trigger in triggers)
+
+
+class StopManager:
+    """
+    Long-running manager of break even, trailing and time based exits for many positions.
+
+    Work is driven by prices: on_tick() (or an attached TickStreamer) pops from per symbol
+    heaps, ordered by the price each position's next stop update triggers at, only the
+    positions whose trigger was crossed. They are queued and evaluated on the manager's
+    thread with plan_stops(), one vectorized pass per symbol, and sent as SLTP requests
+    with the semantics of Trader.modify_sl() (take profit kept, op "modify_sl").
+    A ticket is modified at most once every min_interval seconds. Positions held longer
+    than their rule's max_hold are closed.
+
+    Functions:
+        StopManager.manage() - Manage a position (ticket or TradePosition) with a StopRule
+        StopManager.manage_all() - Manage every open position matching filters
+        StopManager.unmanage() - Stop managing a position
+        StopManager.on_tick() - Feed a price update
+        StopManager.attach() - Feed price updates from a TickStreamer
+        StopManager.follow() - Keep the managed positions in sync with a PositionMirror
+        StopManager.start() / stop() - Run / stop the manager's thread
+        StopManager.stats() - Queue depth, evaluation latency and counters
+
+    Parameters:
+        trader: Trader sending the requests (its symbol cache, listeners and quiet mode apply)
+        rule: default StopRule
+        min_interval: minimum seconds between two modifications of the same ticket
+        clock: callable returning the trade server's time (the time zone of position.time),
+            used for max_hold. By default it is time.time() plus the server's offset, taken from
+            tick times (on_tick(time_msc = ...), attach(), or one tick of the symbol when a
+            position with max_hold is managed). Time exits wait until the offset is known
+
+        """
+
+    def __init__(self, trader, rule = None, min_interval = 1.0, clock = None):
+        self.trader = trader
+        self.rule = rule or StopRule()
+        self.min_interval = min_interval
+        self.clock = clock or self._server_time
+        self._offset = None #trade server time - time.time(), from tick times
+        self.evaluations = 0
+        self.modifications = 0
+        self.failures = 0
+        self.throttled = 0
+        self.time_exits = 0
+        self.latencies = deque(maxlen = 4096) #seconds from trigger to decision
+        self.last_error = None
+        self._managed = {}
+        self._prices = {}
+        self._heaps = {}     #(symbol, direction) -> [(direction * trigger, seq, ticket, version)]
+        self._delayed = []   #[(ready monotonic time, seq, ticket, version)], throttled tickets
+        self._deadlines = [] #[(clock deadline, seq, ticket)], time exits
+        self._queue = deque() #(ticket, version, triggered at)
+        self._entries = 0     #entries in the heaps above, stale ones included
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._managed)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    #--- positions ---
+
+    def manage(self, position, rule = None):
+        """
+        Manage a position.
+
+        Parameters:
+            position: TradePosition, or a ticket (looked up with one positions_get)
+            rule: StopRule for this position, the manager's rule by default
+
+            """
+
+        if not hasattr(position, "ticket"):
+            positions = self.trader.positions_snapshot(ticket = position)
+            if len(positions) == 0:
+                return False
+            position = positions[0]
+        state = _Managed(position, rule or self.rule, position.time)
+        #terminal round trips happen before taking the lock, which on_tick() and the worker wait on
+        tick = None
+        if state.deadline is not None and self._offset is None and self.clock == self._server_time:
+            tick = self.trader._tick(position.symbol)
+        self.trader.symbols.get(position.symbol) #cached for _schedule()
+        with self._cond:
+            if tick is not None:
+                self._observe(tick.time_msc)
+            self._managed[state.ticket] = state
+            if state.deadline is not None:
+                state.deadline_seq = next(self._seq)
+                self._push(self._deadlines, (state.deadline, state.deadline_seq, state.ticket))
+                self._cond.notify()
+            self._schedule(state)
+        return True
+
+    def manage_all(self, rule = None, symbol = None, group = None, magic = None, comment = None):
+        """
+        Manage every open position matching the filters (one positions snapshot).
+
+        Returns:
+            number of positions managed
+
+            """
+
+        positions = self.trader.positions_snapshot(symbol = symbol, group = group, magic = magic, comment = comment)
+        for position in positions:
+            self.manage(position, rule)
+        return len(positions)
+
+    def unmanage(self, ticket):
+        with self._cond:
+            self._managed.pop(ticket, None)
+
+    def follow(self, mirror, rule = None, manage_opened = True):
+        """
+        Track a PositionMirror: closed positions are dropped, modified and partially
+        closed ones are updated, and (with manage_opened) new ones are managed with rule.
+        """
+
+        def on_event(event):
+            if event.kind == "closed":
+                self.unmanage(event.ticket)
+            elif event.kind == "opened":
+                if manage_opened:
+                    self.manage(event.position, rule)
+            else:
+                self._update(event.position)
+
+        mirror.subscribe(on_event)
+        return on_event
+
+    def _update(self, position):
+        with self._cond:
+            state = self._managed.get(position.ticket)
+            if state is not None:
+                state.sl, state.tp, state.volume = position.sl, position.tp, position.volume
+                state.price_current = position.price_current
+                self._schedule(state)
+
+    #--- prices ---
+
+    def on_tick(self, symbol, bid, ask, time_msc = None):
+        """
+        Price update of a symbol: queue every position on it whose trigger was crossed.
+        Cheap enough to be called from a tick callback. time_msc (the tick time) keeps the
+        default clock on the trade server's time.
+        """
+
+        now = time.perf_counter()
+        with self._cond:
+            if time_msc is not None:
+                self._observe(time_msc)
+            self._prices[symbol] = _Price(bid, ask)
+            queued = self._pop_triggered(symbol, 1, bid, now) + self._pop_triggered(symbol, -1, ask, now)
+            if queued:
+                self._cond.notify()
+
+    def attach(self, streamer):
+        """
+        Feed every new tick of a TickStreamer to on_tick(), the streamer must stream the managed symbols.
+        """
+
+        def on_ticks(symbol, buffer, n):
+            tick = buffer.latest()
+            self.on_tick(symbol, tick.bid, tick.ask, tick.time_msc)
+
+        streamer.subscribe(on_ticks)
+        return on_ticks
+
+    def _observe(self, time_msc):
+        #the freshest tick gives the server offset, older ones (e.g a closed market) understate it
+        offset = time_msc / 1000 - time.time()
+        if self._offset is None or offset > self._offset:
+            self._offset = offset
+
+    def _server_time(self):
+        return None if self._offset is None else time.time() + self._offset
+
+    def _pop_triggered(self, symbol, direction, price, now):
+        heap = self._heaps.get((symbol, direction))
+        queued = 0
+        while heap and heap[0][0] <= direction * price:
+            _, _, ticket, version = heapq.heappop(heap)
+            self._entries -= 1
+            state = self._managed.get(ticket)
+            if state is not None and state.version == version:
+                self._queue.append((ticket, version, now))
+                queued += 1
+        return queued
+
+    def _schedule(self, state, delay = None):
+        #(re)register a position, dropping every entry of its previous version
+        state.version += 1
+        entry = (next(self._seq), state.ticket, state.version)
+        if delay is not None:
+            self._push(self._delayed, (time.monotonic() + delay,) + entry)
+            self._cond.notify()
+            return
+        meta = self.trader.symbols.get(state.symbol)
+        trigger = None if meta is None else state.trigger(meta.point)
+        if trigger is None:
+            return
+        d = state.direction
+        self._push(self._heaps.setdefault((state.symbol, d), []), (d * trigger,) + entry)
+        price = self._prices.get(state.symbol)
+        if price is not None and self._pop_triggered(state.symbol, d, price.bid if d > 0 else price.ask, time.perf_counter()):
+            self._cond.notify()
+
+    def _push(self, heap, entry):
+        heapq.heappush(heap, entry)
+        self._entries += 1
+        if self._entries > 4 * len(self._managed) + _COMPACT_MIN:
+            self._compact()
+
+    def _compact(self):
+        #drop stale entries, rebuilding the heaps in place (callers may hold one)
+        managed = self._managed
+
+        def current(ticket, version):
+            state = managed.get(ticket)
+            return state is not None and state.version == version
+
+        for heap in list(self._heaps.values()) + [self._delayed]:
+            heap[:] = [entry for entry in heap if current(entry[2], entry[3])]
+            heapq.heapify(heap)
+        self._deadlines[:] = [entry for entry in self._deadlines
+                              if entry[2] in managed and managed[entry[2]].deadline_seq == entry[1]]
+        heapq.heapify(self._deadlines)
+        self._entries = sum(len(heap) for heap in self._heaps.values()) + len(self._delayed) + len(self._deadlines)
+
+    #--- evaluation ---
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target = self._run, name = "StopManager", daemon = True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout = None):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_pending(self):
+        """
+        Evaluate everything due now on the calling thread (the manager's thread does this when started).
+
+        Returns:
+            number of positions evaluated
+
+            """
+
+        with self._cond:
+            batch, exits = self._collect()
+        self._process(batch, exits)
+        return len(batch) + len(exits)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                batch, exits = self._collect()
+                if not batch and not exits:
+                    self._cond.wait(self._next_wakeup())
+                    continue
+            try:
+                self._process(batch, exits)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = e
+
+    def _next_wakeup(self):
+        timeouts = [1.0]
+        if self._delayed:
+            timeouts.append(self._delayed[0][0] - time.monotonic())
+        clock = self.clock() if self._deadlines else None
+        if clock is not None:
+            timeouts.append(self._deadlines[0][0] - clock)
+        return max(0.0, min(timeouts))
+
+    def _collect(self):
+        #move due throttled tickets back to the price heaps, then take the queue and due time exits
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, ticket, version = heapq.heappop(self._delayed)
+            self._entries -= 1
+            state = self._managed.get(ticket)
+            if state is not None and state.version == version:
+                self._schedule(state)
+
+        exits = []
+        clock = self.clock()
+        while clock is not None and self._deadlines and self._deadlines[0][0] <= clock:
+            _, seq, ticket = heapq.heappop(self._deadlines)
+            self._entries -= 1
+            state = self._managed.get(ticket)
+            #a ticket managed again has a deadline entry of its own
+            if state is not None and state.deadline_seq == seq:
+                exits.append(self._managed.pop(ticket))
+
+        batch = []
+        while self._queue:
+            ticket, version, triggered_at = self._queue.popleft()
+            state = self._managed.get(ticket)
+            if state is not None and state.version == version:
+                batch.append((state, triggered_at))
+        return batch, exits
+
+    def _process(self, batch, exits):
+        for state in exits:
+            self.time_exits += 1
+            if state.direction > 0:
+                self.trader.close_buy(ticket_id = state.ticket)
+            else:
+                self.trader.close_sell(ticket_id = state.ticket)
+
+        #throttle, then one vectorized plan per symbol and rule
+        now = time.monotonic()
+        groups = {}
+        for state, triggered_at in batch:
+            if state.last_modified is not None and now - state.last_modified < self.min_interval:
+                self.throttled += 1
+                with self._cond:
+                    self._schedule(state, delay = state.last_modified + self.min_interval - now)
+                continue
+            groups.setdefault((state.symbol, state.rule), []).append((state, triggered_at))
+
+        for (symbol, rule), items in groups.items():
+            states = [state for state, _ in items]
+            meta = self.trader.symbols.get(symbol)
+            updates = {} if meta is None else {update.ticket: update for update in plan_stops(
+                states, {symbol: self._prices.get(symbol)}, {symbol: meta}, rule.break_even_trigger,
+                rule.break_even_offset, rule.trail_distance, rule.trail_start, rule.trail_step)}
+            decided = time.perf_counter()
+            for state, triggered_at in items:
+                self.evaluations += 1
+                self.latencies.append(decided - triggered_at)
+                update = updates.get(state.ticket)
+                if update is None:
+                    #clamped or frozen: look again once the throttle interval passed
+                    with self._cond:
+                        self._schedule(state, delay = self.min_interval)
+                    continue
+                self._send(state, update)
+
+    def _send(self, state, update):
+        #sent with the position (priced at the latest tick) so the validator checks freeze and stops levels
+        price = self._prices.get(state.symbol)
+        if price is not None:
+            state.price_current = price.bid if state.direction > 0 else price.ask
+        report = self.trader._send("modify_sl", self.trader._sltp_request(state, update.sl, state.tp), position = state)
+        state.last_modified = time.monotonic()
+        with self._cond:
+            if report.ok:
+                self.modifications += 1
+                state.sl = update.sl
+                self._schedule(state)
+            elif report.retcode in _GONE_RETCODES:
+                self.failures += 1
+                self._managed.pop(state.ticket, None)
+            else:
+                self.failures += 1
+                self._schedule(state, delay = self.min_interval)
+
+    #--- metrics ---
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def stats(self):
+        """
+        Returns a dict of counters, queue sizes and evaluation latency percentiles (ms).
+        """
+
+        with self._cond:
+            latencies = sorted(self.latencies)
+            stats = {
+                "managed": len(self._managed),
+                "queue_depth": len(self._queue),
+                "delayed": len(self._delayed),
+                "deadlines": len(self._deadlines),
+                "heap_entries": sum(len(heap) for heap in self._heaps.values()),
+                "evaluations": self.evaluations,
+                "modifications": self.modifications,
+                "failures": self.failures,
+                "throttled": self.throttled,
+                "time_exits": self.time_exits,
+            }
+        for name, q in (("latency_p50_ms", 0.50), ("latency_p99_ms", 0.99)):
+            stats[name] = latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+        stats["latency_max_ms"] = latencies[-1] * 1000 if latencies else None
+        return stats
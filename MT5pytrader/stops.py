@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+from MT5pytrader import constants
+
+
+#stop loss change decided by plan_stops()
+StopUpdate = namedtuple("StopUpdate", [
+    "ticket",
+    "symbol",
+    "sl",               #new stop loss
+    "tp",               #take profit, unchanged
+    "previous_sl",      #stop loss before the update (0.0 if there was none)
+    "reason",           #"break_even" or "trail"
+])
+
+#stop management rule, distances in points (see plan_stops), max_hold in seconds (see StopManager)
+StopRule = namedtuple("StopRule", [
+    "break_even_trigger",
+    "break_even_offset",
+    "trail_distance",
+    "trail_start",
+    "trail_step",
+    "max_hold",
+], defaults = (None, 0, None, None, 0, None))
+
+
+def plan_stops(positions, ticks, symbols, break_even_trigger = None, break_even_offset = 0,
+               trail_distance = None, trail_start = None, trail_step = 0):
+    """
+    Decide in one vectorized pass which positions need their stop loss moved.
+
+    A stop loss is only ever moved in the direction of the trade. Break even moves
+    it to the open price (plus break_even_offset points) once the position is
+    break_even_trigger points in profit. Trailing keeps it trail_distance points
+    behind the current price once the position is trail_start points in profit,
+    and with trail_step only moves it by trail_step points or more at a time.
+    When both apply the tighter stop wins.
+
+    New stops are rounded to the symbol digits and kept at least trade_stops_level
+    points away from the price. Positions whose SL/TP is within trade_freeze_level
+    points of the price cannot be modified and are skipped.
+
+    Parameters:
+        positions: sequence of TradePosition (one positions snapshot)
+        ticks: dict of symbol: tick (anything with bid and ask)
+        symbols: dict of symbol: SymbolMeta (or symbol_info)
+        break_even_trigger: profit in points that triggers break even, None disables it
+        break_even_offset: points of profit locked in by break even
+        trail_distance: trailing distance in points, None disables trailing
+        trail_start: profit in points before trailing starts, trail_distance by default
+        trail_step: minimum move in points of a trailing stop
+
+    Returns:
+        list of StopUpdate, one per position whose stop loss actually changes
+
+        """
+
+    import numpy as np
+
+    positions = [p for p in positions if p.symbol in ticks and p.symbol in symbols and ticks[p.symbol] is not None]
+    if not positions or (break_even_trigger is None and trail_distance is None):
+        return []
+
+    n = len(positions)
+    metas = [symbols[p.symbol] for p in positions]
+    direction = np.fromiter((1.0 if p.type == constants.POSITION_TYPE_BUY else -1.0 for p in positions), float, n)
+    price_open = np.fromiter((p.price_open for p in positions), float, n)
+    sl = np.fromiter((p.sl for p in positions), float, n)
+    tp = np.fromiter((p.tp for p in positions), float, n)
+    point = np.fromiter((m.point for m in metas), float, n)
+    scale = 10.0 ** np.fromiter((m.digits for m in metas), float, n)
+    stops_level = np.fromiter((m.trade_stops_level for m in metas), float, n) * point
+    freeze_level = np.fromiter((m.trade_freeze_level for m in metas), float, n) * point
+    #positions are closed at bid (buys) or ask (sells), stops are checked against that price
+    price = np.fromiter((ticks[p.symbol].bid if p.type == constants.POSITION_TYPE_BUY else ticks[p.symbol].ask
+                         for p in positions), float, n)
+
+    has_sl = sl != 0
+    profit = direction * (price - price_open) / point
+    #stops compared in the trade direction: higher is tighter for buys and sells alike
+    current = np.where(has_sl, direction * sl, -np.inf)
+    target = np.full(n, -np.inf)
+    reason = np.zeros(n, dtype = np.int8) #0 none, 1 break even, 2 trail
+
+    if break_even_trigger is not None:
+        be = direction * (price_open + direction * break_even_offset * point)
+        hit = (profit >= break_even_trigger) & (be > target)
+        target = np.where(hit, be, target)
+        reason[hit] = 1
+
+    if trail_distance is not None:
+        start = trail_distance if trail_start is None else trail_start
+        trail = direction * (price - direction * trail_distance * point)
+        hit = (profit >= start) & (trail > target)
+        if trail_step:
+            hit &= ~has_sl | (trail - current >= trail_step * point - 1e-12)
+        target = np.where(hit, trail, target)
+        reason[hit] = 2
+
+    #back to prices, rounded to digits and at least stops_level behind the price
+    new_sl = np.round(direction * target * scale) / scale
+    limit = price - direction * stops_level
+    limit = np.where(direction > 0, np.floor(limit * scale + 1e-6), np.ceil(limit * scale - 1e-6)) / scale
+    new_sl = np.where(direction * new_sl > direction * limit, limit, new_sl)
+
+    frozen = ((has_sl & (np.abs(price - sl) < freeze_level)) |
+              ((tp != 0) & (np.abs(price - tp) < freeze_level)))
+    change = (reason > 0) & ~frozen & (direction * new_sl > current + 0.5 / scale)
+
+    return [StopUpdate(positions[i].ticket, positions[i].symbol, float(new_sl[i]), positions[i].tp, positions[i].sl,
+                       "break_even" if reason[i] == 1 else "trail")
+            for i in np.flatnonzero(change)]
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import namedtuple
+
+
+#symbol fields used by Trader when building requests
+SymbolMeta = namedtuple("SymbolMeta", [
+    "name",
+    "point",
+    "digits",
+    "volume_min",
+    "volume_max",
+    "volume_step",
+    "trade_stops_level",
+    "trade_freeze_level",
+    "trade_mode",
+    "visible",
+])
+
+
+class SymbolCache:
+    """
+    Per-symbol metadata cache.
+    Keeps the symbol_info fields Trader needs so repeated orders on the same
+    symbol do not pay a terminal round trip (and a symbol_select) every time.
+
+    Parameters:
+        terminal: MetaTrader5 module (or compatible backend) used for lookups
+        ttl: seconds before a cached entry is looked up again, None keeps entries until invalidated
+        log: callable(message) for MarketWatch messages, print by default (Trader passes its quiet-aware logger)
+
+    Attributes:
+        hits: number of lookups served from the cache
+        misses: number of lookups that went to the terminal
+
+        """
+
+    def __init__(self, terminal, ttl = None, log = print):
+        self.terminal = terminal
+        self.ttl = ttl
+        self.log = log
+        self.hits = 0
+        self.misses = 0
+        self._entries = {} #symbol -> (SymbolMeta, expiry)
+        self._lock = threading.Lock() #held for counters and entry updates, not terminal calls
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, symbol):
+        return symbol in self._entries
+
+    def get(self, symbol):
+        """
+        Get metadata of a symbol, adding it to MarketWatch if it is not visible.
+
+        Parameters:
+            symbol: Symbol name
+
+        Returns:
+            SymbolMeta, or None if the symbol does not exist
+
+            """
+
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = None
+        if entry is not None:
+            meta = entry[0]
+        else:
+            info = self.terminal.symbol_info(symbol)
+            if info is None:
+                with self._lock:
+                    self._entries.pop(symbol, None)
+                return None
+            meta = self._store(info)
+
+        # if the symbol is unavailable in MarketWatch, add it
+        if not meta.visible:
+            self.log(f"{symbol} is not visible, trying to switch on")
+            if not self.terminal.symbol_select(symbol, True):
+                self.log(f"symbol_select({symbol}) failed, error code = {self.terminal.last_error()}")
+            else:
+                meta = meta._replace(visible = True)
+                with self._lock:
+                    #keep the expiry, unless the entry was invalidated meanwhile
+                    entry = self._entries.get(symbol)
+                    if entry is not None:
+                        self._entries[symbol] = (meta, entry[1])
+
+        return meta
+
+    def preload(self, symbols = None):
+        """
+        Eagerly populate the cache.
+
+        Parameters:
+            symbols: list of symbol names, None loads every symbol known to the terminal
+
+        Returns:
+            Number of symbols loaded
+
+            """
+
+        if symbols is None:
+            infos = self.terminal.symbols_get() or ()
+        else:
+            infos = [self.terminal.symbol_info(symbol) for symbol in symbols]
+
+        loaded = 0
+        for info in infos:
+            if info is not None:
+                self._store(info)
+                loaded += 1
+        return loaded
+
+    def invalidate(self, symbol = None):
+        """
+        Drop a cached symbol, or every cached symbol if symbol is None.
+        """
+
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict with the number of cached symbols, hits and misses
+
+            """
+
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _store(self, info):
+        meta = SymbolMeta(
+            info.name,
+            info.point,
+            info.digits,
+            info.volume_min,
+            info.volume_max,
+            info.volume_step,
+            info.trade_stops_level,
+            info.trade_freeze_level,
+            info.trade_mode,
+            info.visible,
+        )
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[info.name] = (meta, expiry)
+        return meta
@@ -0,0 +1,328 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from MT5pytrader import constants
+
+
+#layout of a buffered tick, prices as float64 and time in epoch milliseconds
+TICK_DTYPE = np.dtype([
+    ("time_msc", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<f8"),
+    ("flags", "<u4"),
+])
+
+#latest tick of a buffer, usable wherever a symbol_info_tick() result is (bid, ask, last, time_msc)
+BufferedTick = namedtuple("BufferedTick", ["time_msc", "bid", "ask", "last", "volume", "flags", "time"])
+
+
+class TickBuffer:
+    """
+    Fixed-size ring buffer of ticks for one symbol.
+    Storage is preallocated once. Every tick is written twice (at i and i + capacity),
+    so the last n ticks are always one contiguous slice and window() never copies.
+
+    Attributes:
+        capacity: maximum number of ticks kept
+        count: number of ticks appended since creation (including overwritten ones)
+        duplicates: ticks dropped because they were already buffered
+        checked_at: time.monotonic() of the last time the buffer was brought up to date
+
+        """
+
+    def __init__(self, capacity = 4096):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.count = 0
+        self.duplicates = 0
+        self.checked_at = None
+        self._data = np.zeros(2 * capacity, dtype = TICK_DTYPE)
+        self._pos = 0
+        self._last_msc = None
+        self._same_msc = 0 #ticks buffered with time_msc == _last_msc
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_time_msc(self):
+        return self._last_msc
+
+    def append(self, time_msc, bid, ask, last = 0.0, volume = 0.0, flags = 0):
+        """
+        Add one tick, e.g from symbol_info_tick().
+        A tick older than the last one, or with the same time_msc and prices, is dropped.
+
+        Returns:
+            True if the tick was buffered
+
+            """
+
+        with self._lock:
+            if self._last_msc is not None and time_msc <= self._last_msc:
+                latest = self._data[self._pos - 1 + self.capacity]
+                if time_msc < self._last_msc or (latest["bid"] == bid and latest["ask"] == ask):
+                    self.duplicates += 1
+                    return False
+            self._write((time_msc, bid, ask, last, volume, flags))
+            if time_msc == self._last_msc:
+                self._same_msc += 1
+            else:
+                self._last_msc, self._same_msc = time_msc, 1
+            return True
+
+    def extend(self, ticks):
+        """
+        Add an array of ticks sorted by time_msc, e.g from copy_ticks_from().
+        Ticks already buffered are dropped, including the ones sharing the last
+        buffered millisecond (several ticks can arrive in the same millisecond).
+
+        Parameters:
+            ticks: structured array with time_msc, bid and ask fields (last, volume, flags optional)
+
+        Returns:
+            Number of ticks buffered
+
+            """
+
+        if ticks is None or len(ticks) == 0:
+            return 0
+        names = ticks.dtype.names
+        time_msc = ticks["time_msc"]
+        with self._lock:
+            if self._last_msc is not None:
+                keep = time_msc > self._last_msc
+                keep[np.flatnonzero(time_msc == self._last_msc)[self._same_msc:]] = True
+                self.duplicates += len(ticks) - int(keep.sum())
+                ticks, time_msc = ticks[keep], time_msc[keep]
+            n = len(ticks)
+            if n == 0:
+                return 0
+
+            #only the last capacity ticks can survive
+            rows = np.zeros(min(n, self.capacity), dtype = TICK_DTYPE)
+            for name in TICK_DTYPE.names:
+                if name in names:
+                    rows[name] = ticks[name][-len(rows):]
+            self._write_many(rows)
+
+            newest = time_msc[-1]
+            same = int((time_msc == newest).sum())
+            self._same_msc = self._same_msc + same if newest == self._last_msc else same
+            self._last_msc = int(newest)
+            self.count += n - len(rows)
+            return n
+
+    def latest(self):
+        """
+        Returns the most recent tick as a BufferedTick, None if the buffer is empty.
+        """
+
+        with self._lock:
+            if self.count == 0:
+                return None
+            row = self._data[self._pos - 1 + self.capacity]
+            time_msc = int(row["time_msc"])
+            return BufferedTick(time_msc, float(row["bid"]), float(row["ask"]), float(row["last"]),
+                                float(row["volume"]), int(row["flags"]), time_msc // 1000)
+
+    def window(self, n = None):
+        """
+        Zero-copy view of the last n ticks (all buffered ticks if n is None), oldest first.
+        The view is overwritten as new ticks arrive, copy it to keep it.
+        """
+
+        #head and count are read together, a writer moves both
+        with self._lock:
+            size = min(self.count, self.capacity)
+            end = self._pos + self.capacity
+        n = size if n is None else min(n, size)
+        return self._data[end - n:end]
+
+    def _write(self, row):
+        pos = self._pos
+        self._data[pos] = row
+        self._data[pos + self.capacity] = row
+        self._pos = (pos + 1) % self.capacity
+        self.count += 1
+
+    def _write_many(self, rows):
+        #rows fit in the buffer (len(rows) <= capacity), split at the wrap point
+        n, pos, capacity = len(rows), self._pos, self.capacity
+        first = min(n, capacity - pos)
+        self._data[pos:pos + first] = rows[:first]
+        self._data[pos + capacity:pos + capacity + first] = rows[:first]
+        if first < n:
+            self._data[:n - first] = rows[first:]
+            self._data[capacity:capacity + n - first] = rows[first:]
+        self._pos = (pos + n) % capacity
+        self.count += n
+
+
+class TickStreamer:
+    """
+    Streams ticks of a set of symbols into TickBuffers on a background thread.
+
+    mode="poll" reads symbol_info_tick() for each symbol every interval, mode="copy"
+    pulls every tick since the last one with copy_ticks_from() (completed with
+    copy_ticks_range() when a full batch comes back), so no tick is missed between
+    two polls. Ticks are de-duplicated by time_msc.
+
+    Functions:
+        TickStreamer.start() - Start the background thread
+        TickStreamer.stop() - Stop the background thread
+        TickStreamer.poll_once() - Bring every buffer up to date on the calling thread
+        TickStreamer.latest() - Most recent tick of a symbol
+        TickStreamer.window() - Zero-copy view of the last n ticks of a symbol
+        TickStreamer.subscribe() - Call a function when new ticks arrive
+
+    Use Trader.use_tick_stream(streamer) to price orders from the buffers.
+
+        """
+
+    MODES = ("poll", "copy")
+
+    def __init__(self, terminal, symbols = (), capacity = 4096, interval = 0.05, mode = "poll"):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, not {mode!r}")
+        self.terminal = terminal
+        self.capacity = capacity
+        self.interval = interval
+        self.mode = mode
+        self.buffers = {}
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_symbol(self, symbol):
+        with self._lock:
+            if symbol not in self.buffers:
+                self.buffers[symbol] = TickBuffer(self.capacity)
+            return self.buffers[symbol]
+
+    def remove_symbol(self, symbol):
+        with self._lock:
+            self.buffers.pop(symbol, None)
+
+    def subscribe(self, callback):
+        """
+        Call callback(symbol, buffer, n) after n new ticks were buffered for symbol.
+        Callbacks run on the streaming thread and should return quickly.
+        """
+
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        self._callbacks.remove(callback)
+
+    def latest(self, symbol, max_age = None):
+        """
+        Returns the latest BufferedTick of a symbol, or None if the symbol is not
+        streamed, nothing is buffered yet, or the buffer was last brought up to date
+        more than max_age seconds ago.
+        """
+
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            return None
+        if max_age is not None and (buffer.checked_at is None or time.monotonic() - buffer.checked_at > max_age):
+            return None
+        return buffer.latest()
+
+    def window(self, symbol, n = None):
+        return self.buffers[symbol].window(n)
+
+    def poll_once(self):
+        """
+        Fetch new ticks for every symbol.
+
+        Returns:
+            dict of symbol: number of new ticks
+
+            """
+
+        with self._lock:
+            buffers = list(self.buffers.items())
+        added = {}
+        for symbol, buffer in buffers:
+            if self.mode == "copy" and buffer.last_time_msc is not None:
+                ticks = self._copy(symbol, buffer.last_time_msc)
+                if ticks is None:
+                    self._error(self.terminal.last_error())
+                    continue
+                n = buffer.extend(ticks)
+            else:
+                #poll mode, or the first tick of a copy stream
+                tick = self.terminal.symbol_info_tick(symbol)
+                if tick is None:
+                    self._error(self.terminal.last_error())
+                    continue
+                n = int(buffer.append(tick.time_msc, tick.bid, tick.ask, tick.last, tick.volume, tick.flags))
+            buffer.checked_at = time.monotonic()
+            if n:
+                added[symbol] = n
+                for callback in self._callbacks:
+                    callback(symbol, buffer, n)
+        self.polls += 1
+        return added
+
+    def _copy(self, symbol, last_time_msc):
+        #ticks since the last buffered one (copy_ticks_* take whole seconds, extend() drops the ones already buffered).
+        #copy_ticks_from returns at most capacity ticks, more than that can share one second, so a full batch
+        #is completed with copy_ticks_range up to the current tick, which has no count limit
+        since = last_time_msc // 1000
+        ticks = self.terminal.copy_ticks_from(symbol, since, self.capacity, constants.COPY_TICKS_ALL)
+        if ticks is None or len(ticks) < self.capacity:
+            return ticks
+        tick = self.terminal.symbol_info_tick(symbol)
+        if tick is None:
+            return None
+        return self.terminal.copy_ticks_range(symbol, since, tick.time_msc // 1000 + 1, constants.COPY_TICKS_ALL)
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target = self._run, name = "TickStreamer", daemon = True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self._error(e)
+            self._stop.wait(self.interval)
+
+    def _error(self, error):
+        self.errors += 1
+        self.last_error = error
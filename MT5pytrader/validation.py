@@ -0,0 +1,239 @@
+import math
+
+from MT5pytrader import constants
+from MT5pytrader.orders import BUY_TYPES
+
+
+MODES = ("adjust", "reject")
+
+
+def normalize_volume(volume, meta):
+    """
+    Snap a volume down to a multiple of the symbol's volume_step (e.g 0.15 * 0.5 -> 0.07).
+    """
+
+    step = meta.volume_step
+    if not step:
+        return volume
+    return round(math.floor(volume / step + 1e-9) * step, 8)
+
+
+def normalize_price(price, meta):
+    """
+    Round a price to the symbol's digits.
+    """
+
+    return round(price, meta.digits) if price else price
+
+
+class Rejection(Exception):
+    """
+    A request failed local validation, retcode is the TRADE_RETCODE_* the server would answer.
+    """
+
+    def __init__(self, retcode, reason):
+        super().__init__(reason)
+        self.retcode = retcode
+        self.reason = reason
+
+
+class Validator:
+    """
+    Local pre-trade validation and normalization of requests, from cached symbol metadata.
+
+    - volumes are snapped down to volume_step, and checked against volume_min/volume_max
+    - prices, SL and TP are rounded to the symbol digits
+    - SL/TP closer than trade_stops_level points to the reference price (the order price,
+      or the current price of the position) are moved out to the level (mode "adjust")
+      or rejected (mode "reject")
+    - closes and SL/TP modifications of a position whose SL/TP is within trade_freeze_level
+      points of its current price are rejected
+    - opens on symbols whose trade mode forbids them are rejected
+    - with order_check, new orders and closes are also checked by the terminal's
+      order_check(), in one concurrent batch for bulk operations
+
+    Functions:
+        Validator.check() - Returns the normalized request, raises Rejection
+        Validator.check_many() - Returns a list of normalized requests or Rejections
+
+    Parameters:
+        symbols: SymbolCache
+        mode: "adjust" or "reject" for stops inside trade_stops_level
+        order_check: True to run order_check() after the local checks
+        max_workers: order_check calls in flight in check_many()
+
+        """
+
+    def __init__(self, symbols, mode = "adjust", order_check = False, max_workers = 8):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        self.symbols = symbols
+        self.mode = mode
+        self.order_check = order_check
+        self.max_workers = max_workers
+        self.rejected = 0
+        self.adjusted = 0
+
+    def __repr__(self):
+        return f"Validator(mode={self.mode!r}, order_check={self.order_check})"
+
+    def check(self, request, position = None, order_check = None):
+        """
+        Validate and normalize a request.
+
+        Parameters:
+            request: request dict (not modified)
+            position: TradePosition the request closes or modifies (its current price, SL and TP are used)
+            order_check: override Validator.order_check for this request
+
+        Returns:
+            The normalized request (a copy when anything changed)
+
+        Raises:
+            Rejection
+
+            """
+
+        request = self._check_local(request, position)
+        if order_check is None:
+            order_check = self.order_check
+        if order_check and request["action"] in (constants.TRADE_ACTION_DEAL, constants.TRADE_ACTION_PENDING):
+            self._check_terminal(request)
+        return request
+
+    def check_many(self, requests, positions = None):
+        """
+        Validate a batch of requests, running the order_check() calls concurrently.
+
+        Returns:
+            list with the normalized request, or the Rejection, of each request
+
+            """
+
+        positions = positions or [None] * len(requests)
+        checked = []
+        for request, position in zip(requests, positions):
+            try:
+                checked.append(self._check_local(request, position))
+            except Rejection as e:
+                checked.append(e)
+
+        if self.order_check:
+            pending = [i for i, request in enumerate(checked) if isinstance(request, dict)
+                       and request["action"] in (constants.TRADE_ACTION_DEAL, constants.TRADE_ACTION_PENDING)]
+
+            def terminal_check(i):
+                try:
+                    self._check_terminal(checked[i])
+                except Rejection as e:
+                    checked[i] = e
+
+            if len(pending) > 1 and self.max_workers > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers = min(self.max_workers, len(pending))) as pool:
+                    list(pool.map(terminal_check, pending))
+            else:
+                for i in pending:
+                    terminal_check(i)
+        return checked
+
+    def _check_local(self, request, position):
+        meta = self.symbols.get(request.get("symbol"))
+        if meta is None:
+            self._reject(constants.TRADE_RETCODE_INVALID, "unknown symbol")
+        action = request.get("action")
+        changes = {}
+
+        if action in (constants.TRADE_ACTION_DEAL, constants.TRADE_ACTION_PENDING):
+            closing = bool(request.get("position"))
+            if not closing:
+                buy = request.get("type") in BUY_TYPES
+                mode = meta.trade_mode
+                if mode == constants.SYMBOL_TRADE_MODE_DISABLED or mode == constants.SYMBOL_TRADE_MODE_CLOSEONLY \
+                        or (buy and mode == constants.SYMBOL_TRADE_MODE_SHORTONLY) \
+                        or (not buy and mode == constants.SYMBOL_TRADE_MODE_LONGONLY):
+                    self._reject(constants.TRADE_RETCODE_TRADE_DISABLED, "trade mode of the symbol forbids this order")
+
+            volume = normalize_volume(request.get("volume", 0.0), meta)
+            if volume < meta.volume_min - 1e-9:
+                self._reject(constants.TRADE_RETCODE_INVALID_VOLUME, f"volume {request.get('volume')} is below volume_min {meta.volume_min}")
+            if volume > meta.volume_max + 1e-9:
+                self._reject(constants.TRADE_RETCODE_INVALID_VOLUME, f"volume {request.get('volume')} is above volume_max {meta.volume_max}")
+            if closing and position is not None and volume > position.volume + 1e-9:
+                self._reject(constants.TRADE_RETCODE_INVALID_VOLUME, f"volume {volume} is above the position volume {position.volume}")
+            if volume != request.get("volume"):
+                changes["volume"] = volume
+
+            price = request.get("price")
+            if price:
+                changes["price"] = normalize_price(price, meta)
+
+            if closing:
+                if position is not None:
+                    self._check_freeze(position, meta)
+            else:
+                self._check_stops(request, request.get("type") in BUY_TYPES, price, meta, changes)
+
+        elif action == constants.TRADE_ACTION_SLTP:
+            if position is not None:
+                self._check_freeze(position, meta)
+                self._check_stops(request, position.type == constants.POSITION_TYPE_BUY, position.price_current, meta, changes)
+            else:
+                for field in ("sl", "tp"):
+                    if request.get(field):
+                        changes[field] = normalize_price(request[field], meta)
+
+        changes = {field: value for field, value in changes.items() if value != request.get(field)}
+        if not changes:
+            return request
+        request = request.copy()
+        request.update(changes)
+        return request
+
+    def _check_stops(self, request, buy, ref, meta, changes):
+        #SL/TP must be stops_level points away from the reference price, on the right side
+        sl = normalize_price(request.get("sl") or 0.0, meta)
+        tp = normalize_price(request.get("tp") or 0.0, meta)
+        if ref:
+            level = meta.trade_stops_level * meta.point
+            scale = 10 ** meta.digits
+            direction = 1 if buy else -1
+            sl_limit = ref - direction * level
+            tp_limit = ref + direction * level
+            if sl and direction * sl >= direction * ref:
+                self._reject(constants.TRADE_RETCODE_INVALID_STOPS, f"sl {sl} is on the wrong side of {ref}")
+            if tp and direction * tp <= direction * ref:
+                self._reject(constants.TRADE_RETCODE_INVALID_STOPS, f"tp {tp} is on the wrong side of {ref}")
+            if sl and direction * sl > direction * sl_limit + 1e-9:
+                if self.mode == "reject":
+                    self._reject(constants.TRADE_RETCODE_INVALID_STOPS, f"sl {sl} is inside the stops level of {ref}")
+                sl = (math.floor if buy else math.ceil)(sl_limit * scale + (1e-6 if buy else -1e-6)) / scale
+                self.adjusted += 1
+            if tp and direction * tp < direction * tp_limit - 1e-9:
+                if self.mode == "reject":
+                    self._reject(constants.TRADE_RETCODE_INVALID_STOPS, f"tp {tp} is inside the stops level of {ref}")
+                tp = (math.ceil if buy else math.floor)(tp_limit * scale - (1e-6 if buy else -1e-6)) / scale
+                self.adjusted += 1
+        if request.get("sl"):
+            changes["sl"] = sl
+        if request.get("tp"):
+            changes["tp"] = tp
+
+    def _check_freeze(self, position, meta):
+        level = meta.trade_freeze_level * meta.point
+        if not level or not position.price_current:
+            return
+        for stop in (position.sl, position.tp):
+            if stop and abs(position.price_current - stop) < level:
+                self._reject(constants.TRADE_RETCODE_FROZEN, f"position #{position.ticket} is within the freeze level of its SL/TP")
+
+    def _check_terminal(self, request):
+        result = self.symbols.terminal.order_check(request)
+        if result is None:
+            self._reject(constants.TRADE_RETCODE_ERROR, f"order_check failed, error code={self.symbols.terminal.last_error()}")
+        if result.retcode not in (0, constants.TRADE_RETCODE_DONE):
+            self._reject(result.retcode, f"order_check: {result.comment}")
+
+    def _reject(self, retcode, reason):
+        self.rejected += 1
+        raise Rejection(retcode, reason)
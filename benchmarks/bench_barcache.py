@@ -0,0 +1,81 @@
+"""
+Cold start benchmark of BarCache.
+
+Fills a SimulatedTerminal with M1 history for a number of symbols, then compares
+downloading everything from the terminal with opening a warm BarCache and
+bringing it up to date (only the missing tail is fetched).
+
+Usage:
+    python benchmarks/bench_barcache.py [--symbols 50] [--bars 500000] [--latency-us 2000]
+
+    """
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from MT5pytrader import BarCache, SimulatedTerminal, constants as c
+from MT5pytrader.barcache import BAR_DTYPE
+
+
+START = 1_600_000_000
+
+
+def make_terminal(n_symbols, n_bars, latency):
+    sim = SimulatedTerminal([f"SYM{i:03d}" for i in range(n_symbols)])
+    bars = np.zeros(n_bars, dtype = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8")])
+    bars["time"] = START + np.arange(n_bars) * 60
+    bars["open"] = bars["high"] = bars["low"] = bars["close"] = 1.0
+    for i in range(n_symbols):
+        sim.add_rates(f"SYM{i:03d}", c.TIMEFRAME_M1, bars)
+    sim.latency = latency
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "BarCache cold start benchmark")
+    parser.add_argument("--symbols", type = int, default = 50)
+    parser.add_argument("--bars", type = int, default = 500000, help = "M1 bars per symbol (5 years is about 1.8M)")
+    parser.add_argument("--latency-us", type = float, default = 2000.0, help = "simulated latency added to every terminal call")
+    args = parser.parse_args()
+
+    sim = make_terminal(args.symbols, args.bars, args.latency_us / 1e6)
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    root = tempfile.mkdtemp(prefix = "bench_barcache_")
+    try:
+        start = time.perf_counter()
+        for symbol in symbols:
+            sim.copy_rates_from_pos(symbol, c.TIMEFRAME_M1, 0, args.bars)
+        download = time.perf_counter() - start
+
+        BarCache(sim, root, initial_bars = args.bars).get(symbols[0], "M1") #sanity check of the fill path
+        for symbol in symbols[1:]:
+            BarCache(sim, root, initial_bars = args.bars).update(symbol, "M1")
+
+        #new process start: a fresh cache over warm files, one tail fetch per symbol
+        start = time.perf_counter()
+        cache = BarCache(sim, root, initial_bars = args.bars)
+        total = sum(len(cache.get(symbol, "M1")) for symbol in symbols)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        last = [cache.get(symbol, "M1", count = 1000, refresh = False) for symbol in symbols]
+        reads = time.perf_counter() - start
+
+        print(f"{args.symbols} symbols x {args.bars} M1 bars ({total} bars, {total * BAR_DTYPE.itemsize / 1e6:.0f} MB on disk)")
+        print(f"full download from terminal:  {download * 1000:10.1f} ms")
+        print(f"warm cache start (tail only): {cold * 1000:10.1f} ms  ({cache.fetched} bars fetched)")
+        print(f"last 1000 bars of each:       {reads * 1000:10.1f} ms  ({sum(len(bars) for bars in last)} bars)")
+    finally:
+        shutil.rmtree(root, ignore_errors = True)
+
+
+if __name__ == "__main__":
+    main()
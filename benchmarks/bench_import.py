@@ -0,0 +1,73 @@
+"""
+Startup cost of MT5pytrader in a fresh interpreter.
+
+Each case runs in a new Python process (so nothing is cached in sys.modules) and
+is repeated; the median time above a bare interpreter start is reported, with the
+heavy modules the case ended up loading. numpy and pandas should only appear for
+the cases that use bars or DataFrames.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 10]
+
+    """
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+HEAVY = ("numpy", "pandas", "MetaTrader5")
+
+CASES = [
+    ("python (baseline)", "pass"),
+    ("import MT5pytrader", "import MT5pytrader"),
+    ("from MT5pytrader import Trader", "from MT5pytrader import Trader"),
+    ("Trader() on the simulator", "from MT5pytrader import Trader, SimulatedTerminal\n"
+                                  "Trader(backend = SimulatedTerminal(['EURUSD']), quiet = True)"),
+    ("Trader() + open_buy()", "from MT5pytrader import Trader, SimulatedTerminal\n"
+                              "Trader(backend = SimulatedTerminal(['EURUSD']), quiet = True).open_buy('EURUSD')"),
+    ("Trader() + get_open_positions()", "from MT5pytrader import Trader, SimulatedTerminal\n"
+                                        "trader = Trader(backend = SimulatedTerminal(['EURUSD']), quiet = True)\n"
+                                        "trader.open_buy('EURUSD')\n"
+                                        "trader.get_open_positions()"),
+    ("import numpy, pandas (reference)", "import numpy, pandas"),
+]
+
+#time the case inside the child, then report which heavy modules it loaded
+TEMPLATE = """
+import time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+import sys
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH = ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run([sys.executable, "-c", TEMPLATE.format(code = code, heavy = HEAVY)], env = env,
+                            check = True, capture_output = True, text = True).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "MT5pytrader import/startup time benchmark")
+    parser.add_argument("--repeat", type = int, default = 10)
+    args = parser.parse_args()
+
+    print(f"{'case':36} {'median ms':>10} {'min ms':>8}  loaded")
+    for name, code in CASES:
+        times = []
+        loaded = ""
+        for _ in range(args.repeat):
+            elapsed, loaded = run(code)
+            times.append(elapsed)
+        print(f"{name:36} {statistics.median(times) * 1000:10.1f} {min(times) * 1000:8.1f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
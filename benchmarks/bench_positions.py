@@ -0,0 +1,112 @@
+"""
+Benchmark: cost of listing open positions as the number of broker symbols grows.
+
+Compares the old get_open_positions() (symbols_get() + one positions_get() per
+symbol) with the single-call snapshot, against a stand-in terminal that charges
+a fixed latency per call.
+
+Usage:
+    python benchmarks/bench_positions.py [--latency-us 50] [--positions 12] [--repeat 5]
+
+    """
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic",
+    "identifier", "reason", "volume", "price_open", "sl", "tp", "price_current",
+    "swap", "profit", "symbol", "comment", "external_id",
+])
+SymbolInfo = namedtuple("SymbolInfo", ["name"])
+
+
+class StandInTerminal:
+    """
+    Minimal terminal answering symbols_get/positions_get with a busy-wait per call.
+    """
+
+    def __init__(self, n_symbols, n_positions, latency):
+        self.latency = latency
+        self.calls = 0
+        self.symbols = tuple(SymbolInfo(f"SYM{i:04d}") for i in range(n_symbols))
+        self.positions = tuple(
+            TradePosition(1000 + i, 1700000000 + i, 0, 0, 0, i % 2, 260000, 1000 + i, 0,
+                          0.1, 1.1, 0.0, 0.0, 1.1, 0.0, float(i), self.symbols[i % n_symbols].name,
+                          "MT5pytrader", "")
+            for i in range(n_positions)
+        )
+
+    def _wait(self):
+        self.calls += 1
+        end = time.perf_counter() + self.latency
+        while time.perf_counter() < end:
+            pass
+
+    def symbols_get(self, group = None):
+        self._wait()
+        return self.symbols
+
+    def positions_get(self, symbol = None, group = None, ticket = None):
+        self._wait()
+        if symbol is not None:
+            return tuple(p for p in self.positions if p.symbol == symbol) or None
+        return self.positions
+
+
+def legacy_get_open_positions(terminal):
+    #the per-symbol loop get_open_positions() used before the snapshot
+    open_pos = []
+    for symbol in terminal.symbols_get():
+        positions = terminal.positions_get(symbol = symbol.name)
+        if positions is not None:
+            for position in positions:
+                open_pos.append(position)
+    if len(open_pos) == 0:
+        return None
+    df = pd.DataFrame(open_pos, columns = position._asdict().keys())
+    df.drop(['magic', 'time_msc', 'time_update_msc', 'time_update', 'external_id', 'identifier', 'reason'], axis = 1, inplace = True)
+    df['time'] = pd.to_datetime(df['time'], unit = 's')
+    return df
+
+
+def snapshot_get_open_positions(terminal):
+    from MT5pytrader.positions import fetch_positions, positions_frame
+    return positions_frame(fetch_positions(terminal))
+
+
+def measure(func, terminal, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        terminal.calls = 0
+        start = time.perf_counter()
+        func(terminal)
+        best = min(best, time.perf_counter() - start)
+    return best, terminal.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.split("\n")[1])
+    parser.add_argument("--latency-us", type = float, default = 50.0, help = "per terminal call latency")
+    parser.add_argument("--positions", type = int, default = 12)
+    parser.add_argument("--repeat", type = int, default = 5)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'legacy ms':>10} {'calls':>6} {'snapshot ms':>12} {'calls':>6} {'speedup':>8}")
+    for n_symbols in (10, 50, 100, 200, 400, 800):
+        terminal = StandInTerminal(n_symbols, args.positions, args.latency_us / 1e6)
+        legacy, legacy_calls = measure(legacy_get_open_positions, terminal, args.repeat)
+        snap, snap_calls = measure(snapshot_get_open_positions, terminal, args.repeat)
+        print(f"{n_symbols:>8} {legacy * 1e3:>10.2f} {legacy_calls:>6} {snap * 1e3:>12.2f} {snap_calls:>6} {legacy / snap:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
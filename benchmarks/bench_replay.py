@@ -0,0 +1,61 @@
+"""
+Throughput of TickReplay, to size overnight regression runs.
+
+Replays random-walk ticks of a number of symbols through a simple strategy
+(one position per symbol, opened with SL/TP, re-opened once it is closed) and
+reports ticks per second and the speedup over realtime.
+
+Usage:
+    python benchmarks/bench_replay.py [--symbols 5] [--ticks 200000] [--interval-ms 200] [--file ticks.npy]
+
+    """
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from MT5pytrader.replay import TickReplay, load_ticks
+
+
+START_MSC = 1_700_000_000_000
+
+
+def make_ticks(n_ticks, interval_ms, seed):
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(n_ticks, dtype = [("time_msc", "<i8"), ("bid", "<f8"), ("ask", "<f8")])
+    ticks["time_msc"] = START_MSC + np.cumsum(rng.integers(1, 2 * interval_ms, n_ticks))
+    ticks["bid"] = np.round(1.1 + np.cumsum(rng.normal(0, 2e-5, n_ticks)), 5)
+    ticks["ask"] = ticks["bid"] + 0.0001
+    return ticks
+
+
+def strategy(trader, symbol, tick):
+    if not trader.mt5.positions_get(symbol = symbol):
+        trader.open_buy(symbol, lot = 0.1, stop_loss = 100, take_profit = 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "TickReplay throughput benchmark")
+    parser.add_argument("--symbols", type = int, default = 5)
+    parser.add_argument("--ticks", type = int, default = 200000, help = "ticks per symbol")
+    parser.add_argument("--interval-ms", type = int, default = 200, help = "mean time between ticks of a symbol")
+    parser.add_argument("--file", help = "replay ticks from a .npy/.csv file (one symbol) instead of random ones")
+    args = parser.parse_args()
+
+    if args.file:
+        ticks = {"FILE": load_ticks(args.file)}
+    else:
+        ticks = {f"SYM{i:03d}": make_ticks(args.ticks, args.interval_ms, i) for i in range(args.symbols)}
+
+    result = TickReplay(ticks, strategy).run()
+    print(f"{result.ticks} ticks, {result.simulated_seconds / 3600:.1f} simulated hours in {result.elapsed:.2f} s")
+    print(f"throughput: {result.ticks_per_second:,.0f} ticks/s, {result.speedup:,.0f}x realtime")
+    print(f"deals: {len(result.terminal.deals)}, balance: {result.terminal.balance:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Latency benchmark suite for the public Trader methods.
+
+Every method runs against a SimulatedTerminal with a configurable per-call latency.
+For each method it reports p50/p99 latency, terminal calls per operation and peak
+memory allocated per operation (tracemalloc, measured in a separate pass).
+Position-dependent methods are scaled over open position counts, and
+position listing over the number of broker symbols.
+
+Usage:
+    python benchmarks/bench_trader.py [--latency-us 0] [--iterations 200] [--output results.json]
+    python benchmarks/bench_trader.py --quick --compare previous.json
+
+    """
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from MT5pytrader import SimulatedTerminal, Trader, constants as c
+
+
+POSITION_COUNTS = (1, 10, 100, 1000, 10000)
+SYMBOL_COUNTS = (10, 100, 1000)
+QUICK_POSITION_COUNTS = (1, 100, 1000)
+QUICK_SYMBOL_COUNTS = (10, 100)
+
+
+def make_trader(n_symbols, n_positions, latency):
+    sim = SimulatedTerminal([f"SYM{i:04d}" for i in range(n_symbols)])
+    for i in range(n_positions):
+        open_position(sim, f"SYM{i % n_symbols:04d}", c.ORDER_TYPE_BUY if i % 2 == 0 else c.ORDER_TYPE_SELL)
+    trader = Trader(backend = sim, quiet = True)
+    # latency only applies to the measured calls, not to the setup
+    sim.latency = latency
+    return trader, sim
+
+
+def open_position(sim, symbol, order_type, volume = 0.1):
+    #open directly on the simulator, bypassing Trader (setup is not measured)
+    latency, sim.latency = sim.latency, 0.0
+    result = sim.order_send({"action": c.TRADE_ACTION_DEAL, "symbol": symbol, "volume": volume,
+                             "type": order_type, "magic": 260000, "comment": "bench"})
+    sim.latency = latency
+    return result.order
+
+
+def break_even_case(trader, sim):
+    #a SELL moved into profit, at its entry price the stop would be rejected locally and no modify timed
+    sim.set_tick("SYM0000", 1.0)
+    ticket = open_position(sim, "SYM0000", c.ORDER_TYPE_SELL)
+    sim.set_tick("SYM0000", 0.998)
+
+    def op():
+        report = trader.break_even(ticket_id = ticket)
+        assert report.ok, report.comment
+
+    return op
+
+
+#name -> function(trader, sim) returning a zero-argument callable to measure
+CASES = {
+    "open_buy": lambda t, s: lambda: t.open_buy("SYM0000", 0.1, 100, 200),
+    "open_sell": lambda t, s: lambda: t.open_sell("SYM0000", 0.1, 100, 200),
+    "open_buy_limit": lambda t, s: lambda: t.open_buy_limit("SYM0000", 0.99, 0.1, 100, 200),
+    "open_sell_limit": lambda t, s: lambda: t.open_sell_limit("SYM0000", 1.01, 0.1, 100, 200),
+    "close_buy": lambda t, s: (lambda ticket: lambda: t.close_buy(ticket_id = ticket))(open_position(s, "SYM0000", c.ORDER_TYPE_BUY)),
+    "close_sell": lambda t, s: (lambda ticket: lambda: t.close_sell(ticket_id = ticket))(open_position(s, "SYM0000", c.ORDER_TYPE_SELL)),
+    "close_partial_buy": lambda t, s: (lambda ticket: lambda: t.close_partial_buy(0.5, ticket_id = ticket))(open_position(s, "SYM0000", c.ORDER_TYPE_BUY, 0.2)),
+    "close_partial_sell": lambda t, s: (lambda ticket: lambda: t.close_partial_sell(0.5, ticket_id = ticket))(open_position(s, "SYM0000", c.ORDER_TYPE_SELL, 0.2)),
+    "modify_sl": lambda t, s: (lambda ticket: lambda: t.modify_sl(ticket_id = ticket, sl = 0.9))(open_position(s, "SYM0000", c.ORDER_TYPE_BUY)),
+    "modify_tp": lambda t, s: (lambda ticket: lambda: t.modify_tp(ticket_id = ticket, tp = 1.1))(open_position(s, "SYM0000", c.ORDER_TYPE_BUY)),
+    "break_even": break_even_case,
+    "positions_snapshot": lambda t, s: t.positions_snapshot,
+    "get_open_positions": lambda t, s: t.get_open_positions,
+    "running_profit": lambda t, s: t.running_profit,
+    "pnl": lambda t, s: t.pnl,
+    "pnl_by_symbol_frame": lambda t, s: lambda: t.pnl(by = "symbol", as_frame = True),
+}
+
+#cases that are re-measured at every position count / symbol count
+POSITION_SCALED = ("positions_snapshot", "get_open_positions", "running_profit", "pnl", "pnl_by_symbol_frame", "modify_sl")
+SYMBOL_SCALED = ("positions_snapshot", "get_open_positions", "open_buy")
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_case(name, n_symbols, n_positions, latency, iterations):
+    trader, sim = make_trader(n_symbols, n_positions, latency)
+    sink = io.StringIO()
+    timings = []
+    calls = 0
+    with contextlib.redirect_stdout(sink):
+        # warm up caches (symbol metadata, imports) outside the measurement
+        CASES[name](trader, sim)()
+        for _ in range(iterations):
+            op = CASES[name](trader, sim)
+            before = sum(sim.calls.values())
+            start = time.perf_counter_ns()
+            op()
+            timings.append(time.perf_counter_ns() - start)
+            calls += sum(sim.calls.values()) - before
+            sink.seek(0)
+            sink.truncate()
+
+        # allocations in a separate pass, tracemalloc distorts timings
+        sim.latency = 0.0
+        peaks = []
+        tracemalloc.start()
+        for _ in range(min(iterations, 50)):
+            op = CASES[name](trader, sim)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            op()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            sink.seek(0)
+            sink.truncate()
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "case": name,
+        "symbols": n_symbols,
+        "positions": n_positions,
+        "iterations": iterations,
+        "p50_us": percentile(timings, 0.50) / 1000,
+        "p99_us": percentile(timings, 0.99) / 1000,
+        "mean_us": sum(timings) / len(timings) / 1000,
+        "calls_per_op": calls / iterations,
+        "alloc_peak_bytes": sorted(peaks)[len(peaks) // 2],
+    }
+
+
+def iterations_for(n_positions, iterations):
+    #keep runs with 10k positions reasonable
+    return max(5, min(iterations, iterations * 100 // max(n_positions, 1)))
+
+
+def run_suite(latency, iterations, quick = False):
+    position_counts = QUICK_POSITION_COUNTS if quick else POSITION_COUNTS
+    symbol_counts = QUICK_SYMBOL_COUNTS if quick else SYMBOL_COUNTS
+    results = []
+    for name in CASES:
+        results.append(run_case(name, 10, 10, latency, iterations))
+    for name in POSITION_SCALED:
+        for n_positions in position_counts:
+            results.append(run_case(name, 10, n_positions, latency, iterations_for(n_positions, iterations)))
+    for name in SYMBOL_SCALED:
+        for n_symbols in symbol_counts:
+            results.append(run_case(name, n_symbols, 10, latency, iterations))
+    return results
+
+
+def print_results(results, baseline = None):
+    previous = {}
+    if baseline is not None:
+        previous = {(r["case"], r["symbols"], r["positions"]): r for r in baseline["results"]}
+    header = f"{'case':<22} {'symbols':>7} {'positions':>9} {'p50 us':>10} {'p99 us':>10} {'calls/op':>9} {'alloc B':>9}"
+    print(header + ("  vs baseline p50" if previous else ""))
+    for r in results:
+        line = f"{r['case']:<22} {r['symbols']:>7} {r['positions']:>9} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} {r['calls_per_op']:>9.1f} {r['alloc_peak_bytes']:>9}"
+        old = previous.get((r["case"], r["symbols"], r["positions"]))
+        if old is not None and old["p50_us"] > 0:
+            line += f"  {r['p50_us'] / old['p50_us']:>6.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Latency benchmark suite for Trader")
+    parser.add_argument("--latency-us", type = float, default = 0.0, help = "simulated latency added to every terminal call")
+    parser.add_argument("--iterations", type = int, default = 200)
+    parser.add_argument("--quick", action = "store_true", help = "smaller position/symbol scales")
+    parser.add_argument("--output", help = "write results to this JSON file")
+    parser.add_argument("--compare", help = "JSON file of a previous run to compare p50 against")
+    args = parser.parse_args()
+
+    results = run_suite(args.latency_us / 1e6, args.iterations, quick = args.quick)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_us": args.latency_us,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,13 @@ setup(
     keywords=['MT5pytrader', 'python', 'Metatrader5', 'MT5', 'algotrading',
              'autroading'],
     install_requires=[
-          'MetaTrader5',
+          'MetaTrader5; platform_system == "Windows"',
+          'numpy',
+          'pandas',
       ],
+    extras_require={
+          'arrow': ['pyarrow'],
+      },
     zip_safe = False
 
 )
\ No newline at end of file
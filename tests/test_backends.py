@@ -0,0 +1,24 @@
+import pytest
+
+from MT5pytrader import Trader
+from MT5pytrader.backends import BACKEND_CALLS, Backend, load_backend
+from MT5pytrader.simulator import SimulatedTerminal
+
+
+def test_simulator_implements_every_backend_call():
+    for name in BACKEND_CALLS:
+        assert callable(getattr(Backend, name))
+    assert load_backend(SimulatedTerminal(["EURUSD"])) is not None
+
+
+def test_incomplete_backend_fails_in_load_backend():
+    class NoHistory:
+        pass
+
+    sim = SimulatedTerminal(["EURUSD"])
+    for name in BACKEND_CALLS:
+        setattr(NoHistory, name, getattr(sim, name))
+    del NoHistory.copy_rates_from_pos, NoHistory.orders_get
+
+    with pytest.raises(TypeError, match = "copy_rates_from_pos, orders_get"):
+        Trader(backend = NoHistory(), quiet = True)
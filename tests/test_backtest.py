@@ -0,0 +1,23 @@
+import numpy as np
+
+from MT5pytrader.backtest import backtest
+
+
+def _bars(close):
+    bars = np.zeros(len(close), dtype = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8")])
+    bars["time"] = np.arange(len(close)) * 60
+    bars["open"] = np.r_[close[0], close[:-1]]
+    bars["close"] = close
+    bars["high"] = np.maximum(bars["open"], close) + 0.00005
+    bars["low"] = np.minimum(bars["open"], close) - 0.00005
+    return bars
+
+
+def test_look_ahead_is_capped_at_the_data():
+    bars = _bars(np.array([1.0, 1.0010, 1.0030, 1.0005, 0.9990]))
+    entries = np.array([True, True, False, False, False])
+    #a window far wider than the series must not be allocated
+    wide = backtest(bars, long_entries = entries, stop_loss = 100, take_profit = 150, overlap = True, window = 10 ** 9)
+    narrow = backtest(bars, long_entries = entries, stop_loss = 100, take_profit = 150, overlap = True, window = 1)
+    assert len(wide.trades) == 2
+    assert (wide.trades == narrow.trades).all()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from MT5pytrader import BarCache, SimulatedTerminal
+from MT5pytrader import constants
+
+
+def _rates(times, close):
+    rates = np.zeros(len(times), dtype = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8")])
+    rates["time"] = times
+    rates["open"] = rates["high"] = rates["low"] = rates["close"] = close
+    return rates
+
+
+def test_update_writes_only_changed_or_new_bars(tmp_path):
+    terminal = SimulatedTerminal(["EURUSD"])
+    terminal.add_rates("EURUSD", constants.TIMEFRAME_M1, _rates([0, 60, 120], 1.0))
+    cache = BarCache(terminal, str(tmp_path))
+    assert cache.update("EURUSD", "M1") == 3
+
+    #nothing changed: nothing written
+    assert cache.update("EURUSD", "M1") == 0
+    assert cache.written == 3
+
+    #the forming bar moved: only it is rewritten
+    terminal.add_rates("EURUSD", constants.TIMEFRAME_M1, _rates([120], 1.1))
+    assert cache.update("EURUSD", "M1") == 1
+    assert cache.read("EURUSD", "M1")["close"].tolist() == [1.0, 1.0, 1.1]
+
+    #a new bar with the last one unchanged: only the new bar is appended
+    terminal.add_rates("EURUSD", constants.TIMEFRAME_M1, _rates([180], 1.2))
+    assert cache.update("EURUSD", "M1") == 1
+    assert cache.written == 5
+    assert cache.read("EURUSD", "M1")["time"].tolist() == [0, 60, 120, 180]
@@ -0,0 +1,50 @@
+from MT5pytrader import Journal, SimulatedTerminal, Trader
+from MT5pytrader.hooks import TerminalCall
+from MT5pytrader.journal import read_journal, replay_journal
+
+
+def test_empty_comment_round_trips(tmp_path):
+    trader = Trader(backend = SimulatedTerminal(["EURUSD"]), quiet = True)
+    with Journal(str(tmp_path)) as journal:
+        journal.attach(trader)
+        trader.open_buy("EURUSD", comment = "")
+        trader.close_all()
+    records = read_journal(str(tmp_path))
+    assert len(records) == 2
+    assert list(records["comment"]) == [b"", b""]
+
+    sent = []
+    terminal = SimulatedTerminal()
+    order_send = terminal.order_send
+    terminal.order_send = lambda request: sent.append(request) or order_send(request)
+    report = replay_journal(records, terminal)
+    assert report.matched == 2
+    assert [request["comment"] for request in sent] == ["", ""]
+
+
+def test_keyword_request_is_copied(tmp_path):
+    request = {"action": 1, "symbol": "EURUSD", "volume": 0.1, "comment": "first"}
+    with Journal(str(tmp_path), flush_interval = 60) as journal:
+        journal(TerminalCall("order_send", (), {"request": request}, None, None, 0.0, 0.0))
+        request["comment"] = "changed"
+    assert read_journal(str(tmp_path))["comment"][0] == b"first"
+
+
+def test_replay_sends_zero_valued_request_fields(tmp_path):
+    trader = Trader(backend = SimulatedTerminal(["EURUSD"]), deviation = 0, quiet = True)
+    with Journal(str(tmp_path)) as journal:
+        journal.attach(trader)
+        trader.open_buy("EURUSD")
+    records = read_journal(str(tmp_path))
+
+    sent = []
+    terminal = SimulatedTerminal()
+    order_send = terminal.order_send
+    terminal.order_send = lambda request: sent.append(request) or order_send(request)
+    replay_journal(records, terminal)
+    request = sent[0]
+    for field in ("action", "type", "volume", "price", "type_time", "type_filling", "deviation"):
+        assert field in request
+    assert request["type"] == 0 and request["deviation"] == 0
+    for field in ("sl", "tp", "position", "order"):
+        assert field not in request
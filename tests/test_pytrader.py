@@ -0,0 +1,80 @@
+import pytest
+
+from MT5pytrader import SimulatedTerminal, Trader
+from MT5pytrader import constants
+
+
+def test_market_orders_are_priced_at_the_side_they_fill_on():
+    terminal = SimulatedTerminal()
+    terminal.add_symbol("XAUUSD", bid = 2000.0, spread = 30, point = 0.01, digits = 2, contract_size = 100.0)
+    trader = Trader(backend = terminal, deviation = 20, quiet = True)
+
+    #spread wider than the deviation: filled at once, SL/TP placed from the fill price
+    buy = trader.open_buy("XAUUSD", lot = 0.1, stop_loss = 500, take_profit = 1000)
+    sell = trader.open_sell("XAUUSD", lot = 0.1, stop_loss = 500, take_profit = 1000)
+    for report, price, sl, tp in ((buy, 2000.3, 1995.3, 2010.3), (sell, 2000.0, 2005.0, 1990.0)):
+        assert report.ok
+        assert report.retcode == constants.TRADE_RETCODE_DONE
+        assert report.attempts == 1
+        assert report.price == price
+        assert (report.sl, report.tp) == (sl, tp)
+
+
+def test_requoted_market_order_fills_when_repriced():
+    terminal = SimulatedTerminal()
+    terminal.add_symbol("XAUUSD", bid = 2000.0, spread = 30, point = 0.01, digits = 2, contract_size = 100.0)
+    trader = Trader(backend = terminal, deviation = 20, quiet = True)
+    #the price moves 50 points between pricing and the first send
+    moved = []
+    trader.hooks.add(before = lambda name, args, kwargs: moved or moved.append(terminal.set_tick("XAUUSD", 2000.5)),
+                     calls = "order_send")
+
+    report = trader.open_buy("XAUUSD", lot = 0.1)
+    assert report.ok
+    assert report.attempts == 2
+    assert report.price == 2000.8
+
+
+def _without_tick(terminal, symbol):
+    symbol_info_tick = terminal.symbol_info_tick
+    terminal.symbol_info_tick = lambda name: None if name == symbol else symbol_info_tick(name)
+
+
+def test_market_order_without_tick_is_rejected():
+    terminal = SimulatedTerminal(["EURUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    trader.symbols.get("EURUSD")
+    _without_tick(terminal, "EURUSD")
+
+    report = trader.open_buy("EURUSD")
+    assert not report.ok
+    assert report.retcode == constants.TRADE_RETCODE_PRICE_OFF
+    assert report.attempts == 0
+    assert terminal.calls["order_send"] == 0
+
+
+def test_close_without_tick_is_rejected():
+    terminal = SimulatedTerminal(["EURUSD", "GBPUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    ticket = trader.open_buy("EURUSD").order
+    trader.open_sell("GBPUSD")
+    _without_tick(terminal, "EURUSD")
+
+    report = trader.close_buy(ticket_id = ticket)
+    assert report.retcode == constants.TRADE_RETCODE_PRICE_OFF
+
+    report = trader.close_all()
+    assert len(report.succeeded) == 1 and report.succeeded[0].symbol == "GBPUSD"
+    assert [r.retcode for r in report.failed] == [constants.TRADE_RETCODE_PRICE_OFF]
+
+
+def test_get_rates_without_count_or_range_raises_value_error():
+    terminal = SimulatedTerminal(["EURUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    with pytest.raises(ValueError, match = "count"):
+        trader.get_rates("EURUSD", "M1")
+    with pytest.raises(ValueError, match = "count"):
+        trader.get_rates("EURUSD", "M1", date_from = 0)
+    with pytest.raises(ValueError, match = "count"):
+        trader.get_ticks("EURUSD", 0)
+    assert len(trader.get_rates("EURUSD", "M1", count = 10)) == 0
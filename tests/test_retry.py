@@ -0,0 +1,28 @@
+from MT5pytrader import constants
+from MT5pytrader.reports import rejection_report
+from MT5pytrader.retry import RetryPolicy, send_with_retry
+
+
+def _send(retcodes):
+    sent = []
+
+    def send(request):
+        sent.append(request)
+        return rejection_report("open_buy", request, retcodes[len(sent) - 1], "")
+
+    return send, sent
+
+
+def test_timeouts_and_connection_errors_are_not_resent_by_default():
+    for retcode in (constants.TRADE_RETCODE_TIMEOUT, constants.TRADE_RETCODE_CONNECTION):
+        send, sent = _send([retcode, constants.TRADE_RETCODE_DONE])
+        report = send_with_retry(send, {}, RetryPolicy(), sleep = lambda seconds: None)
+        assert report.retcode == retcode
+        assert report.attempts == 1
+        assert len(sent) == 1
+
+
+def test_requotes_are_resent():
+    send, sent = _send([constants.TRADE_RETCODE_REQUOTE, constants.TRADE_RETCODE_REQUOTE, constants.TRADE_RETCODE_PRICE_OFF])
+    report = send_with_retry(send, {}, RetryPolicy(max_attempts = 3), sleep = lambda seconds: None)
+    assert report.attempts == 3
@@ -0,0 +1,88 @@
+import time
+
+from MT5pytrader import SimulatedTerminal, StopManager, StopRule, Trader
+
+
+def test_modifications_are_validated_with_the_position():
+    terminal = SimulatedTerminal(["EURUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    ticket = trader.open_buy("EURUSD").order
+    checked = []
+    check = trader.validator.check
+    trader.validator.check = lambda request, position = None, **kwargs: checked.append(position) or check(request, position, **kwargs)
+
+    manager = StopManager(trader, StopRule(break_even_trigger = 10))
+    manager.manage(ticket)
+    terminal.set_tick("EURUSD", 1.0003)
+    manager.on_tick("EURUSD", 1.0003, 1.0004)
+    assert manager.run_pending() == 1
+    assert manager.modifications == 1
+
+    #the position (at the latest bid) reaches the validator, so freeze and stops levels are checked
+    assert [(position.ticket, position.price_current) for position in checked] == [(ticket, 1.0003)]
+
+
+def test_rescheduling_does_not_grow_the_heaps():
+    terminal = SimulatedTerminal(["EURUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    position = trader.positions_snapshot(ticket = trader.open_buy("EURUSD").order)[0]
+    manager = StopManager(trader, StopRule(trail_distance = 100, max_hold = 3600))
+    for _ in range(5000):
+        manager.manage(position)
+    manager.unmanage(position.ticket)
+    for _ in range(5000):
+        manager.manage(position)
+
+    stats = manager.stats()
+    assert stats["managed"] == 1
+    assert stats["heap_entries"] + stats["deadlines"] <= 2 + 1024
+
+
+def test_max_hold_follows_the_trade_server_time():
+    #a trade server three hours behind the local clock
+    server = [time.time() - 3 * 3600]
+    terminal = SimulatedTerminal(["EURUSD"], clock = lambda: server[0])
+    trader = Trader(backend = terminal, quiet = True)
+    ticket = trader.open_buy("EURUSD").order
+    manager = StopManager(trader, StopRule(max_hold = 60))
+    manager.manage(ticket)
+    assert manager.run_pending() == 0
+    assert len(trader.positions_snapshot()) == 1
+
+    server[0] += 120
+    terminal.set_tick("EURUSD", 1.0001)
+    tick = terminal.symbol_info_tick("EURUSD")
+    manager.on_tick("EURUSD", tick.bid, tick.ask, tick.time_msc)
+    assert manager.run_pending() == 1
+    assert manager.time_exits == 1
+    assert len(trader.positions_snapshot()) == 0
+
+
+def test_manage_does_not_call_the_terminal_under_the_lock():
+    import threading
+
+    terminal = SimulatedTerminal(["EURUSD"])
+    trader = Trader(backend = terminal, quiet = True)
+    ticket = trader.open_buy("EURUSD").order
+    manager = StopManager(trader, StopRule(trail_distance = 100, max_hold = 60))
+    trader.symbols.invalidate()
+
+    locked = []
+    def probe():
+        #another thread (e.g on_tick()) must be able to take the lock meanwhile
+        free = manager._cond.acquire(blocking = False)
+        if free:
+            manager._cond.release()
+        locked.append(not free)
+
+    for name in ("symbol_info_tick", "symbol_info"):
+        call = getattr(terminal, name)
+        def spy(*args, call = call):
+            thread = threading.Thread(target = probe)
+            thread.start()
+            thread.join()
+            return call(*args)
+        setattr(terminal, name, spy)
+    assert manager.manage(ticket)
+    assert len(locked) == 2 and not any(locked)
+    assert manager.stats()["deadlines"] == 1
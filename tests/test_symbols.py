@@ -0,0 +1,31 @@
+from MT5pytrader import SimulatedTerminal, Trader
+
+
+def test_quiet_trader_does_not_print_marketwatch_messages(capsys):
+    terminal = SimulatedTerminal()
+    terminal.add_symbol("EURUSD", visible = False)
+    trader = Trader(backend = terminal, quiet = True)
+    assert trader.symbols.get("EURUSD").visible
+    assert capsys.readouterr().out == ""
+
+
+def test_concurrent_lookups_count_every_hit_and_miss():
+    import sys
+    import threading
+
+    trader = Trader(backend = SimulatedTerminal(["EURUSD", "GBPUSD"]), symbol_cache_ttl = 0.0001, quiet = True)
+    cache = trader.symbols
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target = lambda: [cache.get(("EURUSD", "GBPUSD")[i % 2]) for i in range(5000)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 5000
+    assert stats["size"] == 2
@@ -0,0 +1,41 @@
+from MT5pytrader import SimulatedTerminal, TickStreamer
+
+
+def test_copy_stream_moves_past_a_second_with_more_ticks_than_capacity():
+    base = 1_700_000_000_000
+    terminal = SimulatedTerminal(clock = lambda: base / 1000)
+    terminal.add_symbol("EURUSD", bid = 1.0)
+    streamer = TickStreamer(terminal, ["EURUSD"], capacity = 8, mode = "copy")
+    assert streamer.poll_once() == {"EURUSD": 1}
+
+    #20 ticks inside one second
+    for i in range(1, 21):
+        terminal.set_tick("EURUSD", round(1.0 + i * 0.0001, 5), time_msc = base + i * 10)
+    assert streamer.poll_once() == {"EURUSD": 20}
+    assert streamer.latest("EURUSD").bid == 1.002
+
+    terminal.set_tick("EURUSD", 1.0021, time_msc = base + 300)
+    assert streamer.poll_once() == {"EURUSD": 1}
+    assert streamer.latest("EURUSD").bid == 1.0021
+    assert list(streamer.window("EURUSD")["time_msc"]) == [base + i * 10 for i in range(14, 21)] + [base + 300]
+
+
+def test_window_waits_for_a_write_in_progress():
+    import threading
+
+    from MT5pytrader.ticks import TickBuffer
+
+    buffer = TickBuffer(capacity = 4)
+    for i in range(6):
+        buffer.append(1000 + i, 1.0 + i, 1.1 + i)
+    views = []
+    with buffer._lock:
+        reader = threading.Thread(target = lambda: views.append(buffer.window(3)))
+        reader.start()
+        reader.join(0.05)
+        assert reader.is_alive()
+        #a writer moves the head while the reader waits
+        buffer._write((1006, 7.0, 7.1, 0.0, 0.0, 0))
+        buffer._last_msc = 1006
+    reader.join()
+    assert list(views[0]["time_msc"]) == [1004, 1005, 1006]